@@ -0,0 +1,91 @@
+import time
+import typing as t
+from collections import OrderedDict
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, UOWTransaction
+
+from app.models import UserOrm
+from app.schemas import User
+
+
+class UserCache:
+    """Bounded LRU cache of users resolved from access tokens, keyed by the token subject.
+
+    Entries expire ttl seconds after they are stored. Once watch() is called, users changed or deleted
+    through the ORM are dropped when the transaction commits. Changes made with bulk statements or outside
+    the application are only picked up when the entry expires.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60, clock: t.Callable[[], float] = time.monotonic) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: OrderedDict[str, tuple[float, User]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.info_key = ('user_cache', id(self))
+
+    def get(self, key: str) -> User | None:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, user: User) -> None:
+        self.entries[key] = (self.clock() + self.ttl, user)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        if self.entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def collect_changed_users(self, session: Session, flush_context: UOWTransaction) -> None:  # noqa: U100
+        changed = session.info.setdefault(self.info_key, set())
+        changed.update(str(obj.user_id) for obj in session.dirty | session.deleted if isinstance(obj, UserOrm))
+
+    def invalidate_changed_users(self, session: Session) -> None:
+        for key in session.info.pop(self.info_key, ()):
+            self.invalidate(key)
+
+    def forget_changed_users(self, session: Session, *args: t.Any) -> None:  # noqa: U100
+        session.info.pop(self.info_key, None)
+
+    def watch(self) -> None:
+        """Invalidates users changed through any ORM session once their transaction commits."""
+        event.listen(Session, 'after_flush', self.collect_changed_users)
+        event.listen(Session, 'after_commit', self.invalidate_changed_users)
+        event.listen(Session, 'after_soft_rollback', self.forget_changed_users)
+
+    def unwatch(self) -> None:
+        event.remove(Session, 'after_flush', self.collect_changed_users)
+        event.remove(Session, 'after_commit', self.invalidate_changed_users)
+        event.remove(Session, 'after_soft_rollback', self.forget_changed_users)
+
+
+def get_user_cache(request: Request) -> UserCache:
+    return request.app.state.container.user_cache
@@ -1,44 +1,55 @@
+import datetime
+
 from httpx import AsyncClient
 
 from app.exceptions import ApiClientException
-from app.schemas import Notification, Campaign, Recipient, StatusNotification
+from app.schemas import Campaign, NotificationStatusUpdate, NotificationsUpdated, NextLaunch, FanoutPage, LeasesUpdated
 
 
 class ApiClient:
     def __init__(self, client: AsyncClient) -> None:
         self.client = client
         
-    async def prepare_notifications(self, campaign: Campaign, recipients: list[Recipient]) -> list[Notification]:
-        recipients_id = [recipient.recipient_id for recipient in recipients]
+    async def acquire_campaigns_for_launch(self, batch_size: int = 1, materialize: bool = False) -> list[Campaign]:
         response = await self.client.post(
-            '/notifications/add/many', 
-            json={'campaign_id': campaign.campaign_id, 'recipients_id': recipients_id}
+            '/campaigns/acquire', params={'batch_size': batch_size, 'materialize': materialize}
         )
-        if response.status_code != 201:
-            raise ApiClientException(status_code=422, detail='Failed to receive notifications')
-        return [Notification(**notification) for notification in response.json()]
-        
-    async def fetch_recipients(self) -> list[Recipient]:
-        response = await self.client.get('/recipients/')
-        if response.status_code != 200: 
-            raise ApiClientException(status_code=422, detail='Failed to get recipients')
-        return [Recipient(**recipient) for recipient in response.json()]
-    
-    async def acquire_campaign_for_launch(self) -> Campaign:
-        response = await self.client.post('/campaigns/acquire')
         if response.status_code != 200:
             raise ApiClientException(status_code=422, detail='No available campaigns for launch')
-        return Campaign(**response.json())
+        return [Campaign(**campaign) for campaign in response.json()]
+    
+    async def fanout_campaign(
+        self, worker_id: str, limit: int = 1000, window: int = 10000, lease_ttl: float = 30
+    ) -> FanoutPage:
+        response = await self.client.post(
+            '/campaigns/fanout',
+            params={'worker_id': worker_id, 'limit': limit, 'window': window, 'lease_ttl': lease_ttl}
+        )
+        if response.status_code != 200:
+            raise ApiClientException(status_code=422, detail='No campaigns to fan out')
+        return FanoutPage(**response.json())
+    
+    async def heartbeat(self, worker_id: str, lease_ttl: float = 30) -> int:
+        response = await self.client.post(
+            '/campaigns/fanout/heartbeat', params={'worker_id': worker_id, 'lease_ttl': lease_ttl}
+        )
+        if response.status_code != 200:
+            raise ApiClientException(status_code=422, detail='Failed to extend fan-out leases')
+        return LeasesUpdated(**response.json()).updated
+    
+    async def get_next_launch_date(self) -> datetime.datetime | None:
+        response = await self.client.get('/campaigns/next-launch')
+        if response.status_code != 200:
+            raise ApiClientException(status_code=422, detail='Failed to get next launch date')
+        return NextLaunch(**response.json()).launch_date
     
-    async def update_notification_status(
-        self, recipient_id: int, campaign_id: int, status_notification: StatusNotification
-    ) -> None:
+    async def update_notification_statuses(self, updates: list[NotificationStatusUpdate]) -> int:
         response = await self.client.post(
-            f'/notifications/{campaign_id}/recipients/{recipient_id}/run',
-            json={'status': status_notification}
+            '/notifications/status/bulk', json=[update.model_dump(mode='json') for update in updates]
         )
         if response.status_code != 200:
-            raise ApiClientException(status_code=404, detail='Failed receiving notification for update')
+            raise ApiClientException(status_code=422, detail='Failed to update notification statuses')
+        return NotificationsUpdated(**response.json()).updated
         
     async def complete_campaign(self) -> Campaign:
         response = await self.client.post('/campaigns/complete/')
@@ -1,7 +1,20 @@
+import asyncio
+import logging
+import time
+import typing as t
+
 import aio_pika
 from aio_pika.abc import AbstractRobustConnection, AbstractChannel
+from aio_pika.exceptions import AMQPError, ChannelInvalidStateError
 
 from app.config import Config
+from app.exceptions import PublishException
+
+
+logger = logging.getLogger('app.clients.broker_client')
+
+# Failures after which a message may still be delivered by publishing it again
+RETRYABLE_ERRORS = (AMQPError, ChannelInvalidStateError, ConnectionError, asyncio.TimeoutError)
 
 
 class RabbitMQClient:
@@ -10,14 +23,109 @@ class RabbitMQClient:
         self.connection: AbstractRobustConnection | None = None
         # TODO AlexP: Подумать что сделать аннотацией
         self.channel: AbstractChannel = None   # type: ignore
+        self.publishers: dict[str, Publisher] = {}
                
     async def connect(self) -> None:
         if not self.connection or self.connection.is_closed:
             self.connection = await aio_pika.connect_robust(self.config.RABBIT_MQ_URL)
             self.channel = await self.connection.channel()
-            await self.channel.set_qos(prefetch_count=1)    
+            await self.channel.set_qos(prefetch_count=self.config.RMQ_PREFETCH_COUNT)
 
     async def get_channel(self) -> AbstractChannel:
         if not self.channel:
             await self.connect()
         return self.channel
+
+    def get_publisher(self, queue: str) -> 'Publisher':
+        """Returns the publisher of the queue, one per queue is shared by every caller of this client."""
+        if queue not in self.publishers:
+            self.publishers[queue] = Publisher(
+                self,
+                queue,
+                window=self.config.RMQ_PUBLISH_WINDOW,
+                max_retries=self.config.RMQ_PUBLISH_MAX_RETRIES,
+                retry_delay=self.config.RMQ_PUBLISH_RETRY_DELAY,
+            )
+        return self.publishers[queue]
+
+
+class Publisher:
+    """Publishes messages to a durable queue through the default exchange with publisher confirms.
+
+    The queue is declared once, the robust channel declares it again after a reconnect. Up to window messages
+    are in flight at a time and each window waits for its confirms, messages that were nacked or lost are
+    published again.
+    """
+
+    def __init__(
+        self,
+        broker_client: RabbitMQClient,
+        queue: str,
+        window: int = 1000,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,
+        clock: t.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.broker_client = broker_client
+        self.queue = queue
+        self.window = window
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self.declared = False
+        self.published = 0
+        self.retried = 0
+        self.failed = 0
+        self.publish_seconds = 0.0
+
+    async def declare(self) -> None:
+        if not self.declared:
+            channel = await self.broker_client.get_channel()
+            await channel.declare_queue(self.queue, durable=True)
+            self.declared = True
+
+    async def publish_window(self, messages: t.Sequence[aio_pika.Message]) -> list[aio_pika.Message]:
+        """Publishes the messages concurrently and returns the ones the broker did not confirm."""
+        channel = await self.broker_client.get_channel()
+        results = await asyncio.gather(
+            *(channel.default_exchange.publish(message, routing_key=self.queue) for message in messages),
+            return_exceptions=True
+        )
+        unconfirmed = []
+        for message, result in zip(messages, results):
+            if isinstance(result, RETRYABLE_ERRORS):
+                unconfirmed.append(message)
+            elif isinstance(result, BaseException):
+                raise result
+        return unconfirmed
+
+    async def publish(self, messages: t.Sequence[aio_pika.Message]) -> None:
+        """Returns once the broker has confirmed every message, raises PublishException when some of them are still
+        unconfirmed after max_retries attempts."""
+        await self.declare()
+        started_at = self.clock()
+        try:
+            for start in range(0, len(messages), self.window):
+                pending = list(messages[start:start + self.window])
+                for attempt in range(self.max_retries + 1):
+                    if attempt:
+                        logger.warning('Publishing %s unconfirmed messages to %s again', len(pending), self.queue)
+                        self.retried += len(pending)
+                        await asyncio.sleep(self.retry_delay * attempt)
+                    pending = await self.publish_window(pending)
+                    if not pending:
+                        break
+                self.published += len(messages[start:start + self.window]) - len(pending)
+                if pending:
+                    self.failed += len(pending)
+                    raise PublishException(self.queue, len(pending))
+        finally:
+            self.publish_seconds += self.clock() - started_at
+
+    def stats(self) -> dict[str, float]:
+        return {
+            'published': self.published,
+            'retried': self.retried,
+            'failed': self.failed,
+            'messages_per_second': self.published / self.publish_seconds if self.publish_seconds else 0.0,
+        }
@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import Any
+
+import asyncpg
+
+
+logger = logging.getLogger('app.clients.pg_listener')
+
+
+class PgListener:
+    """Waits for NOTIFY on a Postgres channel, a lost connection degrades waits to plain timeouts."""
+
+    def __init__(self, dsn: str, channel: str) -> None:
+        self.dsn = dsn
+        self.channel = channel
+        self.connection: asyncpg.Connection | None = None
+        self.payloads: list[str] = []
+        self.notified = asyncio.Event()
+
+    def on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:  # noqa: U100
+        self.payloads.append(payload)
+        self.notified.set()
+
+    async def connect(self) -> None:
+        if self.connection is not None and not self.connection.is_closed():
+            return
+        self.connection = await asyncpg.connect(self.dsn)
+        await self.connection.add_listener(self.channel, self.on_notification)
+
+    async def wait(self, timeout: float) -> list[str]:
+        """Returns the payloads received since the previous call, or an empty list once the timeout expires."""
+        try:
+            await self.connect()
+        except (OSError, asyncpg.PostgresError):
+            logger.exception('Failed to listen on channel %s, falling back to polling', self.channel)
+        try:
+            await asyncio.wait_for(self.notified.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.notified.clear()
+        payloads, self.payloads = self.payloads, []
+        return payloads
+
+    async def close(self) -> None:
+        if self.connection is not None and not self.connection.is_closed():
+            await self.connection.close()
+        self.connection = None
@@ -3,6 +3,8 @@ import logging.config
 import yaml
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.security import ServiceKey
+
 
 class Config(BaseSettings):
     DB_USER: str
@@ -11,6 +13,13 @@ class Config(BaseSettings):
     DB_PORT: str
     DB_NAME: str
     
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30
+    DB_CONNECT_TIMEOUT: float = 10
+    DB_COMMAND_TIMEOUT: float = 60
+    
     APP_URL: str
     EMAIL_HOST: str
     EMAIL_PORT: int
@@ -21,18 +30,53 @@ class Config(BaseSettings):
     JWT_ALGORITHM: str
     JWT_EXP: int
     
-    TOKEN_WORKER: str
+    CAMPAIGN_WORKER_API_KEY: str
+    EMAIL_WORKER_API_KEY: str
+    SERVICE_API_KEYS: dict[str, ServiceKey] = {}
+    
+    AUTH_CACHE_SIZE: int = 1024
+    AUTH_CACHE_TTL: float = 60
+    PASSWORD_HASH_CONCURRENCY: int = 4
     
     RMQ_USER: str
     RMQ_PASS: str
     RMQ_HOST: str
     RMQ_PORT: int
+    RMQ_PREFETCH_COUNT: int = 200
+    RMQ_PUBLISH_WINDOW: int = 1000
+    RMQ_PUBLISH_MAX_RETRIES: int = 3
+    RMQ_PUBLISH_RETRY_DELAY: float = 0.5
+    
+    CAMPAIGN_ACQUIRE_BATCH_SIZE: int = 10
+    CAMPAIGN_POLL_INTERVAL: float = 60
+    CAMPAIGN_FANOUT_PAGE_SIZE: int = 1000
+    CAMPAIGN_FANOUT_WINDOW: int = 10000
+    CAMPAIGN_FANOUT_THROTTLE_INTERVAL: float = 0.5
+    CAMPAIGN_FANOUT_CONCURRENCY: int = 4
+    CAMPAIGN_FANOUT_LEASE_TTL: float = 30
+    
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    
+    RETENTION_DAYS: float = 30
+    RETENTION_INTERVAL: float = 3600
+    
+    NOTIFICATIONS_PARTITION_SIZE: int = 1000
+    NOTIFICATIONS_PARTITIONS_AHEAD: int = 4
+    NOTIFICATIONS_PARTITION_INTERVAL: float = 60
+    
+    EMAIL_STATUS_BATCH_SIZE: int = 100
+    EMAIL_STATUS_FLUSH_INTERVAL: float = 1.0
     
     model_config = SettingsConfigDict(env_file='.env', extra="ignore")
 
     @property
     def ASYNC_DATABASE_URL(self) -> str:
         return f'postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
+
+    @property
+    def DATABASE_URL(self) -> str:
+        return f'postgresql://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
     
     @property 
     def RABBIT_MQ_URL(self) -> str:
@@ -56,6 +100,10 @@ class TestConfig(BaseSettings):
     def ASYNC_DATABASE_URL(self) -> str:
         return f'postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
 
+    @property
+    def DATABASE_URL(self) -> str:
+        return f'postgresql://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
+
 
 def load_from_env() -> Config:
     return Config()  # type: ignore
@@ -0,0 +1,88 @@
+import typing as t
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.config import Config
+from app.db import create_db_engine, create_session_maker
+from app.cache import UserCache
+from app.utils import PasswordHasher
+from app.security import ServiceKeyring
+from app.repository.campaign import CampaignRepository
+from app.repository.notification import NotificationRepository
+from app.repository.recipient import RecipientRepository
+from app.repository.job import JobRepository
+from app.repository.user import UserRepository
+from app.service.campaign import CampaignService
+from app.service.recipient import RecipientService
+from app.service.user import UserService, AuthService
+
+
+@dataclass
+class Container:
+    """Config, clients, repositories and services shared by all requests.
+
+    Built once in the lifespan and kept on app.state.container. Dependencies only look objects up here. Services are
+    built on first use from the current repositories and rebuilt after any of them is replaced, so tests swap an
+    implementation by assigning it to the container.
+    """
+    config: Config
+    engine: AsyncEngine
+    session_maker: async_sessionmaker[AsyncSession]
+    user_cache: UserCache
+    password_hasher: PasswordHasher
+    service_keyring: ServiceKeyring
+    campaign_repository: CampaignRepository = field(default_factory=CampaignRepository)
+    notification_repository: NotificationRepository = field(default_factory=NotificationRepository)
+    recipient_repository: RecipientRepository = field(default_factory=RecipientRepository)
+    job_repository: JobRepository = field(default_factory=JobRepository)
+    user_repository: UserRepository = field(default_factory=UserRepository)
+
+    def __setattr__(self, name: str, value: t.Any) -> None:
+        super().__setattr__(name, value)
+        for service in SERVICES:
+            self.__dict__.pop(service, None)
+
+    @cached_property
+    def campaign_service(self) -> CampaignService:
+        return CampaignService(self.campaign_repository, self.notification_repository, self.job_repository)
+
+    @cached_property
+    def recipient_service(self) -> RecipientService:
+        return RecipientService(self.recipient_repository, self.job_repository)
+
+    @cached_property
+    def user_service(self) -> UserService:
+        return UserService(self.user_repository, self.password_hasher)
+
+    @cached_property
+    def auth_service(self) -> AuthService:
+        return AuthService(self.user_repository, self.config, self.password_hasher, cache=self.user_cache)
+
+    @classmethod
+    def create(cls, config: Config) -> 'Container':
+        engine = create_db_engine(config)
+        user_cache = UserCache(max_size=config.AUTH_CACHE_SIZE, ttl=config.AUTH_CACHE_TTL)
+        user_cache.watch()
+        return cls(
+            config=config,
+            engine=engine,
+            session_maker=create_session_maker(engine),
+            user_cache=user_cache,
+            password_hasher=PasswordHasher(max_concurrency=config.PASSWORD_HASH_CONCURRENCY),
+            service_keyring=ServiceKeyring(config.SERVICE_API_KEYS),
+        )
+
+    async def close(self) -> None:
+        self.password_hasher.shutdown()
+        self.user_cache.unwatch()
+        await self.engine.dispose()
+
+
+SERVICES = ('campaign_service', 'recipient_service', 'user_service', 'auth_service')
+
+
+def get_container(request: Request) -> Container:
+    return request.app.state.container
@@ -1,25 +1,97 @@
-from typing import Callable, AsyncGenerator
+import time
+from typing import Any, AsyncGenerator, cast
 
-from fastapi import Depends
+import asyncpg
+from fastapi import Depends, Request
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
 
-from app.config import load_from_env, Config
+from app.config import Config
 
 
-def get_engine(config: Config = Depends(load_from_env)) -> AsyncEngine:
-    return create_async_engine(url=config.ASYNC_DATABASE_URL)
-    
-    
-def get_session_maker(engine: AsyncEngine = Depends(get_engine)) -> Callable[[], AsyncSession]:
+class MonitoredPool(AsyncAdaptedQueuePool):
+    """Queue pool that counts checkouts and measures how long callers wait for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+def create_db_engine(config: Config) -> AsyncEngine:
+    return create_async_engine(
+        url=config.ASYNC_DATABASE_URL,
+        poolclass=MonitoredPool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        connect_args={'timeout': config.DB_CONNECT_TIMEOUT, 'command_timeout': config.DB_COMMAND_TIMEOUT},
+    )
+
+
+def create_session_maker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(bind=engine, expire_on_commit=False)
 
 
-async def get_db_session(db: Callable[[], AsyncSession] = Depends(get_session_maker)) -> AsyncGenerator:
+def get_pool_stats(engine: AsyncEngine) -> dict[str, int | float]:
+    pool = engine.pool
+    stats: dict[str, int | float] = {
+        'size': 0, 'checked_in': 0, 'checked_out': 0, 'overflow': 0,
+        'checkouts': 0, 'checkout_timeouts': 0, 'wait_total': 0.0, 'wait_max': 0.0,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(), checked_in=pool.checkedin(), checked_out=pool.checkedout(), overflow=pool.overflow()
+        )
+    if isinstance(pool, MonitoredPool):
+        stats.update(
+            checkouts=pool.checkouts,
+            checkout_timeouts=pool.checkout_timeouts,
+            wait_total=pool.wait_total,
+            wait_max=pool.wait_max,
+        )
+    return stats
+
+
+def get_engine(request: Request) -> AsyncEngine:
+    return request.app.state.container.engine
+
+
+def get_session_maker(request: Request) -> async_sessionmaker[AsyncSession]:
+    return request.app.state.container.session_maker
+
+
+async def get_db_session(db: async_sessionmaker[AsyncSession] = Depends(get_session_maker)) -> AsyncGenerator:
     async with db() as session:
         yield session
 
 
+async def get_driver_connection(session: AsyncSession) -> asyncpg.Connection:
+    """Returns the asyncpg connection of the session's transaction, for COPY and other driver-level calls."""
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    return cast(asyncpg.Connection, raw_connection.driver_connection)
+
+
 class BaseOrm(DeclarativeBase):
     def __repr__(self) -> str:
         return f'<{self.__class__.__name__}>'
@@ -0,0 +1,127 @@
+"""Database-side objects that are not expressed by the ORM models.
+
+They are attached to the metadata in app.models, so metadata.create_all installs them as well;
+migrations carry their own copies.
+"""
+from sqlalchemy import DDL
+
+
+def ddl(statement: str) -> DDL:
+    return DDL(statement)  # type: ignore[no-untyped-call]
+
+
+CAMPAIGN_EVENTS_CHANNEL = 'campaign_events'
+
+CAMPAIGN_STATS_FUNCTION = ddl(
+    '''
+    CREATE OR REPLACE FUNCTION campaign_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO campaign_stats AS s (campaign_id, pending, sent, delivered, undelivered)
+            SELECT campaign_id,
+                   count(*) FILTER (WHERE status = 'PENDING'),
+                   count(*) FILTER (WHERE status = 'SENT'),
+                   count(*) FILTER (WHERE status = 'DELIVERED'),
+                   count(*) FILTER (WHERE status = 'UNDELIVERED')
+            FROM new_rows
+            GROUP BY campaign_id
+            ON CONFLICT (campaign_id) DO UPDATE SET
+                pending = s.pending + EXCLUDED.pending,
+                sent = s.sent + EXCLUDED.sent,
+                delivered = s.delivered + EXCLUDED.delivered,
+                undelivered = s.undelivered + EXCLUDED.undelivered;
+        ELSIF TG_OP = 'UPDATE' THEN
+            UPDATE campaign_stats AS s SET
+                pending = s.pending + d.pending,
+                sent = s.sent + d.sent,
+                delivered = s.delivered + d.delivered,
+                undelivered = s.undelivered + d.undelivered
+            FROM (
+                SELECT campaign_id,
+                       coalesce(sum(delta) FILTER (WHERE status = 'PENDING'), 0) AS pending,
+                       coalesce(sum(delta) FILTER (WHERE status = 'SENT'), 0) AS sent,
+                       coalesce(sum(delta) FILTER (WHERE status = 'DELIVERED'), 0) AS delivered,
+                       coalesce(sum(delta) FILTER (WHERE status = 'UNDELIVERED'), 0) AS undelivered
+                FROM (
+                    SELECT campaign_id, status, 1 AS delta FROM new_rows
+                    UNION ALL
+                    SELECT campaign_id, status, -1 AS delta FROM old_rows
+                ) AS changes
+                GROUP BY campaign_id
+            ) AS d
+            WHERE s.campaign_id = d.campaign_id;
+            -- Campaigns whose last pending notification was resolved can be completed right away
+            PERFORM pg_notify(
+                'campaign_events', json_build_object('event', 'drained', 'campaign_id', s.campaign_id)::text
+            )
+            FROM campaign_stats AS s
+            WHERE s.pending = 0 AND s.campaign_id IN (SELECT campaign_id FROM old_rows WHERE status = 'PENDING');
+        ELSE
+            -- Delivery outcomes are history and outlive the rows, only in-flight counters go down
+            UPDATE campaign_stats AS s SET
+                pending = s.pending - d.pending,
+                sent = s.sent - d.sent
+            FROM (
+                SELECT campaign_id,
+                       count(*) FILTER (WHERE status = 'PENDING') AS pending,
+                       count(*) FILTER (WHERE status = 'SENT') AS sent
+                FROM old_rows
+                GROUP BY campaign_id
+            ) AS d
+            WHERE s.campaign_id = d.campaign_id;
+            -- Campaigns whose last pending notification was resolved can be completed right away
+            PERFORM pg_notify(
+                'campaign_events', json_build_object('event', 'drained', 'campaign_id', s.campaign_id)::text
+            )
+            FROM campaign_stats AS s
+            WHERE s.pending = 0 AND s.campaign_id IN (SELECT campaign_id FROM old_rows WHERE status = 'PENDING');
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    '''
+)
+
+CAMPAIGN_STATS_TRIGGERS = [
+    ddl(
+        '''
+        CREATE TRIGGER notifications_stats_insert AFTER INSERT ON notifications
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+        '''
+    ),
+    ddl(
+        '''
+        CREATE TRIGGER notifications_stats_update AFTER UPDATE ON notifications
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+        '''
+    ),
+    ddl(
+        '''
+        CREATE TRIGGER notifications_stats_delete AFTER DELETE ON notifications
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+        '''
+    ),
+]
+
+OUTBOX_ENQUEUE_FUNCTION = ddl(
+    '''
+    CREATE OR REPLACE FUNCTION outbox_enqueue() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO outbox (campaign_id, recipient_id)
+        SELECT campaign_id, recipient_id FROM new_rows WHERE status = 'PENDING';
+        RETURN NULL;
+    END
+    $$
+    '''
+)
+
+OUTBOX_ENQUEUE_TRIGGER = ddl(
+    '''
+    CREATE TRIGGER notifications_outbox_insert AFTER INSERT ON notifications
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION outbox_enqueue()
+    '''
+)
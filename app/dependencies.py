@@ -1,49 +1,63 @@
 from typing import Annotated
 
 from fastapi import Depends
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer, SecurityScopes
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repository.campaign import CampaignRepository
 from app.repository.notification import NotificationRepository
 from app.repository.user import UserRepository
+from app.repository.recipient import RecipientRepository
+from app.repository.job import JobRepository
 from app.service.campaign import CampaignService
+from app.service.recipient import RecipientService
 from app.service.user import UserService, AuthService
 from app.db import get_db_session
+from app.container import Container, get_container
+from app.security import Service, ServiceKeyring, get_service_keyring
+from app.exceptions import CredentialsException, ForbiddenException
 from app.schemas import User
-from app.config import load_from_env
 
 
 get_oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login')
+get_optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login', auto_error=False)
+get_api_key_scheme = APIKeyHeader(name='X-API-Key', auto_error=False)
 
 
-def get_campaign_repository() -> CampaignRepository:
-    return CampaignRepository()
+def get_campaign_repository(container: Annotated[Container, Depends(get_container)]) -> CampaignRepository:
+    return container.campaign_repository
 
 
-def get_notification_repository() -> NotificationRepository:
-    return NotificationRepository()
+def get_notification_repository(container: Annotated[Container, Depends(get_container)]) -> NotificationRepository:
+    return container.notification_repository
 
 
-def get_user_repository() -> UserRepository:
-    return UserRepository()
+def get_user_repository(container: Annotated[Container, Depends(get_container)]) -> UserRepository:
+    return container.user_repository
 
 
-def get_campaign_service(
-    campaign_repository: Annotated[CampaignRepository, Depends(get_campaign_repository)],
-    notification_repository: Annotated[NotificationRepository, Depends(get_notification_repository)] 
-) -> CampaignService:
-    return CampaignService(campaign_repository, notification_repository)
+def get_recipient_repository(container: Annotated[Container, Depends(get_container)]) -> RecipientRepository:
+    return container.recipient_repository
 
 
-def get_user_service(
-    user_repository: Annotated[UserRepository, Depends(get_user_repository)]
-) -> UserService:
-    return UserService(user_repository)
+def get_job_repository(container: Annotated[Container, Depends(get_container)]) -> JobRepository:
+    return container.job_repository
 
 
-def get_auth_service(user_repository: Annotated[UserRepository, Depends(get_user_repository)]) -> AuthService:
-    return AuthService(user_repository, config=load_from_env())
+def get_campaign_service(container: Annotated[Container, Depends(get_container)]) -> CampaignService:
+    return container.campaign_service
+
+
+def get_recipient_service(container: Annotated[Container, Depends(get_container)]) -> RecipientService:
+    return container.recipient_service
+
+
+def get_user_service(container: Annotated[Container, Depends(get_container)]) -> UserService:
+    return container.user_service
+
+
+def get_auth_service(container: Annotated[Container, Depends(get_container)]) -> AuthService:
+    return container.auth_service
 
 
 async def get_current_user(
@@ -52,3 +66,26 @@ async def get_current_user(
     session: Annotated[AsyncSession, Depends(get_db_session)]
 ) -> User:
     return await auth_service.get_current_user(session, token)
+
+
+async def get_current_principal(
+    security_scopes: SecurityScopes,
+    api_key: Annotated[str | None, Depends(get_api_key_scheme)],
+    token: Annotated[str | None, Depends(get_optional_oauth2_scheme)],
+    keyring: Annotated[ServiceKeyring, Depends(get_service_keyring)],
+    auth_service: Annotated[AuthService, Depends(get_auth_service)],
+    session: Annotated[AsyncSession, Depends(get_db_session)]
+) -> User | Service:
+    """Authenticates a user by access token or an internal service by API key.
+
+    Users may call every endpoint, services only the ones whose scopes they hold. API keys are checked
+    in memory without a database round trip.
+    """
+    if api_key is not None:
+        service = keyring.verify(api_key)
+        if missing := set(security_scopes.scopes) - set(service.scopes):
+            raise ForbiddenException(f'Service {service.name} lacks scopes: {", ".join(sorted(missing))}')
+        return service
+    if token is None:
+        raise CredentialsException
+    return await auth_service.get_current_user(session, token)
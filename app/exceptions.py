@@ -27,12 +27,31 @@ class LaunchDateException(AppException):
         )
     
 
+class ForbiddenException(AppException):
+    def __init__(self, detail: str) -> None:
+        super().__init__(detail=detail, status_code=status.HTTP_403_FORBIDDEN)
+
+
 class NoAvailableCampaignsException(AppException):
     def __init__(self, detail: str) -> None:
         super().__init__(
             detail=detail,
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
         )
+
+
+class PartitionUnavailableException(AppException):
+    def __init__(self, campaign_id: int) -> None:
+        super().__init__(
+            detail=f'Notifications of [campaign_id: {campaign_id}] cannot be stored until its partition is created, '
+                   'retry later',
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+class ImportFormatException(AppException):
+    def __init__(self, detail: str) -> None:
+        super().__init__(detail=detail, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY)
     
     
 class ApiClientException(AppException):
@@ -48,6 +67,14 @@ class EmailSendException(AppException):
         )
 
 
+class PublishException(AppException):
+    def __init__(self, queue: str, unconfirmed: int) -> None:
+        super().__init__(
+            detail=f'{unconfirmed} messages to [queue: {queue}] were not confirmed by the broker',
+            status_code=status.HTTP_424_FAILED_DEPENDENCY
+        )
+
+
 class CredentialsException(HTTPException):
     def __init__(self, detail: str = "Could not validate credentials") -> None:
         super().__init__(
@@ -0,0 +1,47 @@
+import csv
+import enum
+import io
+from typing import AsyncIterator
+
+from pydantic import BaseModel
+
+
+EXPORT_CHUNK_ROWS = 1000
+# Lists are written as a single CSV field, the recipient import splits them on the same delimiter
+CSV_LIST_DELIMITER = ';'
+
+
+class ExportFormat(enum.StrEnum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+    
+    @property
+    def media_type(self) -> str:
+        return 'application/x-ndjson' if self is ExportFormat.NDJSON else 'text/csv'
+
+
+async def encode_rows(rows: AsyncIterator[BaseModel], export_format: ExportFormat) -> AsyncIterator[str]:
+    """Serializes rows one by one and yields them in chunks of EXPORT_CHUNK_ROWS lines."""
+    buffer = io.StringIO()
+    writer: csv.DictWriter | None = None
+    count = 0
+    async for row in rows:
+        if export_format is ExportFormat.NDJSON:
+            buffer.write(row.model_dump_json() + '\n')
+        else:
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(type(row).model_fields))
+                writer.writeheader()
+            writer.writerow(
+                {
+                    key: CSV_LIST_DELIMITER.join(map(str, value)) if isinstance(value, list) else value
+                    for key, value in row.model_dump(mode='json').items()
+                }
+            )
+        count += 1
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
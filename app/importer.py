@@ -0,0 +1,62 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+
+from app.export import ExportFormat
+from app.schemas import RecipientImportRow
+from app.exceptions import ImportFormatException
+
+
+REQUIRED_CSV_COLUMNS = {'name', 'lastname', 'age', 'contact_email'}
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Splits a byte stream into text lines without holding more than one line and one chunk in memory."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    tail = ''
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split('\n')
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip('\r')
+    tail += decoder.decode(b'', final=True)
+    if tail:
+        yield tail.rstrip('\r')
+
+
+class RecipientRows:
+    """Validates uploaded recipients one line at a time, one record per line.
+
+    Iterating yields the valid rows, invalid ones are only counted in rejected.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], import_format: ExportFormat) -> None:
+        self.chunks = chunks
+        self.import_format = import_format
+        self.rejected = 0
+
+    async def __aiter__(self) -> AsyncIterator[RecipientImportRow]:
+        header: list[str] | None = None
+        async for line in iter_lines(self.chunks):
+            if not line.strip():
+                continue
+            if self.import_format is ExportFormat.CSV and header is None:
+                header = next(csv.reader([line]))
+                if missing := REQUIRED_CSV_COLUMNS - set(header):
+                    raise ImportFormatException(f'CSV header is missing columns: {", ".join(sorted(missing))}')
+                continue
+            try:
+                yield RecipientImportRow.model_validate(self.parse(line, header))
+            except (ValueError, ValidationError):
+                self.rejected += 1
+
+    def parse(self, line: str, header: list[str] | None) -> Any:
+        if self.import_format is ExportFormat.NDJSON:
+            return json.loads(line)
+        values = next(csv.reader([line]))
+        if header is None or len(values) != len(header):
+            raise ValueError('Column count does not match the header')
+        return dict(zip(header, values))
@@ -1,12 +1,14 @@
 import uuid
 import enum
 import datetime
+import typing as t
 
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import func, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
+from sqlalchemy import event, false, func, text, BigInteger, Enum, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID
 
 from app.db import BaseOrm
+from app.ddl import CAMPAIGN_STATS_FUNCTION, CAMPAIGN_STATS_TRIGGERS, OUTBOX_ENQUEUE_FUNCTION, OUTBOX_ENQUEUE_TRIGGER
 
 
 class StatusCampaign(enum.StrEnum):
@@ -14,6 +16,7 @@ class StatusCampaign(enum.StrEnum):
     RUNNING = 'running'
     FAILED = 'failed'
     DONE = 'done'
+    DELETING = 'deleting'
     
     
 class StatusNotification(enum.StrEnum):
@@ -23,20 +26,51 @@ class StatusNotification(enum.StrEnum):
     UNDELIVERED = 'undelivered'
 
 
+class StatusOutbox(enum.StrEnum):
+    NEW = 'new'
+    SENT = 'sent'
+
+
+class StatusChunk(enum.StrEnum):
+    PENDING = 'pending'
+    DONE = 'done'
+
+
+class JobKind(enum.StrEnum):
+    RECIPIENT_IMPORT = 'recipient_import'
+    CAMPAIGN_DELETE = 'campaign_delete'
+
+
+class StatusJob(enum.StrEnum):
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
 class CampaignOrm(BaseOrm):
     __tablename__ = 'campaigns'
+    __table_args__ = (
+        Index('ix_campaigns_launch_date_created', 'launch_date', postgresql_where=text("status = 'CREATED'")),
+    )
     
     campaign_id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(unique=True)
     content: Mapped[str]
     status: Mapped[StatusCampaign]
     launch_date: Mapped[datetime.datetime]
+    segment: Mapped[dict[str, t.Any] | None] = mapped_column(JSONB)
+    archived_at: Mapped[datetime.datetime | None]
+    # Job of the running deletion, a repeated DELETE restarts it
+    delete_job_id: Mapped[uuid.UUID | None] = mapped_column(UUID, ForeignKey('jobs.job_id', ondelete='SET NULL'))
+    # Notifications are created chunk by chunk while fanout_pending is set
+    fanout_pending: Mapped[bool] = mapped_column(default=False, server_default=false())
     created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
     updated_at: Mapped[datetime.datetime] = mapped_column(
         server_default=func.now(), 
         onupdate=datetime.datetime.now
     )
     
+    delete_job: Mapped['JobOrm | None'] = relationship()
     notifications: Mapped[list['NotificationOrm']] = relationship(
         "NotificationOrm",
         back_populates="campaign", 
@@ -50,12 +84,20 @@ class CampaignOrm(BaseOrm):
 
 class RecipientOrm(BaseOrm):
     __tablename__ = 'recipients'
+    __table_args__ = (
+        Index('ix_recipients_age', 'age'),
+        Index('ix_recipients_email_domain', text("lower(split_part(contact_email, '@', 2))")),
+        Index('ix_recipients_tags', 'tags', postgresql_using='gin'),
+    )
     
     recipient_id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str]
     lastname: Mapped[str]
     age: Mapped[int]
     contact_email: Mapped[str] = mapped_column(unique=True)
+    # Matches the expression of ix_recipients_email_domain, so segment filters on it use the index
+    email_domain: Mapped[str] = column_property(func.lower(func.split_part(contact_email, '@', 2)))
+    tags: Mapped[list[str]] = mapped_column(ARRAY(String), default=list, server_default='{}')
 
     notifications: Mapped[list['NotificationOrm']] = relationship(
         "NotificationOrm",
@@ -69,11 +111,20 @@ class RecipientOrm(BaseOrm):
 
 
 class NotificationOrm(BaseOrm):
+    """Range partitioned by campaign_id, see app.repository.partition for how partitions are managed."""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        Index('ix_notifications_campaign_id_recipient_id', 'campaign_id', 'recipient_id', unique=True),
+        Index('ix_notifications_recipient_id', 'recipient_id'),
+        Index('ix_notifications_campaign_id_pending', 'campaign_id', postgresql_where=text("status = 'PENDING'")),
+        {'postgresql_partition_by': 'RANGE (campaign_id)'},
+    )
     
-    notification_id: Mapped[int] = mapped_column(primary_key=True)
+    notification_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     status: Mapped[StatusNotification]
-    campaign_id: Mapped[int] = mapped_column(ForeignKey('campaigns.campaign_id', ondelete='CASCADE'))
+    campaign_id: Mapped[int] = mapped_column(
+        ForeignKey('campaigns.campaign_id', ondelete='CASCADE'), primary_key=True, autoincrement=False
+    )
     recipient_id: Mapped[int] = mapped_column(ForeignKey('recipients.recipient_id', ondelete='CASCADE'))
 
     campaign: Mapped['CampaignOrm'] = relationship()
@@ -86,6 +137,117 @@ class NotificationOrm(BaseOrm):
     '''
 
 
+class NotificationArchiveOrm(BaseOrm):
+    """Notifications of an archived campaign packed into one row of parallel arrays, which TOAST compresses."""
+    __tablename__ = 'notifications_archive'
+    
+    campaign_id: Mapped[int] = mapped_column(
+        ForeignKey('campaigns.campaign_id', ondelete='CASCADE'), primary_key=True
+    )
+    notification_ids: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    recipient_ids: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    statuses: Mapped[list[StatusNotification]] = mapped_column(
+        ARRAY(Enum(StatusNotification, name='statusnotification', create_type=False))
+    )
+    archived_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}, campaign_id={self.campaign_id}>'
+
+
+class CampaignStatsOrm(BaseOrm):
+    """Notification counters of a campaign, maintained by triggers on notifications."""
+    __tablename__ = 'campaign_stats'
+    
+    campaign_id: Mapped[int] = mapped_column(
+        ForeignKey('campaigns.campaign_id', ondelete='CASCADE'), primary_key=True
+    )
+    pending: Mapped[int] = mapped_column(default=0, server_default='0')
+    sent: Mapped[int] = mapped_column(default=0, server_default='0')
+    delivered: Mapped[int] = mapped_column(default=0, server_default='0')
+    undelivered: Mapped[int] = mapped_column(default=0, server_default='0')
+    
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}, campaign_id={self.campaign_id}, pending={self.pending}>'
+
+
+event.listen(NotificationOrm.__table__, 'after_create', CAMPAIGN_STATS_FUNCTION)
+for trigger in CAMPAIGN_STATS_TRIGGERS:
+    event.listen(NotificationOrm.__table__, 'after_create', trigger)
+
+
+class OutboxOrm(BaseOrm):
+    """Messages waiting to be published to the broker, enqueued by a trigger on notifications."""
+    __tablename__ = 'outbox'
+    __table_args__ = (
+        Index('ix_outbox_new', 'outbox_id', postgresql_where=text("status = 'NEW'")),
+        Index('ix_outbox_campaign_id', 'campaign_id'),
+        Index('ix_outbox_recipient_id', 'recipient_id'),
+    )
+    
+    outbox_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    campaign_id: Mapped[int] = mapped_column(ForeignKey('campaigns.campaign_id', ondelete='CASCADE'))
+    recipient_id: Mapped[int] = mapped_column(ForeignKey('recipients.recipient_id', ondelete='CASCADE'))
+    status: Mapped[StatusOutbox] = mapped_column(default=StatusOutbox.NEW, server_default=StatusOutbox.NEW.name)
+    created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    sent_at: Mapped[datetime.datetime | None]
+    
+    campaign: Mapped['CampaignOrm'] = relationship()
+    recipient: Mapped['RecipientOrm'] = relationship()
+    
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}, id={self.outbox_id}, status={self.status}>'
+
+
+# The trigger spans notifications and outbox, so it is installed once every table exists
+event.listen(BaseOrm.metadata, 'after_create', OUTBOX_ENQUEUE_FUNCTION)
+event.listen(BaseOrm.metadata, 'after_create', OUTBOX_ENQUEUE_TRIGGER)
+
+
+class CampaignChunkOrm(BaseOrm):
+    """Range of recipient ids a campaign is fanned out to, upper_id is None for the last, open-ended chunk.
+
+    cursor is the last recipient_id whose notification is created, so a chunk resumes where it stopped. A worker
+    holds a chunk until lease_expires_at and extends the lease with every page and heartbeat, once it lapses any
+    other worker takes the chunk over.
+    """
+    __tablename__ = 'campaign_chunks'
+    __table_args__ = (
+        Index('ix_campaign_chunks_pending', 'campaign_id', postgresql_where=text("status = 'PENDING'")),
+    )
+    
+    chunk_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    campaign_id: Mapped[int] = mapped_column(ForeignKey('campaigns.campaign_id', ondelete='CASCADE'))
+    lower_id: Mapped[int]
+    upper_id: Mapped[int | None]
+    cursor: Mapped[int | None]
+    leased_by: Mapped[str | None]
+    lease_expires_at: Mapped[datetime.datetime | None]
+    status: Mapped[StatusChunk] = mapped_column(default=StatusChunk.PENDING, server_default=StatusChunk.PENDING.name)
+    updated_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now(), onupdate=datetime.datetime.now)
+    
+    campaign: Mapped['CampaignOrm'] = relationship()
+    
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}, id={self.chunk_id}, campaign_id={self.campaign_id}, status={self.status}>'
+
+
+class JobOrm(BaseOrm):
+    """Bookkeeping of a long-running operation, result holds its counters once it is done."""
+    __tablename__ = 'jobs'
+    
+    job_id: Mapped[uuid.UUID] = mapped_column(UUID, primary_key=True, default=uuid.uuid4)
+    kind: Mapped[JobKind]
+    status: Mapped[StatusJob]
+    result: Mapped[dict[str, t.Any] | None] = mapped_column(JSONB)
+    error: Mapped[str | None]
+    created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    finished_at: Mapped[datetime.datetime | None]
+    
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}, id={self.job_id}, kind={self.kind}, status={self.status}>'
+
+
 class UserOrm(BaseOrm):
     __tablename__ = 'users'
     
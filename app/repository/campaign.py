@@ -1,30 +1,65 @@
+import json
+import logging
+
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from datetime import datetime 
+from sqlalchemy.orm import aliased, contains_eager
+from sqlalchemy import select, delete, update, and_, or_, literal, func
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by
+from datetime import datetime, timedelta
 from typing import Sequence
 
-from app.models import CampaignOrm, StatusCampaign, NotificationOrm, StatusNotification
+from app.models import (
+    CampaignOrm, StatusCampaign, NotificationOrm, StatusNotification, RecipientOrm, CampaignStatsOrm, OutboxOrm,
+    StatusOutbox, NotificationArchiveOrm, CampaignChunkOrm, StatusChunk
+)
 from app.exceptions import ConflictException, NotFoundException, NoAvailableCampaignsException
+from app.ddl import CAMPAIGN_EVENTS_CHANNEL
+from app.repository.recipient import segment_filter
+from app.repository.partition import find_partition, get_partitions, is_finished, partition_required
+from app.schemas import Segment
+
+
+logger = logging.getLogger('app.repository.campaign')
+
+# Recipient ids per fan-out chunk, chunks are fanned out in parallel
+FANOUT_CHUNK_SIZE = 100_000
+# Seconds a worker holds a chunk after its last page or heartbeat
+FANOUT_LEASE_TTL = 30
 
 
 class CampaignRepository:
+    async def notify(self, event: str, campaign_id: int, session: AsyncSession) -> None:
+        """Queues a NOTIFY for campaign workers, Postgres delivers it only when the transaction commits."""
+        payload = json.dumps({'event': event, 'campaign_id': campaign_id})
+        await session.execute(select(func.pg_notify(CAMPAIGN_EVENTS_CHANNEL, payload)))
+
     async def add(
-        self, name: str, content: str, launch_date: datetime, session: AsyncSession
+        self, name: str, content: str, launch_date: datetime, session: AsyncSession, segment: Segment | None = None
     ) -> CampaignOrm:
         campaign_orm = CampaignOrm(
-            name=name, content=content, status=StatusCampaign.CREATED, launch_date=launch_date
+            name=name,
+            content=content,
+            status=StatusCampaign.CREATED,
+            launch_date=launch_date,
+            segment=segment.model_dump(exclude_none=True) if segment else None,
         )
         session.add(campaign_orm)
         try:
-            await session.commit()
+            await session.flush()
         except IntegrityError:
             await session.rollback()
             raise ConflictException(f'Campaign [name: {name}], already exists')
+        await self.notify('created', campaign_orm.campaign_id, session)
+        await session.commit()
         return campaign_orm
 
-    async def get_all(self, session: AsyncSession) -> Sequence[CampaignOrm]:
-        query = select(CampaignOrm)
+    async def get_all(
+        self, session: AsyncSession, after: int | None = None, limit: int = 100
+    ) -> Sequence[CampaignOrm]:
+        query = select(CampaignOrm).order_by(CampaignOrm.campaign_id).limit(limit)
+        if after is not None:
+            query = query.where(CampaignOrm.campaign_id > after)
         result = await session.execute(query)
         campaigns_orm = result.scalars().all()
         return campaigns_orm
@@ -36,7 +71,13 @@ class CampaignRepository:
         return campaign
     
     async def update(
-        self, campaign_id: int, name: str, content: str, launch_date: datetime, session: AsyncSession
+        self,
+        campaign_id: int,
+        name: str,
+        content: str,
+        launch_date: datetime,
+        session: AsyncSession,
+        segment: Segment | None = None,
     ) -> CampaignOrm:
         campaign_orm = await session.get(CampaignOrm, campaign_id)
         if campaign_orm is None:
@@ -46,52 +87,325 @@ class CampaignRepository:
         campaign_orm.name = name
         campaign_orm.content = content
         campaign_orm.launch_date = launch_date
+        campaign_orm.segment = segment.model_dump(exclude_none=True) if segment else None
         session.add(campaign_orm)
         try:
-            await session.commit()            
+            await session.flush()
         except IntegrityError:
             await session.rollback()
             raise ConflictException(f'Campaign [name: {name}], already exists')
+        await self.notify('updated', campaign_id, session)
+        await session.commit()
         return campaign_orm
             
     async def delete(self, campaign_id: int, session: AsyncSession) -> None:
-        campaign_orm = await session.get(CampaignOrm, campaign_id)
-        if campaign_orm is None:
+        """Deletes the campaign row with a single statement, dependent rows go through ON DELETE CASCADE."""
+        query = delete(CampaignOrm).where(CampaignOrm.campaign_id == campaign_id).returning(CampaignOrm.campaign_id)
+        result = await session.execute(query)
+        if result.scalar_one_or_none() is None:
             raise NotFoundException(detail=f"Campaign with [id: {campaign_id}] not found")
-        await session.delete(campaign_orm)
         await session.commit()
 
+    async def mark_deleting(self, campaign_id: int, session: AsyncSession) -> CampaignOrm:
+        """Takes the campaign out of acquire, run and complete before its rows are removed, does not commit.
+
+        A campaign that is already being deleted is returned as is, so its deletion can be restarted.
+        """
+        query = select(CampaignOrm).where(CampaignOrm.campaign_id == campaign_id).with_for_update()
+        campaign = (await session.execute(query)).scalar_one_or_none()
+        if campaign is None:
+            raise NotFoundException(detail=f"Campaign with [id: {campaign_id}] not found")
+        campaign.status = StatusCampaign.DELETING
+        return campaign
+
+    async def delete_notifications(self, campaign_id: int, limit: int, session: AsyncSession) -> int:
+        """Deletes up to limit notifications of the campaign and returns how many were deleted, does not commit."""
+        batch = (
+            select(NotificationOrm.notification_id)
+            .where(NotificationOrm.campaign_id == campaign_id)
+            .limit(limit)
+        )
+        # The campaign_id keeps every batch pruned to the partition of the campaign
+        query = delete(NotificationOrm).where(
+            NotificationOrm.campaign_id == campaign_id, NotificationOrm.notification_id.in_(batch)
+        )
+        result = await session.execute(query.execution_options(synchronize_session=False))
+        return result.rowcount  # type: ignore[attr-defined]
+
+    async def delete_outbox(self, campaign_id: int, limit: int, session: AsyncSession) -> int:
+        """Deletes up to limit outbox messages of the campaign and returns how many were deleted, does not commit."""
+        batch = select(OutboxOrm.outbox_id).where(OutboxOrm.campaign_id == campaign_id).limit(limit)
+        query = delete(OutboxOrm).where(OutboxOrm.outbox_id.in_(batch))
+        result = await session.execute(query.execution_options(synchronize_session=False))
+        return result.rowcount  # type: ignore[attr-defined]
+
     async def run(self, campaign_id: int, session: AsyncSession) -> None:
+        """Launches the campaign now and schedules its fan-out.
+
+        A campaign that is still being fanned out is not split again. Its chunks may be locked by a fan-out page,
+        which locks the campaign last, so replacing them while holding the campaign lock would deadlock.
+        """
         query = select(CampaignOrm).where(CampaignOrm.campaign_id == campaign_id).with_for_update()
         result = await session.execute(query)
         campaign = result.scalar_one_or_none()
         if campaign is None:
             raise NotFoundException(detail=f"Campaign with [id: {campaign_id}] not found")
+        if campaign.status == StatusCampaign.DELETING:
+            raise ConflictException(f'Campaign with [id: {campaign_id}] is being deleted')
+        if campaign.status == StatusCampaign.RUNNING and campaign.fanout_pending:
+            raise ConflictException(f'Campaign with [id: {campaign_id}] is already being fanned out')
         campaign.status = StatusCampaign.RUNNING
         campaign.launch_date = datetime.now()
+        await self.split(campaign, session)
+        await self.notify('run', campaign_id, session)
         await session.commit()
 
-    async def acquire(self, session: AsyncSession) -> CampaignOrm:
-        query = select(CampaignOrm).where(
+    async def get_next_launch_date(self, session: AsyncSession) -> datetime | None:
+        query = select(func.min(CampaignOrm.launch_date)).where(
             and_(
-                CampaignOrm.launch_date <= datetime.now(),
+                CampaignOrm.launch_date > datetime.now(),
                 CampaignOrm.status == StatusCampaign.CREATED
             )
-        ).with_for_update()
+        )
         result = await session.execute(query)
-        campaign = result.scalars().first()
-        if not campaign:
+        return result.scalar_one_or_none()
+
+    async def get_stats(self, campaign_id: int, session: AsyncSession) -> CampaignStatsOrm:
+        stats = await session.get(CampaignStatsOrm, campaign_id)
+        if stats is not None:
+            return stats
+        if await session.get(CampaignOrm, campaign_id) is None:
+            raise NotFoundException(detail=f"Campaign with [id: {campaign_id}] not found")
+        return CampaignStatsOrm(campaign_id=campaign_id, pending=0, sent=0, delivered=0, undelivered=0)
+
+    async def materialize(self, campaign_id: int, session: AsyncSession) -> int:
+        """Creates pending notifications of the campaign for every recipient of its segment with a single
+        INSERT ... SELECT.
+
+        Runs in the caller's transaction and does not commit. Existing notifications are left untouched.
+        """
+        campaign = await session.get(CampaignOrm, campaign_id)
+        if campaign is None:
+            raise NotFoundException(detail=f"Campaign with [id: {campaign_id}] not found")
+        recipients = select(
+            literal(StatusNotification.PENDING, NotificationOrm.__table__.c.status.type),
+            literal(campaign_id),
+            RecipientOrm.recipient_id
+        )
+        if campaign.segment is not None:
+            recipients = recipients.where(*segment_filter(Segment.model_validate(campaign.segment)))
+        query = (
+            insert(NotificationOrm)
+            .from_select(['status', 'campaign_id', 'recipient_id'], recipients)
+            .on_conflict_do_nothing(index_elements=['campaign_id', 'recipient_id'])
+        )
+        async with partition_required(campaign_id, session):
+            result = await session.execute(query)
+        return result.rowcount  # type: ignore[attr-defined]
+
+    async def split(self, campaign: CampaignOrm, session: AsyncSession, chunk_size: int = FANOUT_CHUNK_SIZE) -> None:
+        """Schedules the fan-out of the campaign as chunks of chunk_size recipient ids, does not commit.
+
+        Chunks of an earlier fan-out are replaced. The last chunk is open-ended, so recipients added while the
+        campaign is fanned out are reached as well.
+        """
+        await session.execute(delete(CampaignChunkOrm).where(CampaignChunkOrm.campaign_id == campaign.campaign_id))
+        first, last = (
+            await session.execute(select(func.min(RecipientOrm.recipient_id), func.max(RecipientOrm.recipient_id)))
+        ).one()
+        lower_ids = [0]
+        if first is not None:
+            lower_ids.extend(range(first + chunk_size, last + 1, chunk_size))
+        await session.execute(
+            insert(CampaignChunkOrm),
+            [
+                {'campaign_id': campaign.campaign_id, 'lower_id': lower_id, 'upper_id': upper_id}
+                for lower_id, upper_id in zip(lower_ids, [*lower_ids[1:], None])
+            ]
+        )
+        campaign.fanout_pending = True
+
+    async def fanout(
+        self, limit: int, worker_id: str, session: AsyncSession, lease_ttl: float = FANOUT_LEASE_TTL
+    ) -> tuple[CampaignOrm, int] | None:
+        """Creates pending notifications for the next limit recipients of one pending chunk of a RUNNING campaign and
+        commits.
+
+        Recipients of the chunk are walked in recipient_id order from its cursor, so every page is a short
+        transaction and the cursor is the checkpoint an interrupted chunk resumes from. The worker keeps a lease on
+        the chunk for lease_ttl seconds after each page. Chunks locked by a page in progress or leased by another
+        live worker are skipped, so any number of workers fan out the chunks of one campaign in parallel, and a chunk
+        whose lease expired is taken over from its cursor. Of the remaining chunks the one of the campaign with the
+        oldest activity is taken, which rotates pages between running campaigns. Returns the campaign with the number
+        of notifications created, None when no chunk is available.
+        """
+        now = datetime.now()
+        activity = aliased(CampaignChunkOrm)
+        last_activity = (
+            select(func.max(activity.updated_at))
+            .where(activity.campaign_id == CampaignChunkOrm.campaign_id)
+            .scalar_subquery()
+        )
+        query = (
+            select(CampaignChunkOrm)
+            .join(CampaignChunkOrm.campaign)
+            .options(contains_eager(CampaignChunkOrm.campaign))
+            .where(
+                CampaignChunkOrm.status == StatusChunk.PENDING,
+                or_(
+                    CampaignChunkOrm.leased_by == worker_id,
+                    CampaignChunkOrm.lease_expires_at.is_(None),
+                    CampaignChunkOrm.lease_expires_at < now
+                ),
+                CampaignOrm.status == StatusCampaign.RUNNING,
+                CampaignOrm.fanout_pending.is_(True)
+            )
+            .order_by(last_activity, CampaignChunkOrm.updated_at)
+            .limit(1)
+            .with_for_update(of=CampaignChunkOrm, skip_locked=True)
+        )
+        chunk = (await session.execute(query)).scalar_one_or_none()
+        if chunk is None:
+            return None
+        campaign = chunk.campaign
+        campaign_id = campaign.campaign_id
+        if chunk.leased_by not in (None, worker_id):
+            logger.warning(
+                'Lease of %s on chunk_id: %s of campaign_id: %s expired, resuming after recipient_id: %s',
+                chunk.leased_by, chunk.chunk_id, campaign_id, chunk.cursor
+            )
+        chunk.leased_by = worker_id
+        chunk.lease_expires_at = now + timedelta(seconds=lease_ttl)
+        in_chunk = segment_filter(Segment.model_validate(campaign.segment)) if campaign.segment is not None else []
+        in_chunk.append(RecipientOrm.recipient_id >= chunk.lower_id)
+        if chunk.upper_id is not None:
+            in_chunk.append(RecipientOrm.recipient_id < chunk.upper_id)
+        if chunk.cursor is not None:
+            in_chunk.append(RecipientOrm.recipient_id > chunk.cursor)
+        page = (
+            select(RecipientOrm.recipient_id)
+            .where(*in_chunk)
+            .order_by(RecipientOrm.recipient_id)
+            .limit(limit)
+            .subquery('page')
+        )
+        last_recipient_id, page_size = (
+            await session.execute(select(func.max(page.c.recipient_id), func.count()))
+        ).one()
+        created = 0
+        if last_recipient_id is not None:
+            recipients = select(
+                literal(StatusNotification.PENDING, NotificationOrm.__table__.c.status.type),
+                literal(campaign_id),
+                RecipientOrm.recipient_id
+            ).where(*in_chunk, RecipientOrm.recipient_id <= last_recipient_id)
+            async with partition_required(campaign_id, session):
+                result = await session.execute(
+                    insert(NotificationOrm)
+                    .from_select(['status', 'campaign_id', 'recipient_id'], recipients)
+                    .on_conflict_do_nothing(index_elements=['campaign_id', 'recipient_id'])
+                )
+            created = result.rowcount  # type: ignore[attr-defined]
+            chunk.cursor = last_recipient_id
+        if page_size < limit:
+            chunk.status = StatusChunk.DONE
+            chunk.leased_by = None
+            chunk.lease_expires_at = None
+            # Workers finishing the last chunks of the campaign at the same time take turns, so one of them sees
+            # every other chunk done
+            await session.execute(
+                select(CampaignOrm.campaign_id).where(CampaignOrm.campaign_id == campaign_id).with_for_update()
+            )
+            campaign.fanout_pending = bool(
+                await session.scalar(
+                    select(
+                        select(CampaignChunkOrm.chunk_id)
+                        .where(
+                            CampaignChunkOrm.campaign_id == campaign_id,
+                            CampaignChunkOrm.status == StatusChunk.PENDING,
+                            CampaignChunkOrm.chunk_id != chunk.chunk_id
+                        )
+                        .exists()
+                    )
+                )
+            )
+        await session.commit()
+        return campaign, created
+
+    async def heartbeat(self, worker_id: str, session: AsyncSession, lease_ttl: float = FANOUT_LEASE_TTL) -> int:
+        """Extends the leases of the worker's pending chunks by lease_ttl seconds and returns how many were extended."""
+        query = (
+            update(CampaignChunkOrm)
+            .where(CampaignChunkOrm.leased_by == worker_id, CampaignChunkOrm.status == StatusChunk.PENDING)
+            # Heartbeats are not fan-out activity and must not change the order chunks are taken in
+            .values(
+                lease_expires_at=datetime.now() + timedelta(seconds=lease_ttl), updated_at=CampaignChunkOrm.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(query)
+        await session.commit()
+        return result.rowcount  # type: ignore[attr-defined]
+
+    async def has_pending_fanout(self, session: AsyncSession) -> bool:
+        """Checks whether any RUNNING campaign still has a chunk to fan out."""
+        query = (
+            select(CampaignChunkOrm.chunk_id)
+            .join(CampaignChunkOrm.campaign)
+            .where(
+                CampaignChunkOrm.status == StatusChunk.PENDING,
+                CampaignOrm.status == StatusCampaign.RUNNING,
+                CampaignOrm.fanout_pending.is_(True)
+            )
+        )
+        return (await session.execute(select(query.exists()))).scalar_one()
+
+    async def count_in_flight(self, limit: int, session: AsyncSession) -> int:
+        """Counts outbox messages not yet published, stops counting at limit."""
+        new = select(OutboxOrm.outbox_id).where(OutboxOrm.status == StatusOutbox.NEW).limit(limit).subquery()
+        return (await session.execute(select(func.count()).select_from(new))).scalar_one()
+
+    async def acquire(
+        self, session: AsyncSession, batch_size: int = 1, materialize: bool = False
+    ) -> Sequence[CampaignOrm]:
+        """Moves up to batch_size due campaigns to RUNNING, oldest launch date first.
+
+        With materialize all notifications are created in the same transaction, otherwise the campaigns are left
+        for fan-out page by page. Rows locked by a concurrent acquire are skipped, so parallel workers get distinct
+        campaigns without waiting.
+        """
+        query = (
+            select(CampaignOrm)
+            .where(
+                and_(
+                    CampaignOrm.launch_date <= datetime.now(),
+                    CampaignOrm.status == StatusCampaign.CREATED
+                )
+            )
+            .order_by(CampaignOrm.launch_date)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(query)
+        campaigns = result.scalars().all()
+        if not campaigns:
             raise NoAvailableCampaignsException(detail='No available campaigns for launch')
-        campaign.status = StatusCampaign.RUNNING
+        for campaign in campaigns:
+            campaign.status = StatusCampaign.RUNNING
+            if materialize:
+                await self.materialize(campaign.campaign_id, session)
+            else:
+                await self.split(campaign, session)
         await session.commit()
-        return campaign
+        return campaigns
 
     async def complete(self, session: AsyncSession) -> CampaignOrm | None:
         query = (
             select(CampaignOrm)
+            .outerjoin(CampaignStatsOrm, CampaignStatsOrm.campaign_id == CampaignOrm.campaign_id)
             .where(CampaignOrm.status == StatusCampaign.RUNNING)
-            .where(~CampaignOrm.notifications.any(NotificationOrm.status == StatusNotification.PENDING))
-        ).with_for_update()
+            .where(func.coalesce(CampaignStatsOrm.pending, 0) == 0, CampaignOrm.fanout_pending.is_(False))
+        ).with_for_update(of=CampaignOrm)
         result = await session.execute(query)
         campaign = result.scalars().first()
         if not campaign:
@@ -99,5 +413,59 @@ class CampaignRepository:
         campaign.status = StatusCampaign.DONE
         await session.commit()
         return campaign
-        
-        
+
+    async def archive(self, finished_before: datetime, session: AsyncSession) -> CampaignOrm | None:
+        """Moves the notifications of one DONE campaign finished before the given time into notifications_archive.
+
+        The rows are packed into arrays by a single statement, delivery counters in campaign_stats are kept.
+        The rows are deleted unless every campaign of their partition is archived by now, such a partition is
+        left whole to retire_partitions.
+        Campaigns locked by another archiver are skipped. Returns None when nothing is left to archive.
+        """
+        query = (
+            select(CampaignOrm)
+            .where(
+                CampaignOrm.status == StatusCampaign.DONE,
+                CampaignOrm.archived_at.is_(None),
+                CampaignOrm.updated_at < finished_before
+            )
+            .order_by(CampaignOrm.updated_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        campaign = (await session.execute(query)).scalar_one_or_none()
+        if campaign is None:
+            return None
+        campaign_id = campaign.campaign_id
+        moved = (
+            select(NotificationOrm.notification_id, NotificationOrm.recipient_id, NotificationOrm.status)
+            .where(NotificationOrm.campaign_id == campaign_id)
+            .subquery('moved')
+        )
+        packed = select(
+            literal(campaign_id),
+            *(
+                func.coalesce(
+                    func.array_agg(aggregate_order_by(column, moved.c.notification_id)),
+                    literal([], NotificationArchiveOrm.__table__.c[name].type)
+                )
+                for column, name in (
+                    (moved.c.notification_id, 'notification_ids'),
+                    (moved.c.recipient_id, 'recipient_ids'),
+                    (moved.c.status, 'statuses'),
+                )
+            )
+        )
+        await session.execute(
+            insert(NotificationArchiveOrm).from_select(
+                ['campaign_id', 'notification_ids', 'recipient_ids', 'statuses'], packed
+            )
+        )
+        await session.execute(delete(OutboxOrm).where(OutboxOrm.campaign_id == campaign_id))
+        campaign.archived_at = datetime.now()
+        await session.flush()
+        partition = find_partition(await get_partitions(session), campaign_id)
+        if partition is None or not await is_finished(partition, session):
+            await session.execute(delete(NotificationOrm).where(NotificationOrm.campaign_id == campaign_id))
+        await session.commit()
+        return campaign
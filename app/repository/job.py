@@ -0,0 +1,56 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import JobOrm, JobKind, StatusJob
+from app.exceptions import NotFoundException
+
+
+class JobRepository:
+    async def create(self, kind: JobKind, session: AsyncSession, job_id: uuid.UUID | None = None) -> JobOrm:
+        job = JobOrm(kind=kind, status=StatusJob.RUNNING)
+        if job_id is not None:
+            job.job_id = job_id
+        session.add(job)
+        await session.commit()
+        return job
+
+    async def restart(self, job_id: uuid.UUID, session: AsyncSession) -> JobOrm:
+        """Moves a failed or interrupted job back to RUNNING, its counters are kept."""
+        job = await self.get(job_id, session)
+        job.status = StatusJob.RUNNING
+        job.error = None
+        job.finished_at = None
+        await session.commit()
+        return job
+
+    async def get(self, job_id: uuid.UUID, session: AsyncSession) -> JobOrm:
+        job = await session.get(JobOrm, job_id)
+        if job is None:
+            raise NotFoundException(detail=f'Job [job_id: {job_id}] not found')
+        return job
+
+    async def progress(self, job_id: uuid.UUID, result: dict[str, int], session: AsyncSession) -> JobOrm:
+        """Stores intermediate counters of a running job, committing together with the caller's transaction."""
+        job = await self.get(job_id, session)
+        job.result = dict(result)
+        await session.commit()
+        return job
+
+    async def finish(self, job_id: uuid.UUID, result: dict[str, int], session: AsyncSession) -> JobOrm:
+        """Marks the job done, committing together with whatever the caller's transaction holds."""
+        job = await self.get(job_id, session)
+        job.status = StatusJob.DONE
+        job.result = dict(result)
+        job.finished_at = datetime.now()
+        await session.commit()
+        return job
+
+    async def fail(self, job_id: uuid.UUID, error: str, session: AsyncSession) -> JobOrm:
+        job = await self.get(job_id, session)
+        job.status = StatusJob.FAILED
+        job.error = error
+        job.finished_at = datetime.now()
+        await session.commit()
+        return job
@@ -1,10 +1,43 @@
+from itertools import batched
+from asyncpg.exceptions import IntegrityConstraintViolationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, insert, update, values, column, and_, func, true, Integer, Select
 from sqlalchemy.exc import IntegrityError, InvalidRequestError
 import typing as t
 
-from app.models import StatusNotification, NotificationOrm
+from app.db import get_driver_connection
+from app.models import StatusNotification, NotificationOrm, NotificationArchiveOrm
+from app.schemas import NotificationStatusUpdate
 from app.exceptions import NotFoundException, ConflictException
+from app.repository.partition import partition_required
+
+
+RETURNING_CHUNK_SIZE = 5000
+UPDATE_CHUNK_SIZE = 5000
+STREAM_CHUNK_SIZE = 1000
+
+
+def archived_query(campaign_id: int) -> Select[tuple[int, int, StatusNotification]]:
+    """Selects notification_id, recipient_id and status of the archived notifications of a campaign in their
+    original order."""
+    archive = NotificationArchiveOrm
+    unnested = (
+        func.unnest(archive.notification_ids, archive.recipient_ids, archive.statuses)
+        .table_valued(
+            column('notification_id', Integer),
+            column('recipient_id', Integer),
+            column('status', NotificationOrm.__table__.c.status.type),
+            with_ordinality='position'
+        )
+        .render_derived(name='archived')
+    )
+    return (
+        select(unnested.c.notification_id, unnested.c.recipient_id, unnested.c.status)
+        .select_from(archive)
+        .join(unnested, true())
+        .where(archive.campaign_id == campaign_id)
+        .order_by(unnested.c.position)
+    )
 
 
 class NotificationRepository:    
@@ -14,21 +47,27 @@ class NotificationRepository:
         notification = NotificationOrm(status=status, campaign_id=campaign_id, recipient_id=recipient_id)
         session.add(notification)
         try:
-            await session.commit()
+            async with partition_required(campaign_id, session):
+                await session.commit()
         except IntegrityError:
             raise ConflictException(
                 f'Unable to create notification with [campaign_id: {campaign_id}, recipient_id: {recipient_id}]'
             )
         return notification
 
-    async def get_all(self, session: AsyncSession) -> t.Sequence[NotificationOrm]:
-        query = select(NotificationOrm)
+    async def get_all(
+        self, session: AsyncSession, after: int | None = None, limit: int = 100
+    ) -> t.Sequence[NotificationOrm]:
+        query = select(NotificationOrm).order_by(NotificationOrm.notification_id).limit(limit)
+        if after is not None:
+            query = query.where(NotificationOrm.notification_id > after)
         result = await session.execute(query)
         notifications = result.scalars().all()
         return notifications
 
     async def get(self, notification_id: int, session: AsyncSession) -> NotificationOrm:
-        notification = await session.get(NotificationOrm, notification_id)
+        query = select(NotificationOrm).where(NotificationOrm.notification_id == notification_id)
+        notification = (await session.execute(query)).scalar_one_or_none()
         if notification is None:
             raise NotFoundException(detail=f'Notification [notification_id: {notification_id}] not found')
         return notification
@@ -54,32 +93,134 @@ class NotificationRepository:
         await session.commit()
         return notification
 
+    async def update_statuses(self, updates: t.Sequence[NotificationStatusUpdate], session: AsyncSession) -> int:
+        """Applies status updates with UPDATE ... FROM (VALUES ...) in one transaction and returns the updated count."""
+        updated = 0
+        for chunk in batched(updates, UPDATE_CHUNK_SIZE):
+            rows = values(
+                column('campaign_id', Integer),
+                column('recipient_id', Integer),
+                column('status', NotificationOrm.__table__.c.status.type),
+                name='updates'
+            ).data([(u.campaign_id, u.recipient_id, u.status) for u in chunk])
+            query = (
+                update(NotificationOrm)
+                .where(
+                    NotificationOrm.campaign_id == rows.c.campaign_id,
+                    NotificationOrm.recipient_id == rows.c.recipient_id
+                )
+                .values(status=rows.c.status)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.execute(query)
+            updated += result.rowcount  # type: ignore[attr-defined]
+        await session.commit()
+        return updated
+
     async def delete(self, notification_id: int, session: AsyncSession) -> None:
-        notification = await session.get(NotificationOrm, notification_id)
+        query = select(NotificationOrm).where(NotificationOrm.notification_id == notification_id)
+        notification = (await session.execute(query)).scalar_one_or_none()
         if notification is None:
             raise NotFoundException(detail=f'Notification [notification_id: {notification_id}] not found')
         await session.delete(notification)
 
-    async def add_many(
-        self, campaign_id: int, recipients_id: list[int], session: AsyncSession
-    ) -> list[NotificationOrm]:
-        notifications = []
-        for recipient_id in recipients_id:
-            notifications.append(
-                NotificationOrm(
-                    campaign_id=campaign_id,
-                    recipient_id=recipient_id,
-                    status=StatusNotification.PENDING
+    async def add_many(self, campaign_id: int, recipients_id: t.Iterable[int], session: AsyncSession) -> int:
+        """Creates pending notifications through COPY and returns how many were created.
+
+        Rows are streamed to Postgres without building ORM objects, so memory does not grow with the
+        number of recipients.
+        """
+        records = ((StatusNotification.PENDING.name, campaign_id, recipient_id) for recipient_id in recipients_id)
+        driver_connection = await get_driver_connection(session)
+        try:
+            async with partition_required(campaign_id, session):
+                result = await driver_connection.copy_records_to_table(
+                    NotificationOrm.__tablename__, records=records, columns=['status', 'campaign_id', 'recipient_id']
                 )
-            )
-        session.add_all(notifications)
+        except IntegrityConstraintViolationError:
+            await session.rollback()
+            raise ConflictException(f'Unable to create notifications for [campaign_id: {campaign_id}]')
         await session.commit()
+        return int(result.split()[-1])
+
+    async def add_many_returning(
+        self, campaign_id: int, recipients_id: t.Iterable[int], session: AsyncSession
+    ) -> list[NotificationOrm]:
+        """Creates pending notifications with multi-row INSERT ... RETURNING in bounded chunks."""
+        notifications: list[NotificationOrm] = []
+        try:
+            async with partition_required(campaign_id, session):
+                for chunk in batched(recipients_id, RETURNING_CHUNK_SIZE):
+                    result = await session.scalars(
+                        insert(NotificationOrm).returning(NotificationOrm),
+                        [
+                            {
+                                'status': StatusNotification.PENDING,
+                                'campaign_id': campaign_id,
+                                'recipient_id': recipient_id
+                            }
+                            for recipient_id in chunk
+                        ]
+                    )
+                    notifications.extend(result.all())
+                await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise ConflictException(f'Unable to create notifications for [campaign_id: {campaign_id}]')
         return notifications
 
     async def get_notifications_by_campaign_id(
-        self, campaign_id: int, session: AsyncSession
+        self, campaign_id: int, session: AsyncSession, limit: int | None = None, offset: int = 0
     ) -> t.Sequence[NotificationOrm]:
-        query = select(NotificationOrm).where(NotificationOrm.campaign_id == campaign_id)
+        """Returns notifications of the campaign in notification_id order, from the archive once it is archived."""
+        query = (
+            select(NotificationOrm)
+            .where(NotificationOrm.campaign_id == campaign_id)
+            .order_by(NotificationOrm.notification_id)
+            .limit(limit)
+            .offset(offset)
+        )
         result = await session.execute(query)
         notifications = result.scalars().all()
-        return notifications
+        if notifications:
+            return notifications
+        return await self.get_archived(campaign_id, session, limit=limit, offset=offset)
+
+    async def get_archived(
+        self, campaign_id: int, session: AsyncSession, limit: int | None = None, offset: int = 0
+    ) -> list[NotificationOrm]:
+        """Returns archived notifications of the campaign as detached NotificationOrm objects, the arrays are unnested
+        and paged by Postgres."""
+        result = await session.execute(archived_query(campaign_id).limit(limit).offset(offset))
+        return [
+            NotificationOrm(
+                notification_id=notification_id, status=status, campaign_id=campaign_id, recipient_id=recipient_id
+            )
+            for notification_id, recipient_id, status in result
+        ]
+
+    async def stream_by_campaign_id(self, campaign_id: int, session: AsyncSession) -> t.AsyncIterator[NotificationOrm]:
+        query = (
+            select(NotificationOrm)
+            .where(NotificationOrm.campaign_id == campaign_id)
+            .order_by(NotificationOrm.notification_id)
+            .execution_options(yield_per=STREAM_CHUNK_SIZE)
+        )
+        result = await session.stream_scalars(query)
+        streamed = False
+        async for notification in result:
+            streamed = True
+            yield notification
+        if not streamed:
+            async for notification in self.stream_archived(campaign_id, session):
+                yield notification
+
+    async def stream_archived(self, campaign_id: int, session: AsyncSession) -> t.AsyncIterator[NotificationOrm]:
+        """Streams the archived notifications of a campaign, the arrays are unnested by Postgres and fetched in
+        chunks of STREAM_CHUNK_SIZE rows."""
+        query = archived_query(campaign_id).execution_options(yield_per=STREAM_CHUNK_SIZE)
+        result = await session.stream(query)
+        async for notification_id, recipient_id, status in result:
+            yield NotificationOrm(
+                notification_id=notification_id, status=status, campaign_id=campaign_id, recipient_id=recipient_id
+            )
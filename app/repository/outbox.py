@@ -0,0 +1,37 @@
+import typing as t
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+
+from app.models import OutboxOrm, StatusOutbox
+
+
+class OutboxRepository:
+    async def claim(self, session: AsyncSession, limit: int) -> t.Sequence[OutboxOrm]:
+        """Locks the oldest new messages together with their campaign and recipient.
+
+        Rows locked by another relay are skipped, the locks are held until the caller's transaction ends.
+        """
+        query = (
+            select(OutboxOrm)
+            .join(OutboxOrm.campaign)
+            .join(OutboxOrm.recipient)
+            .options(contains_eager(OutboxOrm.campaign), contains_eager(OutboxOrm.recipient))
+            .where(OutboxOrm.status == StatusOutbox.NEW)
+            .order_by(OutboxOrm.outbox_id)
+            .limit(limit)
+            .with_for_update(of=OutboxOrm, skip_locked=True)
+        )
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    async def mark_sent(self, outbox_ids: t.Sequence[int], session: AsyncSession) -> None:
+        query = (
+            update(OutboxOrm)
+            .where(OutboxOrm.outbox_id.in_(outbox_ids))
+            .values(status=StatusOutbox.SENT, sent_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(query)
+        await session.commit()
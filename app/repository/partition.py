@@ -0,0 +1,163 @@
+import logging
+import re
+import typing as t
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select, text, func, and_
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.exceptions import PartitionUnavailableException
+from app.models import CampaignOrm
+
+
+logger = logging.getLogger('app.repository.partition')
+
+LOCK_TIMEOUT = '2s'
+# Raised for rows no partition accepts, notifications have no CHECK constraints of their own
+CHECK_VIOLATION = '23514'
+
+BOUNDS = re.compile(r'FROM \((\w+)\) TO \((\w+)\)')
+PARTITION_NAME = re.compile(r'notifications_(default|legacy|p\d+)')
+
+
+class Partition(t.NamedTuple):
+    """Range partition of notifications, None bounds stand for MINVALUE and MAXVALUE.
+
+    A partition whose DETACH CONCURRENTLY was interrupted is still listed with detaching set.
+    """
+    name: str
+    lower: int | None
+    upper: int | None
+    detaching: bool = False
+
+    def covers(self, campaign_id: int) -> bool:
+        return (self.lower is None or self.lower <= campaign_id) and (self.upper is None or campaign_id < self.upper)
+
+
+def parse_bound(value: str) -> int | None:
+    return None if value in ('MINVALUE', 'MAXVALUE') else int(value)
+
+
+async def get_partitions(session: AsyncSession) -> list[Partition]:
+    """Returns the range partitions of notifications."""
+    query = text(
+        '''
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), i.inhdetachpending
+        FROM pg_inherits AS i JOIN pg_class AS c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'notifications'::regclass
+        '''
+    )
+    partitions = []
+    for name, bounds, detaching in (await session.execute(query)).all():
+        if match := BOUNDS.search(bounds):
+            partitions.append(Partition(name, parse_bound(match[1]), parse_bound(match[2]), detaching))
+    return partitions
+
+
+def find_partition(partitions: t.Iterable[Partition], campaign_id: int) -> Partition | None:
+    return next((partition for partition in partitions if partition.covers(campaign_id)), None)
+
+
+async def get_last_campaign_id(session: AsyncSession) -> int:
+    """Returns the last id handed out by the campaigns sequence, deleted campaigns do not give their ids back."""
+    last_campaign_id = await session.scalar(
+        text("SELECT pg_sequence_last_value(pg_get_serial_sequence('campaigns', 'campaign_id'))")
+    )
+    return last_campaign_id or 0
+
+
+@asynccontextmanager
+async def partition_required(campaign_id: int, session: AsyncSession) -> t.AsyncIterator[None]:
+    """Turns an insert of notifications that no partition covers yet into PartitionUnavailableException.
+
+    Partitions are created ahead by the retention worker, a campaign created faster than that gets a retryable error
+    instead of a failed insert. The transaction is rolled back.
+    """
+    try:
+        yield
+    except Exception as error:
+        if getattr(getattr(error, 'orig', error), 'sqlstate', None) != CHECK_VIOLATION:
+            raise
+        await session.rollback()
+        raise PartitionUnavailableException(campaign_id) from error
+
+
+@asynccontextmanager
+async def lock_timeout(session: AsyncSession) -> t.AsyncIterator[None]:
+    """Runs DDL in a savepoint that gives up after LOCK_TIMEOUT instead of queueing every query on notifications
+    behind it."""
+    async with session.begin_nested():
+        previous = await session.scalar(select(func.set_config('lock_timeout', LOCK_TIMEOUT, True)))
+        yield
+        await session.execute(select(func.set_config('lock_timeout', previous, True)))
+
+
+async def create_partitions(size: int, ahead: int, session: AsyncSession) -> list[Partition]:
+    """Creates partitions of size campaign ids until ahead of them follow the last campaign, commits after each one.
+
+    Partitions are created by the maintenance job before any campaign of their range exists, so requests never run
+    DDL. Each one is created as a standalone table and then attached. ATTACH PARTITION takes a SHARE UPDATE
+    EXCLUSIVE lock on notifications, which does not conflict with reads and writes, and the new table is empty so
+    nothing is scanned. The foreign keys it inherits briefly lock campaigns and recipients against writes, so
+    creation stops at the first partition whose locks are not taken within LOCK_TIMEOUT and the next run carries on
+    from there. Returns the partitions created.
+    """
+    target = (await get_last_campaign_id(session) // size + 1 + ahead) * size
+    lower = max((p.upper for p in await get_partitions(session) if p.upper is not None), default=0)
+    created = []
+    while lower < target:
+        upper = (lower // size + 1) * size
+        partition = Partition(f'notifications_p{lower}', lower, upper)
+        try:
+            async with lock_timeout(session):
+                await session.execute(text(f'CREATE TABLE {partition.name} (LIKE notifications INCLUDING DEFAULTS)'))
+                await session.execute(
+                    text(
+                        f'ALTER TABLE notifications ATTACH PARTITION {partition.name} '
+                        f'FOR VALUES FROM ({partition.lower}) TO ({partition.upper})'
+                    )
+                )
+        except DBAPIError:
+            logger.warning('Failed to create notifications partition %s', partition.name, exc_info=True)
+            break
+        await session.commit()
+        created.append(partition)
+        lower = upper
+    await session.commit()
+    return created
+
+
+async def is_finished(partition: Partition, session: AsyncSession) -> bool:
+    """Checks whether every campaign of the range was created and is archived or deleted by now."""
+    if partition.upper is None or await get_last_campaign_id(session) < partition.upper - 1:
+        return False
+    in_range = [CampaignOrm.campaign_id < partition.upper, CampaignOrm.archived_at.is_(None)]
+    if partition.lower is not None:
+        in_range.append(CampaignOrm.campaign_id >= partition.lower)
+    return not await session.scalar(select(select(CampaignOrm.campaign_id).where(and_(*in_range)).exists()))
+
+
+async def retire_partitions(session: AsyncSession) -> list[str]:
+    """Detaches and drops every partition whose campaigns are all archived or deleted, returns their names.
+
+    DETACH PARTITION ... CONCURRENTLY takes a SHARE UPDATE EXCLUSIVE lock on notifications, so reads and writes go
+    on while it waits for the queries that still use the partition. The detached table is no longer part of
+    notifications and dropping it blocks none of them. DETACH CONCURRENTLY cannot run inside a transaction block,
+    the session is switched to autocommit and must not have begun a transaction. A detach that was interrupted is
+    finalized by the next call, a failure stops retiring until then.
+    """
+    await session.connection(execution_options={'isolation_level': 'AUTOCOMMIT'})
+    retired = []
+    for partition in await get_partitions(session):
+        if not partition.detaching and not await is_finished(partition, session):
+            continue
+        detach = 'FINALIZE' if partition.detaching else 'CONCURRENTLY'
+        try:
+            await session.execute(text(f'ALTER TABLE notifications DETACH PARTITION {partition.name} {detach}'))
+            await session.execute(text(f'DROP TABLE {partition.name}'))
+        except DBAPIError:
+            logger.warning('Failed to retire notifications partition %s', partition.name, exc_info=True)
+            break
+        retired.append(partition.name)
+    return retired
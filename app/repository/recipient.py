@@ -1,18 +1,47 @@
 from pydantic import EmailStr
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete, text, ColumnElement
 import typing as t
 
+from app.db import get_driver_connection
 from app.models import RecipientOrm
+from app.schemas import Segment, RecipientImportRow
 from app.exceptions import ConflictException, NotFoundException
 
 
+STREAM_CHUNK_SIZE = 1000
+IMPORT_CHUNK_SIZE = 5000
+IMPORT_STAGING_TABLE = 'recipients_import'
+
+
+def segment_filter(segment: Segment) -> list[ColumnElement[bool]]:
+    """Translates a segment into conditions on recipients, each backed by an index."""
+    conditions: list[ColumnElement[bool]] = []
+    if segment.min_age is not None:
+        conditions.append(RecipientOrm.age >= segment.min_age)
+    if segment.max_age is not None:
+        conditions.append(RecipientOrm.age <= segment.max_age)
+    if segment.email_domains is not None:
+        conditions.append(RecipientOrm.email_domain.in_([domain.lower() for domain in segment.email_domains]))
+    if segment.recipient_ids is not None:
+        conditions.append(RecipientOrm.recipient_id.in_(segment.recipient_ids))
+    if segment.tags is not None:
+        conditions.append(RecipientOrm.tags.overlap(segment.tags))
+    return conditions
+
+
 class RecipientRepository:
     async def add(
-        self, name: str, lastname: str, age: int, contact_email: EmailStr, session: AsyncSession
+        self,
+        name: str,
+        lastname: str,
+        age: int,
+        contact_email: EmailStr,
+        session: AsyncSession,
+        tags: list[str] | None = None,
     ) -> RecipientOrm:
-        recipient = RecipientOrm(name=name, lastname=lastname, age=age, contact_email=contact_email)
+        recipient = RecipientOrm(name=name, lastname=lastname, age=age, contact_email=contact_email, tags=tags or [])
         session.add(recipient)
         try:
             await session.commit()
@@ -21,12 +50,22 @@ class RecipientRepository:
             raise ConflictException(f'A recipient with this [email: {contact_email}] already exists')
         return recipient
 
-    async def get_all(self, session: AsyncSession) -> t.Sequence[RecipientOrm]:
-        query = select(RecipientOrm)
+    async def get_all(
+        self, session: AsyncSession, after: int | None = None, limit: int = 100
+    ) -> t.Sequence[RecipientOrm]:
+        query = select(RecipientOrm).order_by(RecipientOrm.recipient_id).limit(limit)
+        if after is not None:
+            query = query.where(RecipientOrm.recipient_id > after)
         result = await session.execute(query)
         recipients = result.scalars().all()
         return recipients
 
+    async def stream_all(self, session: AsyncSession) -> t.AsyncIterator[RecipientOrm]:
+        query = select(RecipientOrm).order_by(RecipientOrm.recipient_id).execution_options(yield_per=STREAM_CHUNK_SIZE)
+        result = await session.stream_scalars(query)
+        async for recipient in result:
+            yield recipient
+
     async def get(self, recipient_id: int, session: AsyncSession) -> RecipientOrm:
         recipient = await session.get(RecipientOrm, recipient_id)
         if recipient is None:
@@ -34,7 +73,14 @@ class RecipientRepository:
         return recipient
 
     async def update(
-        self, recipient_id: int, name: str, lastname: str, age: int, contact_email: EmailStr, session: AsyncSession
+        self,
+        recipient_id: int,
+        name: str,
+        lastname: str,
+        age: int,
+        contact_email: EmailStr,
+        session: AsyncSession,
+        tags: list[str] | None = None,
     ) -> RecipientOrm:
         recipient = await session.get(RecipientOrm, recipient_id)
         if recipient is None:
@@ -43,6 +89,7 @@ class RecipientRepository:
         recipient.lastname = lastname
         recipient.age = age
         recipient.contact_email = contact_email
+        recipient.tags = tags or []
         
         session.add(recipient)
         try:
@@ -53,8 +100,54 @@ class RecipientRepository:
         return recipient
 
     async def delete(self, recipient_id: int, session: AsyncSession) -> None:
-        recipient = await session.get(RecipientOrm, recipient_id)
-        if recipient is None:
+        """Deletes the recipient row with a single statement, dependent rows go through ON DELETE CASCADE."""
+        query = (
+            delete(RecipientOrm).where(RecipientOrm.recipient_id == recipient_id).returning(RecipientOrm.recipient_id)
+        )
+        result = await session.execute(query)
+        if result.scalar_one_or_none() is None:
             raise NotFoundException(f'Recipient [recipient_id: {recipient_id}] not found')
-        await session.delete(recipient)
         await session.commit()
+
+    async def import_rows(self, rows: t.AsyncIterable[RecipientImportRow], session: AsyncSession) -> dict[str, int]:
+        """Loads rows into a staging table with COPY and upserts them on contact_email.
+
+        Within the upload the last row of an email wins. Runs in the caller's transaction and does not commit.
+        """
+        await session.execute(text(
+            f'''
+            CREATE TEMP TABLE {IMPORT_STAGING_TABLE} (
+                line integer, name text, lastname text, age integer, contact_email text, tags text[]
+            ) ON COMMIT DROP
+            '''
+        ))
+        driver_connection = await get_driver_connection(session)
+        staged = 0
+        chunk: list[tuple[int, str, str, int, str, list[str]]] = []
+        async for row in rows:
+            staged += 1
+            chunk.append((staged, row.name, row.lastname, row.age, row.contact_email, row.tags))
+            if len(chunk) == IMPORT_CHUNK_SIZE:
+                await driver_connection.copy_records_to_table(IMPORT_STAGING_TABLE, records=chunk)
+                chunk = []
+        if chunk:
+            await driver_connection.copy_records_to_table(IMPORT_STAGING_TABLE, records=chunk)
+        result = await session.execute(text(
+            f'''
+            WITH upserted AS (
+                INSERT INTO recipients AS r (name, lastname, age, contact_email, tags)
+                SELECT DISTINCT ON (contact_email) name, lastname, age, contact_email, tags
+                FROM {IMPORT_STAGING_TABLE}
+                ORDER BY contact_email, line DESC
+                ON CONFLICT (contact_email) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    lastname = EXCLUDED.lastname,
+                    age = EXCLUDED.age,
+                    tags = EXCLUDED.tags
+                RETURNING xmax = 0 AS inserted
+            )
+            SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+            '''
+        ))
+        inserted, updated = result.one()
+        return {'inserted': inserted, 'updated': updated, 'duplicates': staged - inserted - updated}
@@ -1,18 +1,23 @@
 from typing import Annotated
 import datetime
-from fastapi import APIRouter, Body, Path, Depends, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, BackgroundTasks, Body, Path, Query, Depends, Security, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.schemas import Campaign
+from app.schemas import Campaign, CampaignStats, FanoutPage, Job, LeasesUpdated, NextLaunch, Page, Segment
 from app.repository.campaign import CampaignRepository
 from app.service.campaign import CampaignService
 from app.service.user import AuthService  # noqa
-from app.db import get_db_session
+from app.db import get_db_session, get_session_maker
 from app.exceptions import LaunchDateException
-from app.dependencies import get_campaign_repository, get_campaign_service, get_current_user
+from app.dependencies import get_campaign_repository, get_campaign_service, get_current_user, get_current_principal
+from app.security import Scope
 
 
 router = APIRouter(prefix='/campaigns', dependencies=[Depends(get_current_user)])
+# Endpoints the campaign worker calls, open to users and to services holding the scope
+service_router = APIRouter(
+    prefix='/campaigns', dependencies=[Security(get_current_principal, scopes=[Scope.CAMPAIGNS_LAUNCH])]
+)
 
 
 @router.post('/', status_code=status.HTTP_201_CREATED)
@@ -20,22 +25,37 @@ async def add(
     name: Annotated[str, Body(examples=['Оповещение по черной пятнице'])],
     content: Annotated[str, Body(examples=['Только в эту пятницу - скидки на все товары 30%!'])],
     launch_date: Annotated[datetime.datetime, Body(examples=['2024-10-04T16:05:16'])],
+    segment: Annotated[Segment | None, Body(examples=[{'min_age': 18, 'email_domains': ['example.com']}])] = None,
     session: AsyncSession = Depends(get_db_session),
     repository: CampaignRepository = Depends(get_campaign_repository),
 ) -> Campaign:
     if launch_date < datetime.datetime.now(): 
         raise LaunchDateException(launch_date=launch_date)
-    campaign = await repository.add(name, content, launch_date, session)
+    campaign = await repository.add(name, content, launch_date, session, segment=segment)
     return Campaign.model_validate(campaign)
 
 
 @router.get('/', status_code=status.HTTP_200_OK)
 async def get_all(
+    after: Annotated[int | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
     session: AsyncSession = Depends(get_db_session),
     repository: CampaignRepository = Depends(get_campaign_repository)
-) -> list[Campaign]:
-    campaigns = await repository.get_all(session)
-    return [Campaign.model_validate(campaign) for campaign in campaigns] 
+) -> Page[Campaign]:
+    campaigns = await repository.get_all(session, after=after, limit=limit)
+    next_cursor = campaigns[-1].campaign_id if len(campaigns) == limit else None
+    return Page[Campaign](
+        items=[Campaign.model_validate(campaign) for campaign in campaigns], next_cursor=next_cursor
+    )
+
+
+@service_router.get('/next-launch', status_code=status.HTTP_200_OK)
+async def get_next_launch(
+    session: AsyncSession = Depends(get_db_session),
+    repository: CampaignRepository = Depends(get_campaign_repository)
+) -> NextLaunch:
+    launch_date = await repository.get_next_launch_date(session)
+    return NextLaunch(launch_date=launch_date)
 
 
 @router.get('/{campaign_id}', status_code=status.HTTP_200_OK)
@@ -48,27 +68,44 @@ async def get(
     return Campaign.model_validate(campaign)
 
 
+@router.get('/{campaign_id}/stats', status_code=status.HTTP_200_OK)
+async def get_stats(
+    campaign_id: int,
+    session: AsyncSession = Depends(get_db_session),
+    repository: CampaignRepository = Depends(get_campaign_repository)
+) -> CampaignStats:
+    stats = await repository.get_stats(campaign_id, session)
+    return CampaignStats.model_validate(stats)
+
+
 @router.put('/{campaign_id}')
 async def update(
     campaign_id: Annotated[int, Path()],
     name: Annotated[str, Body()],
     content: Annotated[str, Body()],
     launch_date: Annotated[datetime.datetime, Body()],
+    segment: Annotated[Segment | None, Body()] = None,
     session: AsyncSession = Depends(get_db_session),
     repository: CampaignRepository = Depends(get_campaign_repository)
 ) -> Campaign:
     if launch_date < datetime.datetime.now():
         raise LaunchDateException(launch_date=launch_date)
-    updated_campaign = await repository.update(campaign_id, name, content, launch_date, session) 
+    updated_campaign = await repository.update(campaign_id, name, content, launch_date, session, segment=segment)
     return Campaign.model_validate(updated_campaign)
 
 
-@router.delete('/{campaign_id}', status_code=status.HTTP_204_NO_CONTENT)
+@router.delete('/{campaign_id}', status_code=status.HTTP_202_ACCEPTED)
 async def delete(
-    campaign_id: int, session: AsyncSession = Depends(get_db_session),
-    repository: CampaignRepository = Depends(get_campaign_repository)
-) -> None:
-    await repository.delete(campaign_id, session)
+    campaign_id: int,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_db_session),
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
+    service: CampaignService = Depends(get_campaign_service)
+) -> Job:
+    """Starts deleting the campaign in the background, progress is reported on the returned job."""
+    job = await service.delete(campaign_id, session)
+    background_tasks.add_task(service.purge, job.job_id, campaign_id, session_maker)
+    return job
 
 
 @router.post('/{campaign_id}/run', status_code=status.HTTP_204_NO_CONTENT)
@@ -79,16 +116,40 @@ async def run(
     await repository.run(campaign_id, session)
 
 
-@router.post('/acquire')
+@service_router.post('/acquire')
 async def acquire_for_launch(
+    batch_size: Annotated[int, Query(ge=1, le=100)] = 1,
+    materialize: Annotated[bool, Query()] = False,
     session: AsyncSession = Depends(get_db_session),
     repository: CampaignRepository = Depends(get_campaign_repository)
-) -> Campaign:
-    campaign = await repository.acquire(session)
-    return Campaign.model_validate(campaign)
+) -> list[Campaign]:
+    campaigns = await repository.acquire(session, batch_size=batch_size, materialize=materialize)
+    return [Campaign.model_validate(campaign) for campaign in campaigns]
+
+
+@service_router.post('/fanout')
+async def fanout(
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    service: Annotated[CampaignService, Depends(get_campaign_service)],
+    worker_id: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=10000)] = 1000,
+    window: Annotated[int, Query(ge=1, le=1000000)] = 10000,
+    lease_ttl: Annotated[float, Query(gt=0, le=3600)] = 30,
+) -> FanoutPage:
+    return await service.fanout(limit, window, worker_id, lease_ttl, session)
+
+
+@service_router.post('/fanout/heartbeat')
+async def heartbeat(
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    repository: Annotated[CampaignRepository, Depends(get_campaign_repository)],
+    worker_id: Annotated[str, Query(min_length=1, max_length=200)],
+    lease_ttl: Annotated[float, Query(gt=0, le=3600)] = 30,
+) -> LeasesUpdated:
+    return LeasesUpdated(updated=await repository.heartbeat(worker_id, session, lease_ttl=lease_ttl))
 
 
-@router.post('/complete/', status_code=status.HTTP_200_OK)
+@service_router.post('/complete/', status_code=status.HTTP_200_OK)
 async def complete(
     session: Annotated[AsyncSession, Depends(get_db_session)],
     service: Annotated[CampaignService, Depends(get_campaign_service)],
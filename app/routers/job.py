@@ -0,0 +1,23 @@
+import uuid
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas import Job
+from app.db import get_db_session
+from app.repository.job import JobRepository
+from app.dependencies import get_current_user, get_job_repository
+
+
+router = APIRouter(prefix='/jobs', dependencies=[Depends(get_current_user)])
+
+
+@router.get('/{job_id}')
+async def get(
+    job_id: uuid.UUID,
+    session: Annotated[AsyncSession, Depends(get_db_session)],
+    repository: Annotated[JobRepository, Depends(get_job_repository)],
+) -> Job:
+    job = await repository.get(job_id, session)
+    return Job.model_validate(job)
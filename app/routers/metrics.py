@@ -0,0 +1,28 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.schemas import PoolStats, UserCacheStats, PasswordHasherStats
+from app.db import get_engine, get_pool_stats
+from app.cache import UserCache, get_user_cache
+from app.utils import PasswordHasher, get_password_hasher
+from app.dependencies import get_current_user
+
+
+router = APIRouter(prefix='/metrics', dependencies=[Depends(get_current_user)])
+
+
+@router.get('/db-pool')
+async def db_pool(engine: Annotated[AsyncEngine, Depends(get_engine)]) -> PoolStats:
+    return PoolStats.model_validate(get_pool_stats(engine))
+
+
+@router.get('/auth-cache')
+async def auth_cache(user_cache: Annotated[UserCache, Depends(get_user_cache)]) -> UserCacheStats:
+    return UserCacheStats.model_validate(user_cache.stats())
+
+
+@router.get('/password-hasher')
+async def password_hasher(hasher: Annotated[PasswordHasher, Depends(get_password_hasher)]) -> PasswordHasherStats:
+    return PasswordHasherStats.model_validate(hasher.stats())
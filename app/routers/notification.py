@@ -1,19 +1,22 @@
-from typing import Annotated
-from fastapi import APIRouter, Body, Path, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, AsyncIterator
+from fastapi import APIRouter, Body, Path, Query, Depends, Security
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.models import StatusNotification
-from app.schemas import Notification
+from app.schemas import Notification, NotificationsCreated, NotificationStatusUpdate, NotificationsUpdated, Page
 from app.repository.notification import NotificationRepository 
-from app.db import get_db_session
-from app.dependencies import get_current_user
+from app.db import get_db_session, get_session_maker
+from app.dependencies import get_current_user, get_current_principal, get_notification_repository
+from app.security import Scope
+from app.export import ExportFormat, encode_rows
 
 
 router = APIRouter(prefix='/notifications', dependencies=[Depends(get_current_user)])
-
-
-def get_repository_notification() -> NotificationRepository:
-    return NotificationRepository()
+# Endpoints the workers call, open to users and to services holding the scope
+service_router = APIRouter(
+    prefix='/notifications', dependencies=[Security(get_current_principal, scopes=[Scope.NOTIFICATIONS_WRITE])]
+)
 
 
 @router.post('/', status_code=201)
@@ -22,7 +25,7 @@ async def add(
     campaign_id: Annotated[int, Body(examples=['1'])],
     recipient_id: Annotated[int, Body(examples=['4'])],
     session: AsyncSession = Depends(get_db_session), 
-    repository: NotificationRepository = Depends(get_repository_notification)
+    repository: NotificationRepository = Depends(get_notification_repository)
 ) -> Notification:
     notification = await repository.add(status, campaign_id, recipient_id, session)
     return Notification.model_validate(notification)
@@ -30,50 +33,84 @@ async def add(
 
 @router.get('/')
 async def get_all(
+    after: Annotated[int | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
     session: AsyncSession = Depends(get_db_session), 
-    repository: NotificationRepository = Depends(get_repository_notification)
-) -> list[Notification]:
-    notifications = await repository.get_all(session)
-    return [Notification.model_validate(notification) for notification in notifications]
+    repository: NotificationRepository = Depends(get_notification_repository)
+) -> Page[Notification]:
+    notifications = await repository.get_all(session, after=after, limit=limit)
+    next_cursor = notifications[-1].notification_id if len(notifications) == limit else None
+    return Page[Notification](
+        items=[Notification.model_validate(notification) for notification in notifications], next_cursor=next_cursor
+    )
+
+
+@router.get('/export')
+async def export(
+    campaign_id: Annotated[int, Query()],
+    export_format: Annotated[ExportFormat, Query(alias='format')] = ExportFormat.NDJSON,
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
+    repository: NotificationRepository = Depends(get_notification_repository)
+) -> StreamingResponse:
+    async def rows() -> AsyncIterator[Notification]:
+        async with session_maker() as session:
+            async for notification in repository.stream_by_campaign_id(campaign_id, session):
+                yield Notification.model_validate(notification)
+    
+    return StreamingResponse(encode_rows(rows(), export_format), media_type=export_format.media_type)
 
 
 @router.get('/{notification_id}')
 async def get(
     notification_id: int,
     session: AsyncSession = Depends(get_db_session), 
-    repository: NotificationRepository = Depends(get_repository_notification)
+    repository: NotificationRepository = Depends(get_notification_repository)
 ) -> Notification:
     notification = await repository.get(notification_id, session) 
     return Notification.model_validate(notification)
 
 
-@router.post('/{campaign_id}/recipients/{recipient_id}/run')
+@service_router.post('/{campaign_id}/recipients/{recipient_id}/run')
 async def run(
     campaign_id: Annotated[int, Path()],
     recipient_id: Annotated[int, Path()],
     status: Annotated[StatusNotification, Body(embed=True, examples=['sent'])],
     session: AsyncSession = Depends(get_db_session), 
-    repository: NotificationRepository = Depends(get_repository_notification)
+    repository: NotificationRepository = Depends(get_notification_repository)
 ) -> Notification:
     updated_notification = await repository.run(campaign_id, recipient_id, status, session)
     return Notification.model_validate(updated_notification)
 
 
+@service_router.post('/status/bulk')
+async def update_statuses(
+    updates: Annotated[list[NotificationStatusUpdate], Body()],
+    session: AsyncSession = Depends(get_db_session), 
+    repository: NotificationRepository = Depends(get_notification_repository)
+) -> NotificationsUpdated:
+    updated = await repository.update_statuses(updates, session)
+    return NotificationsUpdated(updated=updated)
+
+
 @router.delete('/{notification_id}', status_code=204)
 async def delete(
     notification_id: int,
     session: AsyncSession = Depends(get_db_session), 
-    repository: NotificationRepository = Depends(get_repository_notification)
+    repository: NotificationRepository = Depends(get_notification_repository)
 ) -> None:
     await repository.delete(notification_id, session)
 
 
-@router.post('/add/many', status_code=201)
+@service_router.post('/add/many', status_code=201)
 async def add_many(
     campaign_id: Annotated[int, Body()], 
     recipients_id: Annotated[list[int], Body(examples=[[1, 2, 3]])],
+    returning: Annotated[bool, Query()] = False,
     session: AsyncSession = Depends(get_db_session), 
-    repository: NotificationRepository = Depends(get_repository_notification)
-) -> list[Notification]:
-    notifications = await repository.add_many(campaign_id, recipients_id, session)
-    return [Notification.model_validate(notification) for notification in notifications]
+    repository: NotificationRepository = Depends(get_notification_repository)
+) -> NotificationsCreated | list[Notification]:
+    if returning:
+        notifications = await repository.add_many_returning(campaign_id, recipients_id, session)
+        return [Notification.model_validate(notification) for notification in notifications]
+    created = await repository.add_many(campaign_id, recipients_id, session)
+    return NotificationsCreated(campaign_id=campaign_id, created=created)
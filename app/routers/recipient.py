@@ -1,19 +1,23 @@
 import typing as t
-from fastapi import APIRouter, Body, Path, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Body, Path, Query, Depends, Request, Security
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from pydantic import EmailStr
 
-from app.schemas import Recipient
-from app.db import get_db_session
+from app.schemas import Recipient, Page, Job
+from app.db import get_db_session, get_session_maker
 from app.repository.recipient import RecipientRepository
-from app.dependencies import get_current_user
+from app.service.recipient import RecipientService
+from app.dependencies import get_current_user, get_current_principal, get_recipient_repository, get_recipient_service
+from app.security import Scope
+from app.export import ExportFormat, encode_rows
 
 
 router = APIRouter(prefix='/recipients', dependencies=[Depends(get_current_user)])
-
-
-def get_repository() -> RecipientRepository:
-    return RecipientRepository()
+# Endpoints the campaign worker calls, open to users and to services holding the scope
+service_router = APIRouter(
+    prefix='/recipients', dependencies=[Security(get_current_principal, scopes=[Scope.RECIPIENTS_READ])]
+)
 
 
 @router.post('/', status_code=201)
@@ -22,27 +26,61 @@ async def add(
     lastname: t.Annotated[str, Body(examples=['Roberts'])],
     age: t.Annotated[int, Body(examples=[56], lt=100)],
     contact_email: t.Annotated[EmailStr, Body(examples=['julia@example.com'])],
+    tags: t.Annotated[list[str], Body(examples=[['vip', 'newsletter']])] = [],
     session: AsyncSession = Depends(get_db_session),
-    repository: RecipientRepository = Depends(get_repository)
+    repository: RecipientRepository = Depends(get_recipient_repository)
 ) -> Recipient:
-    recipient = await repository.add(name, lastname, age, contact_email, session)
+    recipient = await repository.add(name, lastname, age, contact_email, session, tags=tags)
     return Recipient.model_validate(recipient)
 
 
-@router.get('/')
+@service_router.get('/')
 async def get_all(
+    after: t.Annotated[int | None, Query()] = None,
+    limit: t.Annotated[int, Query(ge=1, le=1000)] = 100,
+    session: AsyncSession = Depends(get_db_session),
+    repository: RecipientRepository = Depends(get_recipient_repository)
+) -> Page[Recipient]:
+    recipients = await repository.get_all(session, after=after, limit=limit)
+    next_cursor = recipients[-1].recipient_id if len(recipients) == limit else None
+    return Page[Recipient](
+        items=[Recipient.model_validate(recipient) for recipient in recipients], next_cursor=next_cursor
+    )
+
+
+@router.get('/export')
+async def export(
+    export_format: t.Annotated[ExportFormat, Query(alias='format')] = ExportFormat.NDJSON,
+    session_maker: async_sessionmaker[AsyncSession] = Depends(get_session_maker),
+    repository: RecipientRepository = Depends(get_recipient_repository)
+) -> StreamingResponse:
+    async def rows() -> t.AsyncIterator[Recipient]:
+        async with session_maker() as session:
+            async for recipient in repository.stream_all(session):
+                yield Recipient.model_validate(recipient)
+    
+    return StreamingResponse(encode_rows(rows(), export_format), media_type=export_format.media_type)
+
+
+@router.post('/import', status_code=201)
+async def import_recipients(
+    request: Request,
+    import_format: t.Annotated[ExportFormat, Query(alias='format')] = ExportFormat.NDJSON,
     session: AsyncSession = Depends(get_db_session),
-    repository: RecipientRepository = Depends(get_repository)
-) -> list[Recipient]:
-    recipients = await repository.get_all(session)
-    return [Recipient.model_validate(recipient) for recipient in recipients]
+    service: RecipientService = Depends(get_recipient_service)
+) -> Job:
+    """Upserts recipients from a streamed CSV or NDJSON body on contact_email, one record per line.
+
+    CSV needs a header with name, lastname, age and contact_email, tags are optional and separated by semicolons.
+    """
+    return await service.import_recipients(request.stream(), import_format, session)
 
 
 @router.get('/{recipient_id}')
 async def get(
     recipient_id: int,
     session: AsyncSession = Depends(get_db_session),
-    repository: RecipientRepository = Depends(get_repository)
+    repository: RecipientRepository = Depends(get_recipient_repository)
 ) -> Recipient:
     recipient = await repository.get(recipient_id, session)
     return Recipient.model_validate(recipient)
@@ -55,10 +93,13 @@ async def update(
     lastname: t.Annotated[str, Body()],
     age: t.Annotated[int, Body()],
     contact_email: t.Annotated[EmailStr, Body()],
+    tags: t.Annotated[list[str], Body()] = [],
     session: AsyncSession = Depends(get_db_session),
-    repository: RecipientRepository = Depends(get_repository)
+    repository: RecipientRepository = Depends(get_recipient_repository)
 ) -> Recipient:
-    updated_recipient = await repository.update(recipient_id, name, lastname, age, contact_email, session)
+    updated_recipient = await repository.update(
+        recipient_id, name, lastname, age, contact_email, session, tags=tags
+    )
     return Recipient.model_validate(updated_recipient)
 
 
@@ -66,6 +107,6 @@ async def update(
 async def delete(
     recipient_id: int,
     session: AsyncSession = Depends(get_db_session),
-    repository: RecipientRepository = Depends(get_repository)
+    repository: RecipientRepository = Depends(get_recipient_repository)
 ) -> None:
     await repository.delete(recipient_id, session)
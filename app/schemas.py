@@ -1,32 +1,92 @@
 import datetime
 import uuid
+from typing import Generic, TypeVar
 
-from pydantic import BaseModel, ConfigDict, EmailStr
-from app.models import StatusCampaign, StatusNotification
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from app.models import StatusCampaign, StatusNotification, JobKind, StatusJob
+from app.export import CSV_LIST_DELIMITER
+
+
+T = TypeVar('T')
 
 
 class Base(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: int | None
+
+
+class Segment(BaseModel):
+    """Recipients a campaign is sent to; every criterion that is set must match, no criteria means everyone."""
+    min_age: int | None = None
+    max_age: int | None = None
+    email_domains: list[str] | None = None
+    recipient_ids: list[int] | None = None
+    tags: list[str] | None = Field(default=None, description='Recipients with any of the tags')
+
+
 class Campaign(Base):
     campaign_id: int
     name: str
     content: str
     status: StatusCampaign
     launch_date: datetime.datetime
+    segment: Segment | None = None
+    archived_at: datetime.datetime | None = None
 
     created_at: datetime.datetime
     updated_at: datetime.datetime
 
 
+class CampaignStats(Base):
+    campaign_id: int
+    pending: int
+    sent: int
+    delivered: int
+    undelivered: int
+
+
+class NextLaunch(BaseModel):
+    launch_date: datetime.datetime | None
+
+
 class Recipient(Base):
     recipient_id: int
     name: str
     lastname: str
     age: int
     contact_email: EmailStr
+    tags: list[str] = []
+    
+
+class RecipientImportRow(BaseModel):
+    name: str
+    lastname: str
+    age: int = Field(ge=0, lt=100)
+    contact_email: EmailStr
+    tags: list[str] = []
     
+    @field_validator('tags', mode='before')
+    @classmethod
+    def split_tags(cls, value: object) -> object:
+        """CSV rows carry tags as a single semicolon separated field."""
+        if isinstance(value, str):
+            return [tag for tag in value.split(CSV_LIST_DELIMITER) if tag]
+        return value
+
+
+class Job(Base):
+    job_id: uuid.UUID
+    kind: JobKind
+    status: StatusJob
+    result: dict[str, int] | None
+    error: str | None
+    created_at: datetime.datetime
+    finished_at: datetime.datetime | None
+
 
 class Notification(Base):
     notification_id: int
@@ -35,6 +95,33 @@ class Notification(Base):
     recipient_id: int
 
 
+class NotificationStatusUpdate(BaseModel):
+    campaign_id: int
+    recipient_id: int
+    status: StatusNotification
+
+
+class NotificationsUpdated(BaseModel):
+    updated: int
+
+
+class LeasesUpdated(BaseModel):
+    updated: int
+
+
+class NotificationsCreated(BaseModel):
+    campaign_id: int
+    created: int
+
+
+class FanoutPage(BaseModel):
+    """Page of notifications created by fan-out, campaign_id is None when the page was held back by the window."""
+    campaign_id: int | None
+    created: int
+    completed: bool
+    in_flight: int
+
+
 class User(Base):
     user_id: uuid.UUID
     email: EmailStr
@@ -53,3 +140,32 @@ class NotificationBody(BaseModel):
     campaign_id: int
     campaign_title: str
     content: str
+
+
+class UserCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class PasswordHasherStats(BaseModel):
+    max_concurrency: int
+    in_flight: int
+    waiting: int
+    completed: int
+    wait_total: float
+    wait_max: float
+
+
+class PoolStats(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    checkout_timeouts: int
+    wait_total: float
+    wait_max: float
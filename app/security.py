@@ -0,0 +1,81 @@
+import enum
+import hashlib
+import hmac
+import json
+import secrets
+import sys
+
+from fastapi import Request
+from pydantic import BaseModel
+
+from app.exceptions import CredentialsException
+
+
+class Scope(enum.StrEnum):
+    CAMPAIGNS_LAUNCH = 'campaigns:launch'
+    RECIPIENTS_READ = 'recipients:read'
+    NOTIFICATIONS_WRITE = 'notifications:write'
+
+
+# Scopes the key of each worker needs, the campaign worker launches and fans out campaigns through /campaigns and
+# the email worker reports delivery statuses through /notifications
+WORKER_SCOPES = {
+    'campaign_worker': [Scope.CAMPAIGNS_LAUNCH],
+    'email_worker': [Scope.NOTIFICATIONS_WRITE],
+}
+
+
+class ServiceKey(BaseModel):
+    key_hash: str
+    scopes: list[Scope] = []
+
+
+class Service(BaseModel):
+    name: str
+    scopes: list[Scope]
+
+
+def hash_api_key(secret: str) -> str:
+    # Keys are random and long, so a fast digest is enough and keeps verification off the hot path
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def generate_api_key(name: str) -> tuple[str, str]:
+    """Returns a new key for the service in the <name>.<secret> form and the hash to put in SERVICE_API_KEYS."""
+    secret = secrets.token_urlsafe(32)
+    return f'{name}.{secret}', hash_api_key(secret)
+
+
+def service_key_entry(name: str, key_hash: str, scopes: list[Scope]) -> str:
+    """Returns the SERVICE_API_KEYS entry of the service as JSON."""
+    return json.dumps({name: ServiceKey(key_hash=key_hash, scopes=scopes).model_dump(mode='json')})
+
+
+class ServiceKeyring:
+    """API keys of internal services, verified in memory. Only hashes of the secrets are kept."""
+
+    def __init__(self, keys: dict[str, ServiceKey]) -> None:
+        self.keys = keys
+        self.missing_key_hash = hash_api_key(secrets.token_urlsafe(32))
+
+    def verify(self, api_key: str) -> Service:
+        name, _, secret = api_key.partition('.')
+        key = self.keys.get(name)
+        # Unknown services are compared against a throwaway hash, so timing does not reveal which names exist
+        key_hash = key.key_hash if key is not None else self.missing_key_hash
+        if not hmac.compare_digest(hash_api_key(secret), key_hash) or key is None:
+            raise CredentialsException
+        return Service(name=name, scopes=key.scopes)
+
+
+def get_service_keyring(request: Request) -> ServiceKeyring:
+    return request.app.state.container.service_keyring
+
+
+if __name__ == '__main__':
+    # python -m app.security <name> [scope ...], the scopes of a known worker are used when none are given
+    name, *scope_names = sys.argv[1:]
+    scopes = [Scope(scope) for scope in scope_names] or WORKER_SCOPES.get(name, [])
+    api_key, key_hash = generate_api_key(name)
+    print(f'API key: {api_key}')
+    print(f'SERVICE_API_KEYS entry: {service_key_entry(name, key_hash, scopes)}')
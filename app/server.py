@@ -1,25 +1,46 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from app.routers.campaign import router as campaign_router
-from app.routers.recipient import router as recipient_router
-from app.routers.notification import router as notification_router
+from app.routers.campaign import router as campaign_router, service_router as campaign_service_router
+from app.routers.recipient import router as recipient_router, service_router as recipient_service_router
+from app.routers.notification import router as notification_router, service_router as notification_service_router
 from app.routers.user import router as user_router
+from app.routers.metrics import router as metrics_router
+from app.routers.job import router as job_router
 from app.exceptions import AppException
+from app.config import load_from_env
+from app.container import Container
 
 
 def app_exception_handler(request: Request, exc: AppException) -> JSONResponse:  # noqa: U100
     return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    container = Container.create(load_from_env())
+    app.state.container = container
+    yield
+    await container.close()
     
     
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     
     app.add_exception_handler(AppException, app_exception_handler)  # type: ignore[arg-type]
     
+    # Service routers go first, their static paths must win over the path parameters of the user routers
+    app.include_router(campaign_service_router, tags=['campaign'])
+    app.include_router(recipient_service_router, tags=['recipient'])
+    app.include_router(notification_service_router, tags=['notification'])
     app.include_router(campaign_router, tags=['campaign'])
     app.include_router(recipient_router, tags=['recipient'])
     app.include_router(notification_router, tags=['notification'])
     app.include_router(user_router, tags=['user'])
+    app.include_router(metrics_router, tags=['metrics'])
+    app.include_router(job_router, tags=['job'])
     
     return app
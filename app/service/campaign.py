@@ -1,20 +1,104 @@
-from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+import uuid
 
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import JobKind
 from app.repository.campaign import CampaignRepository
+from app.repository.job import JobRepository
 from app.repository.notification import NotificationRepository
-from app.schemas import Campaign
-from app.exceptions import NoAvailableCampaignsException
+from app.schemas import Campaign, FanoutPage, Job
+from app.exceptions import NoAvailableCampaignsException, NotFoundException
+
+
+logger = logging.getLogger('app.service.campaign')
+
+DELETE_BATCH_SIZE = 5000
 
 
 class CampaignService:  
     def __init__(
-        self, campaign_repository: CampaignRepository, notification_repository: NotificationRepository
+        self,
+        campaign_repository: CampaignRepository,
+        notification_repository: NotificationRepository,
+        job_repository: JobRepository,
     ) -> None:
         self.campaign_repository = campaign_repository
         self.notification_repository = notification_repository
+        self.job_repository = job_repository
     
     async def complete(self, session: AsyncSession) -> Campaign:
         campaign = await self.campaign_repository.complete(session)
         if campaign is None:
             raise NoAvailableCampaignsException('There are no campaigns available to complete')
         return Campaign.model_validate(campaign) 
+
+    async def fanout(
+        self, limit: int, window: int, worker_id: str, lease_ttl: float, session: AsyncSession
+    ) -> FanoutPage:
+        """Creates the next page of notifications of a running campaign.
+
+        Nothing is created while window or more outbox messages are waiting to be published, so the backlog stays
+        under window plus one page however large the campaign is. Pending fan-out is checked first, so an idle
+        worker is told there is nothing to do rather than to wait for the window to drain.
+        """
+        if not await self.campaign_repository.has_pending_fanout(session):
+            raise NoAvailableCampaignsException('There are no campaigns to fan out')
+        in_flight = await self.campaign_repository.count_in_flight(window, session)
+        if in_flight >= window:
+            return FanoutPage(campaign_id=None, created=0, completed=False, in_flight=in_flight)
+        page = await self.campaign_repository.fanout(limit, worker_id, session, lease_ttl=lease_ttl)
+        if page is None:
+            raise NoAvailableCampaignsException('There are no campaigns to fan out')
+        campaign, created = page
+        return FanoutPage(
+            campaign_id=campaign.campaign_id,
+            created=created,
+            completed=not campaign.fanout_pending,
+            in_flight=in_flight + created,
+        )
+
+    async def delete(self, campaign_id: int, session: AsyncSession) -> Job:
+        """Marks the campaign as deleting and returns the job that tracks the removal of its rows.
+
+        For a campaign that is already being deleted its job is restarted, so a deletion interrupted by a restart or
+        an error is retried by deleting the campaign again.
+        """
+        campaign = await self.campaign_repository.mark_deleting(campaign_id, session)
+        if campaign.delete_job_id is not None:
+            job = await self.job_repository.restart(campaign.delete_job_id, session)
+        else:
+            campaign.delete_job_id = uuid.uuid4()
+            job = await self.job_repository.create(JobKind.CAMPAIGN_DELETE, session, job_id=campaign.delete_job_id)
+        return Job.model_validate(job)
+
+    async def purge(
+        self,
+        job_id: uuid.UUID,
+        campaign_id: int,
+        session_maker: async_sessionmaker[AsyncSession],
+        batch_size: int = DELETE_BATCH_SIZE,
+    ) -> None:
+        """Removes notifications and outbox messages in short transactions of batch_size rows, then the campaign.
+
+        Progress is stored on the job after every batch, so locks are held only for one batch at a time.
+        """
+        progress = {'notifications': 0, 'outbox': 0}
+        async with session_maker() as session:
+            try:
+                for key, delete_batch in (
+                    ('notifications', self.campaign_repository.delete_notifications),
+                    ('outbox', self.campaign_repository.delete_outbox),
+                ):
+                    while deleted := await delete_batch(campaign_id, batch_size, session):
+                        progress[key] += deleted
+                        await self.job_repository.progress(job_id, progress, session)
+                try:
+                    await self.campaign_repository.delete(campaign_id, session)
+                except NotFoundException:
+                    logger.info('The campaign_id: %s has already been deleted by a restarted job', campaign_id)
+                await self.job_repository.finish(job_id, progress, session)
+            except Exception as exc:
+                logger.exception('Failed to delete campaign_id: %s', campaign_id)
+                await session.rollback()
+                await self.job_repository.fail(job_id, str(exc) or type(exc).__name__, session)
@@ -0,0 +1,32 @@
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.export import ExportFormat
+from app.importer import RecipientRows
+from app.models import JobKind
+from app.repository.job import JobRepository
+from app.repository.recipient import RecipientRepository
+from app.schemas import Job
+
+
+class RecipientService:
+    def __init__(self, recipient_repository: RecipientRepository, job_repository: JobRepository) -> None:
+        self.recipient_repository = recipient_repository
+        self.job_repository = job_repository
+
+    async def import_recipients(
+        self, chunks: AsyncIterator[bytes], import_format: ExportFormat, session: AsyncSession
+    ) -> Job:
+        """Imports an uploaded recipient list in one transaction and records the outcome as a job."""
+        job = await self.job_repository.create(JobKind.RECIPIENT_IMPORT, session)
+        job_id = job.job_id
+        rows = RecipientRows(chunks, import_format)
+        try:
+            counts = await self.recipient_repository.import_rows(rows, session)
+        except Exception as exc:
+            await session.rollback()
+            await self.job_repository.fail(job_id, str(exc), session)
+            raise
+        job = await self.job_repository.finish(job_id, {**counts, 'rejected': rows.rejected}, session)
+        return Job.model_validate(job)
@@ -8,28 +8,35 @@ from pydantic import EmailStr
 from sqlalchemy.exc import IntegrityError
 
 from app.repository.user import UserRepository
+from app.cache import UserCache
 from app.config import Config
-from app.utils import get_password_hash, verify_password
+from app.utils import PasswordHasher, get_password_hash, verify_password
 from app.schemas import User, Token
 from app.exceptions import CredentialsException, ConflictException
 
 
 class UserService:
-    def __init__(self, user_repository: UserRepository) -> None:
+    def __init__(self, user_repository: UserRepository, hasher: PasswordHasher) -> None:
         self.user_repository = user_repository
+        self.hasher = hasher
         
     async def register_user(self, session: AsyncSession, email: EmailStr, password: str) -> User:
+        hash_password = await self.hasher.run(get_password_hash, password)
         try:
-            user = await self.user_repository.add(session, email, get_password_hash(password))
+            user = await self.user_repository.add(session, email, hash_password)
         except IntegrityError:
             raise ConflictException(detail=f'User with this email: {email} already exists')
         return User.model_validate(user)
 
 
 class AuthService:
-    def __init__(self, user_repository: UserRepository, config: Config) -> None:
+    def __init__(
+        self, user_repository: UserRepository, config: Config, hasher: PasswordHasher, cache: UserCache | None = None
+    ) -> None:
         self.user_repository = user_repository
         self.config = config
+        self.hasher = hasher
+        self.cache = cache
         
     def create_token(self, user_id: uuid.UUID) -> Token:
         expire = datetime.now(timezone.utc) + timedelta(minutes=self.config.JWT_EXP)
@@ -39,7 +46,7 @@ class AuthService:
 
     async def authenticate_user(self, session: AsyncSession, email: EmailStr, password: str) -> User:
         user = await self.user_repository.get_by_email(session, email)
-        if not (user and verify_password(password, user.hash_password)):
+        if user is None or not await self.hasher.run(verify_password, password, user.hash_password):
             raise CredentialsException(detail='Incorrect username or password')
         return User.model_validate(user)
     
@@ -50,7 +57,12 @@ class AuthService:
         except (InvalidTokenError, KeyError):
             raise CredentialsException
         
-        user = await self.user_repository.get(session, user_id)
-        if not user:
+        if self.cache is not None and (cached := self.cache.get(user_id)) is not None:
+            return cached
+        user_orm = await self.user_repository.get(session, user_id)
+        if not user_orm:
             raise CredentialsException
-        return User.model_validate(user)
+        user = User.model_validate(user_orm)
+        if self.cache is not None:
+            self.cache.put(user_id, user)
+        return user
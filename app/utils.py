@@ -1,9 +1,17 @@
+import asyncio
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import Request
 from passlib.context import CryptContext
 from passlib.exc import UnknownHashError
 
 
 pwd_context = CryptContext(schemes=['bcrypt'], deprecated="auto")
 
+T = t.TypeVar('T')
+
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -14,3 +22,55 @@ def verify_password(password: str, hashed_password: str) -> bool:
         return pwd_context.verify(password, hashed_password)
     except UnknownHashError:
         return False
+
+
+class PasswordHasher:
+    """Runs bcrypt calls in a thread pool so that they do not block the event loop.
+
+    At most max_concurrency calls run at once, the others wait for a slot and their waiting time is recorded.
+    """
+
+    def __init__(self, max_concurrency: int = 4) -> None:
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='password-hasher')
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def run(self, func: t.Callable[..., T], *args: t.Any) -> T:
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.semaphore.release()
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'completed': self.completed,
+            'wait_total': self.wait_total,
+            'wait_max': self.wait_max,
+        }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_password_hasher(request: Request) -> PasswordHasher:
+    return request.app.state.container.password_hasher
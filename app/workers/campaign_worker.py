@@ -1,95 +1,175 @@
 import asyncio
+import datetime
 import logging
 import logging.config
+import os
+import socket
 
-import aio_pika
 from httpx import AsyncClient
 
 from app.config import load_from_env
-from app.schemas import Recipient, NotificationBody, Campaign
+from app.schemas import Campaign
 from app.exceptions import ApiClientException
-from app.clients.broker_client import RabbitMQClient
 from app.clients.api_client import ApiClient
+from app.clients.pg_listener import PgListener
+from app.ddl import CAMPAIGN_EVENTS_CHANNEL
 
 
 logger = logging.getLogger('app.workers.campaign_worker')
 
             
 class CampaignWorker: 
-    def __init__(self, api_client: ApiClient, broker_client: RabbitMQClient) -> None:
+    def __init__(
+        self,
+        api_client: ApiClient,
+        listener: PgListener,
+        batch_size: int = 1,
+        poll_interval: float = 60,
+        page_size: int = 1000,
+        window: int = 10000,
+        throttle_interval: float = 0.5,
+        concurrency: int = 4,
+        lease_ttl: float = 30,
+        worker_id: str | None = None,
+    ) -> None:
         self. api_client = api_client
-        self.broker_client = broker_client
+        self.listener = listener
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.page_size = page_size
+        self.window = window
+        self.throttle_interval = throttle_interval
+        self.concurrency = concurrency
+        self.lease_ttl = lease_ttl
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.progress: dict[int, int] = {}
+        self.campaigns_started = asyncio.Event()
          
-    def make_message(self, recipient: Recipient, campaign: Campaign) -> aio_pika.Message:
-        body_message = NotificationBody(
-            recipient_id=recipient.recipient_id,
-            email=recipient.contact_email,
-            first_name=recipient.name,
-            last_name=recipient.lastname,
-            campaign_id=campaign.campaign_id,
-            campaign_title=campaign.name,
-            content=campaign.content
-        )
-        
-        return aio_pika.Message(
-            body=body_message.model_dump_json().encode(),
-            content_type="application/json",
-            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,  
-            headers={
-                "message_type": "notification",
-                "encoding": "utf-8"
-            }
-        )
-        
-    async def add_to_queue(self, message: aio_pika.Message) -> None:
-        await self.broker_client.connect()
-        channel = self.broker_client.channel
-        queue: aio_pika.abc.AbstractQueue = await channel.declare_queue("email_queue", durable=True)     
-        await channel.default_exchange.publish(message, routing_key=queue.name)
-        
-    async def run_campaign(self) -> Campaign:
-        campaign = await self.api_client.acquire_campaign_for_launch()
-        recipients = await self.api_client.fetch_recipients()
-        await self.api_client.prepare_notifications(campaign, recipients)
-        for recipient in recipients:
-            message = self.make_message(recipient, campaign)
+    async def run_campaigns(self) -> list[Campaign]:
+        """Acquires due campaigns, their notifications are created afterwards by fan_out."""
+        return await self.api_client.acquire_campaigns_for_launch(batch_size=self.batch_size)
+    
+    async def fan_out(self) -> None:
+        """Creates notifications of running campaigns one page of recipients at a time until none is left.
+
+        Recipients never reach the worker, the app creates each page with their outbox messages in its own
+        transaction. While window messages are waiting to be published, no page is created until the relay catches up.
+        """
+        while True:
             try:
-                await self.add_to_queue(message)
-            except Exception:
-                logger.exception(
-                    'Failed to add message to queue, campaign_id: %(campaign_id)s, recipient_id: %(recipient_id)s',
-                    {
-                        'campaign_id': campaign.campaign_id,
-                        'recipient_id': recipient.recipient_id
-                    }
+                page = await self.api_client.fanout_campaign(
+                    self.worker_id, limit=self.page_size, window=self.window, lease_ttl=self.lease_ttl
                 )
-        return campaign
+            except ApiClientException:
+                return
+            if page.campaign_id is not None:
+                self.log_progress(page.campaign_id, page.created, page.completed)
+            if page.in_flight >= self.window:
+                await asyncio.sleep(self.throttle_interval)
+    
+    def log_progress(self, campaign_id: int, created: int, completed: bool) -> None:
+        total = self.progress.pop(campaign_id, 0) + created
+        if completed:
+            logger.info('Notifications of the campaign_id: %s have been created, %s in total', campaign_id, total)
+        else:
+            self.progress[campaign_id] = total
+            logger.info('The campaign_id: %s has %s notifications created so far', campaign_id, total)
+    
+    async def run_fan_out_lane(self) -> None:
+        """Fans out campaigns until none is left, then waits for new campaigns to start."""
+        while True:
+            await self.fan_out()
+            try:
+                await asyncio.wait_for(self.campaigns_started.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
     
     async def complete_campaign(self) -> Campaign:
         campaign = await self.api_client.complete_campaign()
         return campaign
-        
-    async def main(self) -> None:
-        logger.info('CampaignWorker has started successfully')
+    
+    async def launch_due_campaigns(self) -> None:
         while True:
-            try:  
-                campaign = await self.run_campaign()
-                logger.info('The campaign_id: %s has started successfully', campaign.campaign_id)
+            try:
+                campaigns = await self.run_campaigns()
             except ApiClientException:
                 logger.info('There are no campaigns to run')
+                return
+            for campaign in campaigns:
+                logger.info('The campaign_id: %s has started successfully', campaign.campaign_id)
+            if len(campaigns) < self.batch_size:
+                return
+    
+    async def complete_campaigns(self) -> None:
+        while True:
             try:
                 campaign = await self.complete_campaign()
-                logger.info('The campaign_id: %s has been successfully completed', campaign.campaign_id)
-                
             except ApiClientException:
                 logger.info('There are no campaigns to complete.')
-            await asyncio.sleep(10)
+                return
+            logger.info('The campaign_id: %s has been successfully completed', campaign.campaign_id)
+    
+    async def get_wakeup_timeout(self) -> float:
+        """Sleeps until the next scheduled launch, but never longer than the poll interval."""
+        try:
+            launch_date = await self.api_client.get_next_launch_date()
+        except ApiClientException:
+            return self.poll_interval
+        if launch_date is None:
+            return self.poll_interval
+        until_launch = (launch_date - datetime.datetime.now()).total_seconds()
+        return min(max(until_launch, 0), self.poll_interval)
+        
+    async def run_heartbeat(self) -> None:
+        """Keeps the leases on chunks of this worker alive while its lanes are throttled or between pages."""
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await self.api_client.heartbeat(self.worker_id, lease_ttl=self.lease_ttl)
+            except ApiClientException:
+                logger.warning('Failed to extend fan-out leases of %s', self.worker_id)
+    
+    async def run_scheduler(self) -> None:
+        while True:
+            await self.launch_due_campaigns()
+            # Wakes every idle lane, set() releases the current waiters even though the event is cleared right away
+            self.campaigns_started.set()
+            self.campaigns_started.clear()
+            await self.complete_campaigns()
+            events = await self.listener.wait(await self.get_wakeup_timeout())
+            if events:
+                logger.debug('Woken up by campaign events: %s', events)
+        
+    async def main(self) -> None:
+        """Launches and completes campaigns while up to concurrency lanes fan them out.
+
+        Campaigns are split into chunks of recipient ids. Each lane takes a chunk of the campaign that waited longest
+        for its previous page and skips chunks locked by other lanes or replicas, so pages of all running campaigns
+        are interleaved and one large campaign is fanned out by every lane at once. Chunks stay leased to this worker
+        while it sends heartbeats, chunks of workers that stopped are taken over and resumed from their cursor.
+        """
+        logger.info('CampaignWorker has started successfully')
+        async with asyncio.TaskGroup() as task_group:
+            for _ in range(self.concurrency):
+                task_group.create_task(self.run_fan_out_lane())
+            task_group.create_task(self.run_heartbeat())
+            task_group.create_task(self.run_scheduler())
             
             
 if __name__ == '__main__':
     config = load_from_env()
-    app_client = AsyncClient(base_url=config.APP_URL, headers={'Authorization': config.TOKEN_WORKER})
-    worker = CampaignWorker(ApiClient(app_client), RabbitMQClient(config))
+    app_client = AsyncClient(base_url=config.APP_URL, headers={'X-API-Key': config.CAMPAIGN_WORKER_API_KEY})
+    worker = CampaignWorker(
+        ApiClient(app_client),
+        PgListener(config.DATABASE_URL, CAMPAIGN_EVENTS_CHANNEL),
+        batch_size=config.CAMPAIGN_ACQUIRE_BATCH_SIZE,
+        poll_interval=config.CAMPAIGN_POLL_INTERVAL,
+        page_size=config.CAMPAIGN_FANOUT_PAGE_SIZE,
+        window=config.CAMPAIGN_FANOUT_WINDOW,
+        throttle_interval=config.CAMPAIGN_FANOUT_THROTTLE_INTERVAL,
+        concurrency=config.CAMPAIGN_FANOUT_CONCURRENCY,
+        lease_ttl=config.CAMPAIGN_FANOUT_LEASE_TTL,
+    )
     asyncio.run(worker.main())
 
         
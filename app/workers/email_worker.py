@@ -1,26 +1,85 @@
 import asyncio
 import json
 import logging
+import time
+import typing as t
 
+import httpx
 from aio_pika.abc import AbstractIncomingMessage
 from httpx import AsyncClient
 
-from app.schemas import NotificationBody, StatusNotification
+from app.schemas import NotificationBody, NotificationStatusUpdate, StatusNotification
 from app.clients.broker_client import RabbitMQClient
 from app.clients.email_client import EmailClient
 from app.clients.api_client import ApiClient
-from app.exceptions import EmailSendException
+from app.exceptions import EmailSendException, ApiClientException
 from app.config import load_from_env
 
 
 logger = logging.getLogger('app.workers.email_worker')
 
 
+class StatusBuffer:
+    """Collects notification status updates and writes them with one bulk request.
+    
+    The buffer is flushed when it reaches max_size or every flush_interval seconds. Broker messages
+    are acked only after their statuses are committed; on failure they stay buffered and unacked
+    and are retried by the interval flush, a full buffer does not flush again for flush_interval seconds.
+    """
+    
+    def __init__(
+        self,
+        api_client: ApiClient,
+        max_size: int,
+        flush_interval: float,
+        clock: t.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.api_client = api_client
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.retry_at = 0.0
+        self._updates: list[NotificationStatusUpdate] = []
+        self._messages: list[AbstractIncomingMessage] = []
+        self._lock = asyncio.Lock()
+        
+    async def add(self, message: AbstractIncomingMessage, update: NotificationStatusUpdate) -> None:
+        self._updates.append(update)
+        self._messages.append(message)
+        if len(self._updates) >= self.max_size and self.clock() >= self.retry_at:
+            await self.flush()
+    
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._updates:
+                return
+            updates, messages = self._updates, self._messages
+            self._updates, self._messages = [], []
+            try:
+                await self.api_client.update_notification_statuses(updates)
+            except (ApiClientException, httpx.HTTPError):
+                logger.exception('Failed to update statuses of %s notifications, retrying later', len(updates))
+                self._updates[:0] = updates
+                self._messages[:0] = messages
+                self.retry_at = self.clock() + self.flush_interval
+                return
+            for message in messages:
+                await message.ack()
+            logger.info('Statuses of %s notifications updated', len(updates))
+    
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
 class EmailWorker:
-    def __init__(self, broker_client: RabbitMQClient, email_client: EmailClient, api_client: ApiClient) -> None:
+    def __init__(
+        self, broker_client: RabbitMQClient, email_client: EmailClient, status_buffer: StatusBuffer
+    ) -> None:
         self.broker_client = broker_client
         self.email_client = email_client
-        self.api_client = api_client
+        self.status_buffer = status_buffer
         
     async def consume_message(self) -> None:
         logger.info('EmailWorker has started successfully')
@@ -28,37 +87,33 @@ class EmailWorker:
         channel = self.broker_client.channel
         queue = await channel.declare_queue("email_queue", durable=True)
         await queue.consume(callback=self.process_sending_message)
-        await asyncio.Future()
+        await self.status_buffer.run()
 
     async def process_sending_message(self, message: AbstractIncomingMessage) -> None:
         body = NotificationBody(**json.loads(message.body.decode()))
         msg = self.email_client.make_message(body)
         try:
             self.email_client.send_notification(body, msg)
-            await self.api_client.update_notification_status(
-                body.recipient_id, body.campaign_id, StatusNotification.DELIVERED
-            )
+            status = StatusNotification.DELIVERED
             logger.info(
                 "Notification sent successfully for recipient_id=%s, campaign_id=%s",
                 body.recipient_id,
                 body.campaign_id
             )
-            await message.ack()
         except EmailSendException:
-            await self.api_client.update_notification_status(
-                body.
-                recipient_id, body.campaign_id, StatusNotification.UNDELIVERED
-            )
+            status = StatusNotification.UNDELIVERED
             logger.warning(
                 "Failed to send notification for recipient_id=%s, campaign_id=%s",
                 body.recipient_id,
                 body.campaign_id
             )
-            await message.ack()
+        update = NotificationStatusUpdate(campaign_id=body.campaign_id, recipient_id=body.recipient_id, status=status)
+        await self.status_buffer.add(message, update)
                 
                 
 if __name__ == '__main__':
     config = load_from_env()
-    api_client = ApiClient(AsyncClient(base_url=config.APP_URL, headers={'Authorization': config.TOKEN_WORKER}))
-    email_worker = EmailWorker(RabbitMQClient(config), EmailClient(config), api_client)
+    api_client = ApiClient(AsyncClient(base_url=config.APP_URL, headers={'X-API-Key': config.EMAIL_WORKER_API_KEY}))
+    status_buffer = StatusBuffer(api_client, config.EMAIL_STATUS_BATCH_SIZE, config.EMAIL_STATUS_FLUSH_INTERVAL)
+    email_worker = EmailWorker(RabbitMQClient(config), EmailClient(config), status_buffer)
     asyncio.run(email_worker.consume_message())
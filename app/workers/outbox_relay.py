@@ -0,0 +1,101 @@
+import asyncio
+import logging
+
+import aio_pika
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import load_from_env
+from app.db import create_db_engine, create_session_maker
+from app.models import OutboxOrm
+from app.schemas import NotificationBody
+from app.clients.broker_client import RabbitMQClient, Publisher
+from app.repository.outbox import OutboxRepository
+
+
+logger = logging.getLogger('app.workers.outbox_relay')
+
+EMAIL_QUEUE = 'email_queue'
+
+
+class OutboxRelay:
+    """Publishes outbox messages to the email queue in batches.
+
+    A batch is claimed with SKIP LOCKED, published with publisher confirms and marked SENT in the same
+    transaction, so any number of relays can run side by side. A batch that is still unconfirmed after the
+    publisher's retries is rolled back and published again later, delivery is at least once.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        publisher: Publisher,
+        repository: OutboxRepository,
+        batch_size: int = 500,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.session_maker = session_maker
+        self.publisher = publisher
+        self.repository = repository
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def make_message(self, entry: OutboxOrm) -> aio_pika.Message:
+        body_message = NotificationBody(
+            recipient_id=entry.recipient.recipient_id,
+            email=entry.recipient.contact_email,
+            first_name=entry.recipient.name,
+            last_name=entry.recipient.lastname,
+            campaign_id=entry.campaign.campaign_id,
+            campaign_title=entry.campaign.name,
+            content=entry.campaign.content
+        )
+
+        return aio_pika.Message(
+            body=body_message.model_dump_json().encode(),
+            content_type="application/json",
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            message_id=str(entry.outbox_id),
+            headers={
+                "message_type": "notification",
+                "encoding": "utf-8"
+            }
+        )
+
+    async def relay_batch(self) -> int:
+        async with self.session_maker() as session:
+            entries = await self.repository.claim(session, self.batch_size)
+            if not entries:
+                return 0
+            await self.publisher.publish([self.make_message(entry) for entry in entries])
+            await self.repository.mark_sent([entry.outbox_id for entry in entries], session)
+        return len(entries)
+
+    async def main(self) -> None:
+        await self.publisher.declare()
+        logger.info('OutboxRelay has started successfully')
+        while True:
+            try:
+                relayed = await self.relay_batch()
+            except Exception:
+                logger.exception('Failed to relay outbox batch')
+                relayed = 0
+            if relayed:
+                logger.info(
+                    'Relayed %s messages to %s, %.0f messages/s',
+                    relayed, EMAIL_QUEUE, self.publisher.stats()['messages_per_second']
+                )
+            if relayed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+if __name__ == '__main__':
+    config = load_from_env()
+    engine = create_db_engine(config)
+    relay = OutboxRelay(
+        create_session_maker(engine),
+        RabbitMQClient(config).get_publisher(EMAIL_QUEUE),
+        OutboxRepository(),
+        batch_size=config.OUTBOX_BATCH_SIZE,
+        poll_interval=config.OUTBOX_POLL_INTERVAL,
+    )
+    asyncio.run(relay.main())
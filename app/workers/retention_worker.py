@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import load_from_env
+from app.db import create_db_engine, create_session_maker
+from app.repository.campaign import CampaignRepository
+from app.repository.partition import create_partitions, retire_partitions
+
+
+logger = logging.getLogger('app.workers.retention_worker')
+
+
+class RetentionWorker:
+    """Archives notifications of campaigns that finished more than retention ago, one campaign per transaction.
+
+    Also maintains the partitions of notifications, which the request path never changes. Partitions for the next
+    partitions_ahead ranges of partition_size campaign ids are created every partition_interval, independently of
+    archiving, so they have to cover the campaigns created within that short interval. The partitions of archived
+    and deleted campaigns are retired after each archiving pass.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        repository: CampaignRepository,
+        retention: timedelta,
+        interval: float = 3600,
+        partition_size: int = 1000,
+        partitions_ahead: int = 4,
+        partition_interval: float = 60,
+    ) -> None:
+        self.session_maker = session_maker
+        self.repository = repository
+        self.retention = retention
+        self.interval = interval
+        self.partition_size = partition_size
+        self.partitions_ahead = partitions_ahead
+        self.partition_interval = partition_interval
+
+    async def archive_finished_campaigns(self) -> int:
+        archived = 0
+        finished_before = datetime.now() - self.retention
+        while True:
+            async with self.session_maker() as session:
+                campaign = await self.repository.archive(finished_before, session)
+            if campaign is None:
+                return archived
+            logger.info('Notifications of campaign_id: %s have been archived', campaign.campaign_id)
+            archived += 1
+
+    async def create_partitions(self) -> list[str]:
+        async with self.session_maker() as session:
+            created = await create_partitions(self.partition_size, self.partitions_ahead, session)
+        for partition in created:
+            logger.info('Notifications partition %s has been created', partition.name)
+        return [partition.name for partition in created]
+
+    async def retire_partitions(self) -> list[str]:
+        async with self.session_maker() as session:
+            retired = await retire_partitions(session)
+        for name in retired:
+            logger.info('Notifications partition %s has been detached and dropped', name)
+        return retired
+
+    async def run_partition_creation(self) -> None:
+        while True:
+            try:
+                await self.create_partitions()
+            except Exception:
+                logger.exception('Failed to create notifications partitions')
+            await asyncio.sleep(self.partition_interval)
+
+    async def run_retention(self) -> None:
+        while True:
+            try:
+                await self.archive_finished_campaigns()
+            except Exception:
+                logger.exception('Failed to archive finished campaigns')
+            try:
+                await self.retire_partitions()
+            except Exception:
+                logger.exception('Failed to retire notifications partitions')
+            await asyncio.sleep(self.interval)
+
+    async def main(self) -> None:
+        logger.info('RetentionWorker has started successfully')
+        async with asyncio.TaskGroup() as task_group:
+            task_group.create_task(self.run_partition_creation())
+            task_group.create_task(self.run_retention())
+
+
+if __name__ == '__main__':
+    config = load_from_env()
+    engine = create_db_engine(config)
+    worker = RetentionWorker(
+        create_session_maker(engine),
+        CampaignRepository(),
+        retention=timedelta(days=config.RETENTION_DAYS),
+        interval=config.RETENTION_INTERVAL,
+        partition_size=config.NOTIFICATIONS_PARTITION_SIZE,
+        partitions_ahead=config.NOTIFICATIONS_PARTITIONS_AHEAD,
+        partition_interval=config.NOTIFICATIONS_PARTITION_INTERVAL,
+    )
+    asyncio.run(worker.main())
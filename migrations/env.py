@@ -1,4 +1,5 @@
 from logging.config import fileConfig
+from typing import Any
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
@@ -8,6 +9,7 @@ from alembic import context
 from app.config import load_from_env
 from app.db import BaseOrm
 from app.models import CampaignOrm  # noqa
+from app.repository.partition import PARTITION_NAME
 
 
 config = context.config
@@ -19,6 +21,11 @@ config.set_main_option('sqlalchemy.url', load_from_env().ASYNC_DATABASE_URL + '?
 target_metadata = BaseOrm.metadata
 
 
+def include_name(name: str | None, type_: str, parent_names: Any) -> bool:  # noqa: U100
+    # Partitions of notifications are created and dropped by the application, not by migrations
+    return not (type_ == 'table' and name is not None and PARTITION_NAME.fullmatch(name))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -61,6 +68,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_server_default=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
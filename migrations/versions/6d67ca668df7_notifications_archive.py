@@ -0,0 +1,43 @@
+"""notifications archive
+
+Revision ID: 6d67ca668df7
+Revises: f446ff84d143
+Create Date: 2026-10-18 15:14:26.738051
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d67ca668df7'
+down_revision: Union[str, None] = 'f446ff84d143'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('campaigns', sa.Column('archived_at', sa.DateTime(), nullable=True))
+    op.create_table('notifications_archive',
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('notification_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('recipient_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column(
+        'statuses',
+        postgresql.ARRAY(
+            postgresql.ENUM('PENDING', 'SENT', 'DELIVERED', 'UNDELIVERED', name='statusnotification', create_type=False)
+        ),
+        nullable=False
+    ),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('campaign_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('notifications_archive')
+    op.drop_column('campaigns', 'archived_at')
@@ -0,0 +1,130 @@
+"""campaign stats
+
+Revision ID: 76dea806143e
+Revises: d2ace5c790c8
+Create Date: 2026-10-18 11:03:27.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '76dea806143e'
+down_revision: Union[str, None] = 'd2ace5c790c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('campaign_stats',
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('pending', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('sent', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('delivered', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('undelivered', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('campaign_id')
+    )
+    # Writes are blocked until commit, so every row is counted either by the backfill or by the triggers
+    op.execute('LOCK TABLE notifications IN SHARE ROW EXCLUSIVE MODE')
+    op.execute(
+        '''
+        CREATE OR REPLACE FUNCTION campaign_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO campaign_stats AS s (campaign_id, pending, sent, delivered, undelivered)
+                SELECT campaign_id,
+                       count(*) FILTER (WHERE status = 'PENDING'),
+                       count(*) FILTER (WHERE status = 'SENT'),
+                       count(*) FILTER (WHERE status = 'DELIVERED'),
+                       count(*) FILTER (WHERE status = 'UNDELIVERED')
+                FROM new_rows
+                GROUP BY campaign_id
+                ON CONFLICT (campaign_id) DO UPDATE SET
+                    pending = s.pending + EXCLUDED.pending,
+                    sent = s.sent + EXCLUDED.sent,
+                    delivered = s.delivered + EXCLUDED.delivered,
+                    undelivered = s.undelivered + EXCLUDED.undelivered;
+            ELSIF TG_OP = 'UPDATE' THEN
+                UPDATE campaign_stats AS s SET
+                    pending = s.pending + d.pending,
+                    sent = s.sent + d.sent,
+                    delivered = s.delivered + d.delivered,
+                    undelivered = s.undelivered + d.undelivered
+                FROM (
+                    SELECT campaign_id,
+                           coalesce(sum(delta) FILTER (WHERE status = 'PENDING'), 0) AS pending,
+                           coalesce(sum(delta) FILTER (WHERE status = 'SENT'), 0) AS sent,
+                           coalesce(sum(delta) FILTER (WHERE status = 'DELIVERED'), 0) AS delivered,
+                           coalesce(sum(delta) FILTER (WHERE status = 'UNDELIVERED'), 0) AS undelivered
+                    FROM (
+                        SELECT campaign_id, status, 1 AS delta FROM new_rows
+                        UNION ALL
+                        SELECT campaign_id, status, -1 AS delta FROM old_rows
+                    ) AS changes
+                    GROUP BY campaign_id
+                ) AS d
+                WHERE s.campaign_id = d.campaign_id;
+            ELSE
+                -- Delivery outcomes are history and outlive the rows, only in-flight counters go down
+                UPDATE campaign_stats AS s SET
+                    pending = s.pending - d.pending,
+                    sent = s.sent - d.sent
+                FROM (
+                    SELECT campaign_id,
+                           count(*) FILTER (WHERE status = 'PENDING') AS pending,
+                           count(*) FILTER (WHERE status = 'SENT') AS sent
+                    FROM old_rows
+                    GROUP BY campaign_id
+                ) AS d
+                WHERE s.campaign_id = d.campaign_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        '''
+    )
+    op.execute(
+        '''
+        CREATE TRIGGER notifications_stats_insert AFTER INSERT ON notifications
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+        '''
+    )
+    op.execute(
+        '''
+        CREATE TRIGGER notifications_stats_update AFTER UPDATE ON notifications
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+        '''
+    )
+    op.execute(
+        '''
+        CREATE TRIGGER notifications_stats_delete AFTER DELETE ON notifications
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+        '''
+    )
+    op.execute(
+        '''
+        INSERT INTO campaign_stats (campaign_id, pending, sent, delivered, undelivered)
+        SELECT campaign_id,
+               count(*) FILTER (WHERE status = 'PENDING'),
+               count(*) FILTER (WHERE status = 'SENT'),
+               count(*) FILTER (WHERE status = 'DELIVERED'),
+               count(*) FILTER (WHERE status = 'UNDELIVERED')
+        FROM notifications
+        GROUP BY campaign_id
+        '''
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER notifications_stats_delete ON notifications')
+    op.execute('DROP TRIGGER notifications_stats_update ON notifications')
+    op.execute('DROP TRIGGER notifications_stats_insert ON notifications')
+    op.execute('DROP FUNCTION campaign_stats_apply()')
+    op.drop_table('campaign_stats')
@@ -0,0 +1,90 @@
+"""campaign drained notify
+
+Revision ID: 85dbfa9fea12
+Revises: 76dea806143e
+Create Date: 2026-10-18 11:48:05.316827
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '85dbfa9fea12'
+down_revision: Union[str, None] = '76dea806143e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CAMPAIGN_STATS_FUNCTION = '''
+    CREATE OR REPLACE FUNCTION campaign_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO campaign_stats AS s (campaign_id, pending, sent, delivered, undelivered)
+            SELECT campaign_id,
+                   count(*) FILTER (WHERE status = 'PENDING'),
+                   count(*) FILTER (WHERE status = 'SENT'),
+                   count(*) FILTER (WHERE status = 'DELIVERED'),
+                   count(*) FILTER (WHERE status = 'UNDELIVERED')
+            FROM new_rows
+            GROUP BY campaign_id
+            ON CONFLICT (campaign_id) DO UPDATE SET
+                pending = s.pending + EXCLUDED.pending,
+                sent = s.sent + EXCLUDED.sent,
+                delivered = s.delivered + EXCLUDED.delivered,
+                undelivered = s.undelivered + EXCLUDED.undelivered;
+        ELSIF TG_OP = 'UPDATE' THEN
+            UPDATE campaign_stats AS s SET
+                pending = s.pending + d.pending,
+                sent = s.sent + d.sent,
+                delivered = s.delivered + d.delivered,
+                undelivered = s.undelivered + d.undelivered
+            FROM (
+                SELECT campaign_id,
+                       coalesce(sum(delta) FILTER (WHERE status = 'PENDING'), 0) AS pending,
+                       coalesce(sum(delta) FILTER (WHERE status = 'SENT'), 0) AS sent,
+                       coalesce(sum(delta) FILTER (WHERE status = 'DELIVERED'), 0) AS delivered,
+                       coalesce(sum(delta) FILTER (WHERE status = 'UNDELIVERED'), 0) AS undelivered
+                FROM (
+                    SELECT campaign_id, status, 1 AS delta FROM new_rows
+                    UNION ALL
+                    SELECT campaign_id, status, -1 AS delta FROM old_rows
+                ) AS changes
+                GROUP BY campaign_id
+            ) AS d
+            WHERE s.campaign_id = d.campaign_id;
+{drained}            ELSE
+            -- Delivery outcomes are history and outlive the rows, only in-flight counters go down
+            UPDATE campaign_stats AS s SET
+                pending = s.pending - d.pending,
+                sent = s.sent - d.sent
+            FROM (
+                SELECT campaign_id,
+                       count(*) FILTER (WHERE status = 'PENDING') AS pending,
+                       count(*) FILTER (WHERE status = 'SENT') AS sent
+                FROM old_rows
+                GROUP BY campaign_id
+            ) AS d
+            WHERE s.campaign_id = d.campaign_id;
+{drained}            END IF;
+        RETURN NULL;
+    END
+    $$
+'''
+
+DRAINED_NOTIFY = '''            -- Campaigns whose last pending notification was resolved can be completed right away
+            PERFORM pg_notify(
+                'campaign_events', json_build_object('event', 'drained', 'campaign_id', s.campaign_id)::text
+            )
+            FROM campaign_stats AS s
+            WHERE s.pending = 0 AND s.campaign_id IN (SELECT campaign_id FROM old_rows WHERE status = 'PENDING');
+'''
+
+
+def upgrade() -> None:
+    op.execute(CAMPAIGN_STATS_FUNCTION.format(drained=DRAINED_NOTIFY))
+
+
+def downgrade() -> None:
+    op.execute(CAMPAIGN_STATS_FUNCTION.format(drained=''))
@@ -0,0 +1,49 @@
+"""recipient segments
+
+Revision ID: 951d36a61cfb
+Revises: e3aa13ba2f11
+Create Date: 2026-10-18 13:07:19.482630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '951d36a61cfb'
+down_revision: Union[str, None] = 'e3aa13ba2f11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+EMAIL_DOMAIN = "lower(split_part(contact_email, '@', 2))"
+
+
+def upgrade() -> None:
+    op.add_column('campaigns', sa.Column('segment', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    # A constant default is only recorded in the catalog, the table is not rewritten
+    op.add_column(
+        'recipients', sa.Column('tags', postgresql.ARRAY(sa.String()), server_default='{}', nullable=False)
+    )
+    # The email domain is indexed as an expression instead of a stored column, which would rewrite the table, and
+    # indexes are built concurrently so that recipients are not locked against writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_recipients_age', 'recipients', ['age'], postgresql_concurrently=True)
+        op.create_index(
+            'ix_recipients_email_domain', 'recipients', [sa.text(EMAIL_DOMAIN)], postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_recipients_tags', 'recipients', ['tags'], postgresql_using='gin', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_recipients_tags', table_name='recipients', postgresql_concurrently=True)
+        op.drop_index('ix_recipients_email_domain', table_name='recipients', postgresql_concurrently=True)
+        op.drop_index('ix_recipients_age', table_name='recipients', postgresql_concurrently=True)
+    op.drop_column('recipients', 'tags')
+    op.drop_column('campaigns', 'segment')
@@ -0,0 +1,123 @@
+"""partition notifications by campaign
+
+Revision ID: a3c5e8f1b7d2
+Revises: 6d67ca668df7
+Create Date: 2026-10-18 16:02:37.514920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e8f1b7d2'
+down_revision: Union[str, None] = '6d67ca668df7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITION_SIZE = 10
+
+TRIGGERS = [
+    '''
+    CREATE TRIGGER notifications_stats_insert AFTER INSERT ON notifications
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+    ''',
+    '''
+    CREATE TRIGGER notifications_stats_update AFTER UPDATE ON notifications
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+    ''',
+    '''
+    CREATE TRIGGER notifications_stats_delete AFTER DELETE ON notifications
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION campaign_stats_apply()
+    ''',
+    '''
+    CREATE TRIGGER notifications_outbox_insert AFTER INSERT ON notifications
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION outbox_enqueue()
+    ''',
+]
+
+INDEXES = [
+    'CREATE UNIQUE INDEX ix_notifications_campaign_id_recipient_id ON notifications (campaign_id, recipient_id)',
+    'CREATE INDEX ix_notifications_recipient_id ON notifications (recipient_id)',
+    "CREATE INDEX ix_notifications_campaign_id_pending ON notifications (campaign_id) WHERE status = 'PENDING'",
+]
+
+COLUMNS = '''
+    notification_id integer NOT NULL DEFAULT nextval('notifications_notification_id_seq'),
+    status statusnotification NOT NULL,
+    campaign_id integer NOT NULL,
+    recipient_id integer NOT NULL,
+    CONSTRAINT notifications_campaign_id_fkey FOREIGN KEY (campaign_id)
+        REFERENCES campaigns (campaign_id) ON DELETE CASCADE,
+    CONSTRAINT notifications_recipient_id_fkey FOREIGN KEY (recipient_id)
+        REFERENCES recipients (recipient_id) ON DELETE CASCADE
+'''
+
+
+def upgrade() -> None:
+    # Existing rows stay where they are and become the legacy partition. Every campaign created so far falls
+    # below the bound, later ones get partitions of their own from the application.
+    last_campaign_id = op.get_bind().execute(sa.text('SELECT coalesce(max(campaign_id), 0) FROM campaigns')).scalar_one()
+    bound = (last_campaign_id // PARTITION_SIZE + 1) * PARTITION_SIZE
+    # The new primary key index and the partition constraint are prepared without blocking writes, so that
+    # ATTACH PARTITION neither builds an index nor scans the table
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS notifications_legacy_pkey '
+            'ON notifications (notification_id, campaign_id)'
+        )
+        op.execute('ALTER TABLE notifications DROP CONSTRAINT IF EXISTS notifications_legacy_bound')
+        op.execute(
+            f'ALTER TABLE notifications ADD CONSTRAINT notifications_legacy_bound CHECK (campaign_id < {bound}) NOT VALID'
+        )
+        op.execute('ALTER TABLE notifications VALIDATE CONSTRAINT notifications_legacy_bound')
+    for trigger in ('stats_insert', 'stats_update', 'stats_delete', 'outbox_insert'):
+        op.execute(f'DROP TRIGGER notifications_{trigger} ON notifications')
+    op.execute('ALTER TABLE notifications DROP CONSTRAINT notifications_pkey')
+    op.execute(
+        'ALTER TABLE notifications ADD CONSTRAINT notifications_legacy_pkey PRIMARY KEY USING INDEX notifications_legacy_pkey'
+    )
+    op.execute('ALTER TABLE notifications RENAME TO notifications_legacy')
+    for index in ('campaign_id_recipient_id', 'recipient_id', 'campaign_id_pending'):
+        op.execute(f'ALTER INDEX ix_notifications_{index} RENAME TO notifications_legacy_{index}_idx')
+    op.execute(
+        f'''
+        CREATE TABLE notifications (
+            {COLUMNS},
+            CONSTRAINT notifications_pkey PRIMARY KEY (notification_id, campaign_id)
+        ) PARTITION BY RANGE (campaign_id)
+        '''
+    )
+    op.execute('ALTER SEQUENCE notifications_notification_id_seq OWNED BY notifications.notification_id')
+    op.execute('CREATE TABLE notifications_default PARTITION OF notifications DEFAULT')
+    for statement in INDEXES:
+        op.execute(statement)
+    # Matching indexes and foreign keys of the legacy table are attached to the parent ones instead of being rebuilt
+    op.execute(f'ALTER TABLE notifications ATTACH PARTITION notifications_legacy FOR VALUES FROM (MINVALUE) TO ({bound})')
+    op.execute('ALTER TABLE notifications_legacy DROP CONSTRAINT notifications_legacy_bound')
+    for statement in TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.execute(f'CREATE TABLE notifications_flat ({COLUMNS})')
+    op.execute(
+        '''
+        INSERT INTO notifications_flat (notification_id, status, campaign_id, recipient_id)
+        SELECT notification_id, status, campaign_id, recipient_id FROM notifications
+        '''
+    )
+    op.execute('ALTER SEQUENCE notifications_notification_id_seq OWNED BY notifications_flat.notification_id')
+    op.execute('DROP TABLE notifications')
+    op.execute('ALTER TABLE notifications_flat RENAME TO notifications')
+    op.execute('ALTER TABLE notifications ADD CONSTRAINT notifications_pkey PRIMARY KEY (notification_id)')
+    for statement in INDEXES:
+        op.execute(statement)
+    for statement in TRIGGERS:
+        op.execute(statement)
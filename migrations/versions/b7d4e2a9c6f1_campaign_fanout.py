@@ -0,0 +1,28 @@
+"""campaign fanout
+
+Revision ID: b7d4e2a9c6f1
+Revises: a3c5e8f1b7d2
+Create Date: 2026-10-18 19:02:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e2a9c6f1'
+down_revision: Union[str, None] = 'a3c5e8f1b7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('campaigns', sa.Column('fanout_pending', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('campaigns', sa.Column('fanout_cursor', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('campaigns', 'fanout_cursor')
+    op.drop_column('campaigns', 'fanout_pending')
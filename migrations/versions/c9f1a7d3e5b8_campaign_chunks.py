@@ -0,0 +1,63 @@
+"""campaign chunks
+
+Revision ID: c9f1a7d3e5b8
+Revises: b7d4e2a9c6f1
+Create Date: 2026-10-18 20:11:07.342519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f1a7d3e5b8'
+down_revision: Union[str, None] = 'b7d4e2a9c6f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('campaign_chunks',
+    sa.Column('chunk_id', sa.BigInteger(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('lower_id', sa.Integer(), nullable=False),
+    sa.Column('upper_id', sa.Integer(), nullable=True),
+    sa.Column('cursor', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'DONE', name='statuschunk'), server_default='PENDING', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('chunk_id')
+    )
+    op.create_index(
+        'ix_campaign_chunks_pending', 'campaign_chunks', ['campaign_id'], postgresql_where=sa.text("status = 'PENDING'")
+    )
+    # Fan-outs in progress continue as a single chunk from their cursor
+    op.execute(
+        '''
+        INSERT INTO campaign_chunks (campaign_id, lower_id, cursor)
+        SELECT campaign_id, 0, fanout_cursor FROM campaigns WHERE fanout_pending
+        '''
+    )
+    op.drop_column('campaigns', 'fanout_cursor')
+
+
+def downgrade() -> None:
+    op.add_column('campaigns', sa.Column('fanout_cursor', sa.Integer(), nullable=True))
+    # Chunks other than the first one are fanned out again from the start, existing notifications are skipped
+    op.execute(
+        '''
+        UPDATE campaigns SET fanout_cursor = chunks.cursor
+        FROM (
+            SELECT DISTINCT ON (campaign_id) campaign_id, coalesce(cursor, lower_id - 1) AS cursor FROM campaign_chunks
+            WHERE status = 'PENDING' ORDER BY campaign_id, lower_id
+        ) AS chunks
+        WHERE campaigns.campaign_id = chunks.campaign_id
+        '''
+    )
+    op.drop_index(
+        'ix_campaign_chunks_pending', table_name='campaign_chunks', postgresql_where=sa.text("status = 'PENDING'")
+    )
+    op.drop_table('campaign_chunks')
+    sa.Enum(name='statuschunk').drop(op.get_bind())
@@ -0,0 +1,38 @@
+"""create table jobs
+
+Revision ID: d0bfaaf020fe
+Revises: 951d36a61cfb
+Create Date: 2026-10-18 13:52:44.170395
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0bfaaf020fe'
+down_revision: Union[str, None] = '951d36a61cfb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('job_id', sa.UUID(), nullable=False),
+    sa.Column('kind', sa.Enum('RECIPIENT_IMPORT', name='jobkind'), nullable=False),
+    sa.Column('status', sa.Enum('RUNNING', 'DONE', 'FAILED', name='statusjob'), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('jobs')
+    sa.Enum(name='statusjob').drop(op.get_bind())
+    sa.Enum(name='jobkind').drop(op.get_bind())
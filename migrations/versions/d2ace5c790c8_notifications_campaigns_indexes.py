@@ -0,0 +1,58 @@
+"""notifications and campaigns indexes
+
+Revision ID: d2ace5c790c8
+Revises: 32e762c05250
+Create Date: 2026-10-18 10:12:41.218304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2ace5c790c8'
+down_revision: Union[str, None] = '32e762c05250'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicates would make the unique index fail, keep the oldest notification of each pair
+    op.execute(
+        '''
+        DELETE FROM notifications a
+        USING notifications b
+        WHERE a.campaign_id = b.campaign_id
+          AND a.recipient_id = b.recipient_id
+          AND a.notification_id > b.notification_id
+        '''
+    )
+    # Indexes are built concurrently so that live tables are not locked against writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_campaign_id_recipient_id', 'notifications', ['campaign_id', 'recipient_id'],
+            unique=True, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_notifications_recipient_id', 'notifications', ['recipient_id'], postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_notifications_campaign_id_pending', 'notifications', ['campaign_id'],
+            postgresql_where=sa.text("status = 'PENDING'"), postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_campaigns_launch_date_created', 'campaigns', ['launch_date'],
+            postgresql_where=sa.text("status = 'CREATED'"), postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_campaigns_launch_date_created', table_name='campaigns', postgresql_concurrently=True)
+        op.drop_index('ix_notifications_campaign_id_pending', table_name='notifications', postgresql_concurrently=True)
+        op.drop_index('ix_notifications_recipient_id', table_name='notifications', postgresql_concurrently=True)
+        op.drop_index(
+            'ix_notifications_campaign_id_recipient_id', table_name='notifications', postgresql_concurrently=True
+        )
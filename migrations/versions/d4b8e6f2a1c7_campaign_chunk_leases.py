@@ -0,0 +1,28 @@
+"""campaign chunk leases
+
+Revision ID: d4b8e6f2a1c7
+Revises: c9f1a7d3e5b8
+Create Date: 2026-10-18 21:03:52.106647
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b8e6f2a1c7'
+down_revision: Union[str, None] = 'c9f1a7d3e5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('campaign_chunks', sa.Column('leased_by', sa.String(), nullable=True))
+    op.add_column('campaign_chunks', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('campaign_chunks', 'lease_expires_at')
+    op.drop_column('campaign_chunks', 'leased_by')
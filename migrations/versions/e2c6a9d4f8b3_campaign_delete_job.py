@@ -0,0 +1,31 @@
+"""campaign delete job
+
+Revision ID: e2c6a9d4f8b3
+Revises: d4b8e6f2a1c7
+Create Date: 2026-10-19 10:17:45.902381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c6a9d4f8b3'
+down_revision: Union[str, None] = 'd4b8e6f2a1c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('campaigns', sa.Column('delete_job_id', postgresql.UUID(), nullable=True))
+    op.create_foreign_key(
+        'campaigns_delete_job_id_fkey', 'campaigns', 'jobs', ['delete_job_id'], ['job_id'], ondelete='SET NULL'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('campaigns_delete_job_id_fkey', 'campaigns', type_='foreignkey')
+    op.drop_column('campaigns', 'delete_job_id')
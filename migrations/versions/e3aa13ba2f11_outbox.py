@@ -0,0 +1,60 @@
+"""outbox
+
+Revision ID: e3aa13ba2f11
+Revises: 85dbfa9fea12
+Create Date: 2026-10-18 12:31:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3aa13ba2f11'
+down_revision: Union[str, None] = '85dbfa9fea12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox',
+    sa.Column('outbox_id', sa.BigInteger(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('recipient_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('NEW', 'SENT', name='statusoutbox'), server_default='NEW', nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.campaign_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['recipient_id'], ['recipients.recipient_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('outbox_id')
+    )
+    op.create_index('ix_outbox_new', 'outbox', ['outbox_id'], postgresql_where=sa.text("status = 'NEW'"))
+    # Notifications created before the outbox were already published by the campaign worker, no backfill
+    op.execute(
+        '''
+        CREATE OR REPLACE FUNCTION outbox_enqueue() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO outbox (campaign_id, recipient_id)
+            SELECT campaign_id, recipient_id FROM new_rows WHERE status = 'PENDING';
+            RETURN NULL;
+        END
+        $$
+        '''
+    )
+    op.execute(
+        '''
+        CREATE TRIGGER notifications_outbox_insert AFTER INSERT ON notifications
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION outbox_enqueue()
+        '''
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER notifications_outbox_insert ON notifications')
+    op.execute('DROP FUNCTION outbox_enqueue()')
+    op.drop_index('ix_outbox_new', table_name='outbox', postgresql_where=sa.text("status = 'NEW'"))
+    op.drop_table('outbox')
+    sa.Enum(name='statusoutbox').drop(op.get_bind())
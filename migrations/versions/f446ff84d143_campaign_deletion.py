@@ -0,0 +1,33 @@
+"""campaign deletion
+
+Revision ID: f446ff84d143
+Revises: d0bfaaf020fe
+Create Date: 2026-10-18 14:36:08.925114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f446ff84d143'
+down_revision: Union[str, None] = 'd0bfaaf020fe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE statuscampaign ADD VALUE IF NOT EXISTS 'DELETING'")
+    op.execute("ALTER TYPE jobkind ADD VALUE IF NOT EXISTS 'CAMPAIGN_DELETE'")
+    # Batched deletes and ON DELETE CASCADE look outbox rows up by campaign and by recipient
+    with op.get_context().autocommit_block():
+        op.create_index('ix_outbox_campaign_id', 'outbox', ['campaign_id'], postgresql_concurrently=True)
+        op.create_index('ix_outbox_recipient_id', 'outbox', ['recipient_id'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    # Postgres cannot drop enum values, DELETING and CAMPAIGN_DELETE stay unused
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_outbox_recipient_id', table_name='outbox', postgresql_concurrently=True)
+        op.drop_index('ix_outbox_campaign_id', table_name='outbox', postgresql_concurrently=True)
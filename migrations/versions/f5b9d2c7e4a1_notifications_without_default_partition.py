@@ -0,0 +1,79 @@
+"""notifications without default partition
+
+Revision ID: f5b9d2c7e4a1
+Revises: e2c6a9d4f8b3
+Create Date: 2026-10-19 14:06:12.384517
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b9d2c7e4a1'
+down_revision: Union[str, None] = 'e2c6a9d4f8b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BOUNDS = re.compile(r'FROM \((\w+)\) TO \((\w+)\)')
+
+
+def upgrade() -> None:
+    # Rows of campaigns without a range partition live in the default partition. Partitions are created for every
+    # gap between the existing ones and past the last campaign, the rows are moved there and the default partition
+    # is dropped, so partitions can be detached concurrently. Later ones are created ahead by the retention worker.
+    bind = op.get_bind()
+    ranges = []
+    for bounds, in bind.execute(
+        sa.text(
+            '''
+            SELECT pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits AS i JOIN pg_class AS c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'notifications'::regclass
+            '''
+        )
+    ):
+        if match := BOUNDS.search(bounds):
+            ranges.append((0 if match[1] == 'MINVALUE' else int(match[1]), int(match[2])))
+    last_campaign_id = bind.execute(
+        sa.text(
+            '''
+            SELECT greatest(
+                (SELECT coalesce(max(campaign_id), 0) FROM notifications_default),
+                coalesce(pg_sequence_last_value(pg_get_serial_sequence('campaigns', 'campaign_id')), 0)
+            )
+            '''
+        )
+    ).scalar_one()
+    gaps = []
+    upper = 0
+    for lower, next_upper in sorted(ranges):
+        if upper < lower:
+            gaps.append((upper, lower))
+        upper = max(upper, next_upper)
+    if upper <= last_campaign_id:
+        gaps.append((upper, last_campaign_id + 1))
+    for lower, upper in gaps:
+        op.execute(f'CREATE TABLE notifications_p{lower} (LIKE notifications INCLUDING DEFAULTS)')
+        op.execute(
+            f'''
+            WITH moved AS (
+                DELETE FROM notifications_default WHERE campaign_id >= {lower} AND campaign_id < {upper}
+                RETURNING *
+            )
+            INSERT INTO notifications_p{lower} SELECT * FROM moved
+            '''
+        )
+    op.execute('ALTER TABLE notifications DETACH PARTITION notifications_default')
+    op.execute('DROP TABLE notifications_default')
+    for lower, upper in gaps:
+        op.execute(
+            f'ALTER TABLE notifications ATTACH PARTITION notifications_p{lower} FOR VALUES FROM ({lower}) TO ({upper})'
+        )
+
+
+def downgrade() -> None:
+    op.execute('CREATE TABLE notifications_default PARTITION OF notifications DEFAULT')
@@ -0,0 +1,76 @@
+import aio_pika
+import pytest
+from aio_pika.exceptions import DeliveryError
+
+from app.clients.broker_client import Publisher, RabbitMQClient
+from app.exceptions import PublishException
+
+
+@pytest.fixture
+def broker_client_mock(mocker):
+    return mocker.AsyncMock()
+
+
+@pytest.fixture
+async def publish_mock(broker_client_mock):
+    channel = await broker_client_mock.get_channel()
+    return channel.default_exchange.publish
+
+
+@pytest.fixture
+def publisher(broker_client_mock):
+    return Publisher(broker_client_mock, 'email_queue', window=2, max_retries=2, retry_delay=0)
+
+
+def make_messages(count: int) -> list[aio_pika.Message]:
+    return [aio_pika.Message(body=str(i).encode()) for i in range(count)]
+
+
+async def test__publish__queue_declared_once(publisher, broker_client_mock):
+    await publisher.publish(make_messages(1))
+    await publisher.publish(make_messages(1))
+    channel = await broker_client_mock.get_channel()
+
+    assert channel.declare_queue.call_count == 1
+
+
+async def test__publish__messages_published_in_windows(publisher, publish_mock):
+    await publisher.publish(make_messages(5))
+
+    assert publish_mock.call_count == 5
+    assert publisher.stats()['published'] == 5
+
+
+async def test__publish__unconfirmed_messages_published_again(publisher, publish_mock, mocker):
+    publish_mock.side_effect = [mocker.Mock(), DeliveryError(None, None), mocker.Mock()]
+
+    await publisher.publish(make_messages(2))
+
+    assert publish_mock.call_count == 3
+    assert publish_mock.call_args_list[2].args[0] is publish_mock.call_args_list[1].args[0]
+    assert publisher.stats()['retried'] == 1
+
+
+async def test__publish__exception_when_still_unconfirmed_after_retries(publisher, publish_mock):
+    publish_mock.side_effect = ConnectionError
+
+    with pytest.raises(PublishException):
+        await publisher.publish(make_messages(1))
+
+    assert publish_mock.call_count == 3
+    assert publisher.stats()['failed'] == 1
+
+
+async def test__publish__unexpected_errors_not_retried(publisher, publish_mock):
+    publish_mock.side_effect = ValueError
+
+    with pytest.raises(ValueError):
+        await publisher.publish(make_messages(1))
+
+    assert publish_mock.call_count == 1
+
+
+def test__get_publisher__one_publisher_per_queue(mocker):
+    client = RabbitMQClient(mocker.Mock(RMQ_PUBLISH_WINDOW=10, RMQ_PUBLISH_MAX_RETRIES=1, RMQ_PUBLISH_RETRY_DELAY=0))
+
+    assert client.get_publisher('email_queue') is client.get_publisher('email_queue')
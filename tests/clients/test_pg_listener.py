@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from app.clients.pg_listener import PgListener
+from app.ddl import CAMPAIGN_EVENTS_CHANNEL
+from app.models import StatusCampaign, StatusNotification
+from app.schemas import NotificationStatusUpdate
+
+
+@pytest.fixture
+async def listener(test_config):
+    listener = PgListener(test_config.DATABASE_URL, CAMPAIGN_EVENTS_CHANNEL)
+    await listener.connect()
+    yield listener
+    await listener.close()
+
+
+async def test__wait__returns_empty_list_on_timeout(prepare_database, listener):  # noqa: U100
+    assert await listener.wait(timeout=0.1) == []
+
+
+async def test__wait__receives_event_when_campaign_created(
+    prepare_database, listener, campaign_repository, test_session, make_campaign  # noqa: U100
+):
+    campaign = await campaign_repository.add(**make_campaign(), session=test_session)
+    
+    payloads = await listener.wait(timeout=5)
+    
+    assert [json.loads(payload) for payload in payloads] == [{'event': 'created', 'campaign_id': campaign.campaign_id}]
+
+
+async def test__wait__receives_drained_event_when_last_pending_notification_resolved(
+    prepare_database,  # noqa: U100
+    listener,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    recipients = await make_recipient_entities(2)
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    updates = [
+        NotificationStatusUpdate(
+            campaign_id=campaign.campaign_id, recipient_id=recipient.recipient_id, status=StatusNotification.DELIVERED
+        )
+        for recipient in recipients
+    ]
+    
+    await notification_repository.update_statuses(updates[:1], test_session)
+    assert await listener.wait(timeout=0.2) == []
+    await notification_repository.update_statuses(updates[1:], test_session)
+    payloads = await listener.wait(timeout=5)
+    
+    assert [json.loads(payload) for payload in payloads] == [{'event': 'drained', 'campaign_id': campaign.campaign_id}]
@@ -5,22 +5,32 @@ from unittest.mock import patch
 import pytest
 import jwt 
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.pool import NullPool
 from pydantic import EmailStr
 
 from app.config import load_from_env_for_tests
 from app.db import BaseOrm
+from app.cache import UserCache
+from app.utils import PasswordHasher
+from app.security import Scope, ServiceKey, ServiceKeyring, hash_api_key
+from app.container import Container
 from app.repository.campaign import CampaignRepository
 from app.repository.recipient import RecipientRepository
 from app.repository.notification import NotificationRepository
 from app.repository.user import UserRepository
-from app.models import StatusCampaign, CampaignOrm, StatusNotification, NotificationOrm, RecipientOrm, UserOrm
+from app.repository.outbox import OutboxRepository
+from app.repository.job import JobRepository
+from app.repository.partition import create_partitions
+from app.models import (
+    StatusCampaign, CampaignOrm, StatusNotification, NotificationOrm, RecipientOrm, UserOrm, JobKind, StatusJob
+)
 from app.service.campaign import CampaignService 
 from app.service.user import UserService, AuthService
 from app.server import create_app
-from app.schemas import User
-from app.dependencies import get_current_user
+from app.schemas import User, Job
+from app.dependencies import get_current_user, get_current_principal
 
 
 #########################################
@@ -44,9 +54,16 @@ def test_session_maker(engine_test):
 
 
 @pytest.fixture
-async def prepare_database(engine_test):
+def partition_size():
+    return 10
+
+
+@pytest.fixture
+async def prepare_database(engine_test, test_session_maker, partition_size):
     async with engine_test.begin() as conn:
         await conn.run_sync(BaseOrm.metadata.create_all)
+    async with test_session_maker() as session:
+        await create_partitions(partition_size, 10, session)
     yield
     async with engine_test.begin() as conn:
         await conn.run_sync(BaseOrm.metadata.drop_all) 
@@ -59,8 +76,50 @@ async def test_session(test_session_maker):
 
 
 @pytest.fixture
-async def client():
-    async with AsyncClient(transport=ASGITransport(app=create_app()), base_url='http://test') as ac:
+def user_cache():
+    cache = UserCache(max_size=2, ttl=60)
+    cache.watch()
+    yield cache
+    cache.unwatch()
+
+
+@pytest.fixture
+def password_hasher():
+    hasher = PasswordHasher(max_concurrency=2)
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.fixture
+def service_keyring():
+    return ServiceKeyring({
+        'campaign_worker': ServiceKey(key_hash=hash_api_key('campaign-secret'), scopes=[Scope.CAMPAIGNS_LAUNCH]),
+        'email_worker': ServiceKey(key_hash=hash_api_key('email-secret'), scopes=[Scope.NOTIFICATIONS_WRITE]),
+    })
+
+
+@pytest.fixture
+def container(test_config, engine_test, test_session_maker, user_cache, password_hasher, service_keyring):
+    return Container(
+        config=test_config,
+        engine=engine_test,
+        session_maker=test_session_maker,
+        user_cache=user_cache,
+        password_hasher=password_hasher,
+        service_keyring=service_keyring,
+    )
+
+
+@pytest.fixture
+def app(container):
+    app = create_app()
+    app.state.container = container
+    return app
+
+
+@pytest.fixture
+async def client(app):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as ac:
         yield ac
 
 
@@ -74,9 +133,9 @@ def make_user(faker):
 
 
 @pytest.fixture
-async def auth_client(make_user):
-    app = create_app()
+async def auth_client(app, make_user):
     app.dependency_overrides[get_current_user] = make_user
+    app.dependency_overrides[get_current_principal] = make_user
     
     async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as ac:
         yield ac
@@ -110,24 +169,39 @@ def notification_repository():
     return NotificationRepository()
 
 
+@pytest.fixture
+def outbox_repository():
+    return OutboxRepository()
+
+
+@pytest.fixture
+def job_repository():
+    return JobRepository()
+
+
 @pytest.fixture
 def user_repository():
     return UserRepository()
 
 
 @pytest.fixture
-def campaign_service(notification_repository, campaign_repository):
-    return CampaignService(campaign_repository, notification_repository)
+def campaign_service(notification_repository, campaign_repository, job_repository):
+    return CampaignService(campaign_repository, notification_repository, job_repository)
+
+
+@pytest.fixture
+def user_service(user_repository, password_hasher):
+    return UserService(user_repository, password_hasher)
 
 
 @pytest.fixture
-def user_service(user_repository):
-    return UserService(user_repository)
+def auth_service(user_repository, test_config, password_hasher):
+    return AuthService(user_repository, test_config, password_hasher)
 
 
 @pytest.fixture
-def auth_service(user_repository, test_config):
-    return AuthService(user_repository, test_config)
+def cached_auth_service(user_repository, test_config, password_hasher, user_cache):
+    return AuthService(user_repository, test_config, password_hasher, cache=user_cache)
 
 
 @pytest.fixture
@@ -162,6 +236,16 @@ def make_recipient(faker):
     return inner
 
 
+@pytest.fixture
+def make_job():
+    def inner(kind: JobKind = JobKind.CAMPAIGN_DELETE, status: StatusJob = StatusJob.RUNNING) -> Job:
+        return Job(
+            job_id=uuid.uuid4(), kind=kind, status=status, result=None, error=None,
+            created_at=datetime.now(), finished_at=None
+        )
+    return inner
+
+
 @pytest.fixture
 def make_campaign_orm(faker, minute_in_future):
     def inner(
@@ -286,6 +370,37 @@ def random_id(faker):
     return faker.random_int(min=1, max=10000)
 
 
+@pytest.fixture
+def explain_queries(engine_test):
+    """Runs an awaitable and returns the EXPLAIN plans of the statements of the given kinds it issued, SELECT
+    statements by default.
+    
+    Sequential scans are disabled while explaining, so the planner picks an index whenever
+    one is usable and the plans do not depend on the size of the test tables.
+    """
+    async def inner(awaitable, kinds: tuple[str, ...] = ('SELECT',)) -> str:
+        statements = []
+        
+        def capture(conn, cursor, statement, parameters, context, executemany):  # noqa: U100
+            if statement.lstrip().upper().startswith(kinds):
+                statements.append((statement, parameters))
+        
+        event.listen(engine_test.sync_engine, 'before_cursor_execute', capture)
+        try:
+            await awaitable
+        finally:
+            event.remove(engine_test.sync_engine, 'before_cursor_execute', capture)
+        
+        plans = []
+        async with engine_test.connect() as conn:
+            await conn.exec_driver_sql('SET enable_seqscan = off')
+            for statement, parameters in statements:
+                result = await conn.exec_driver_sql(f'EXPLAIN {statement}', parameters)
+                plans.extend(row[0] for row in result)
+        return '\n'.join(plans)
+    return inner
+
+
 #####################################
 # REPOSITORY MOCKS
 #####################################
@@ -317,8 +432,15 @@ def campaign_repo_update_mock(make_campaign_orm):
         
         
 @pytest.fixture
-def campaign_repo_delete_mock():
-    with patch('app.routers.campaign.CampaignRepository.delete') as mock:
+def campaign_service_delete_mock(make_job):
+    with patch('app.routers.campaign.CampaignService.delete') as mock:
+        mock.return_value = make_job()
+        yield mock
+
+
+@pytest.fixture
+def campaign_service_purge_mock():
+    with patch('app.routers.campaign.CampaignService.purge') as mock:
         yield mock
         
         
@@ -331,7 +453,13 @@ def campaign_repo_run_mock():
 @pytest.fixture
 def campaign_repo_acquire_mock(make_campaign_orm):
     with patch('app.routers.campaign.CampaignRepository.acquire') as mock:
-        mock.return_value = make_campaign_orm() 
+        mock.return_value = [make_campaign_orm()]
+        yield mock
+
+
+@pytest.fixture
+def campaign_repo_get_next_launch_date_mock():
+    with patch('app.routers.campaign.CampaignRepository.get_next_launch_date') as mock:
         yield mock
 
 
@@ -348,12 +476,39 @@ def campaign_service_complete_mock():
         yield mock
         
 
+@pytest.fixture
+def notification_repo_add_many_mock():
+    with patch('app.routers.notification.NotificationRepository.add_many') as mock:
+        mock.return_value = 3
+        yield mock
+
+
+@pytest.fixture
+def notification_repo_add_many_returning_mock():
+    with patch('app.routers.notification.NotificationRepository.add_many_returning') as mock:
+        mock.return_value = []
+        yield mock
+        
+
+@pytest.fixture
+def notification_repo_update_statuses_mock():
+    with patch('app.routers.notification.NotificationRepository.update_statuses') as mock:
+        mock.return_value = 2
+        yield mock
+
+
 @pytest.fixture
 def user_repository_add_mock():
     with patch('app.service.user.UserRepository.add') as mock:
         yield mock
 
 
+@pytest.fixture
+def user_repository_get_mock():
+    with patch('app.service.user.UserRepository.get') as mock:
+        yield mock
+
+
 @pytest.fixture
 def user_repository_get_by_email_mock():
     with patch('app.service.user.UserRepository.get_by_email') as mock:
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models import NotificationOrm, OutboxOrm, StatusCampaign, StatusNotification
+
+
+async def make_finished_campaign(make_campaign_entity, make_recipient_entities, make_notification_entities):
+    recipients = await make_recipient_entities(3)
+    campaign = await make_campaign_entity(status=StatusCampaign.DONE)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients[:1])
+    await make_notification_entities(StatusNotification.DELIVERED, campaign.campaign_id, recipients[1:])
+    return campaign
+
+
+async def test__archive__moves_notifications_out_of_hot_table(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    campaign = await make_finished_campaign(make_campaign_entity, make_recipient_entities, make_notification_entities)
+    
+    archived = await campaign_repository.archive(datetime.now() + timedelta(minutes=1), test_session)
+    
+    assert archived.campaign_id == campaign.campaign_id
+    assert archived.archived_at is not None
+    assert (await test_session.scalars(select(NotificationOrm))).all() == []
+    assert (await test_session.scalars(select(OutboxOrm))).all() == []
+
+
+async def test__archive__notifications_still_readable_by_campaign_id(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    campaign = await make_finished_campaign(make_campaign_entity, make_recipient_entities, make_notification_entities)
+    before = [
+        (n.notification_id, n.recipient_id, n.status)
+        for n in await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    ]
+    
+    await campaign_repository.archive(datetime.now() + timedelta(minutes=1), test_session)
+    after = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    
+    assert sorted((n.notification_id, n.recipient_id, n.status) for n in after) == sorted(before)
+
+
+async def test__archive__delivery_counters_kept(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    campaign = await make_finished_campaign(make_campaign_entity, make_recipient_entities, make_notification_entities)
+    
+    await campaign_repository.archive(datetime.now() + timedelta(minutes=1), test_session)
+    stats = await campaign_repository.get_stats(campaign.campaign_id, test_session)
+    
+    assert stats.delivered == 2
+
+
+async def test__archive__skips_recently_finished_campaigns(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    await make_finished_campaign(make_campaign_entity, make_recipient_entities, make_notification_entities)
+    
+    assert await campaign_repository.archive(datetime.now() - timedelta(days=1), test_session) is None
+
+
+async def test__archive__skips_campaigns_that_are_not_done(
+    prepare_database, campaign_repository, test_session, make_campaign_entity  # noqa: U100
+):
+    await make_campaign_entity(status=StatusCampaign.RUNNING)
+    
+    assert await campaign_repository.archive(datetime.now() + timedelta(minutes=1), test_session) is None
+
+
+async def test__stream_by_campaign_id__streams_archived_notifications_in_order(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    campaign = await make_finished_campaign(make_campaign_entity, make_recipient_entities, make_notification_entities)
+    before = [
+        (n.notification_id, n.recipient_id, n.status)
+        async for n in notification_repository.stream_by_campaign_id(campaign.campaign_id, test_session)
+    ]
+    
+    await campaign_repository.archive(datetime.now() + timedelta(minutes=1), test_session)
+    after = [
+        (n.notification_id, n.recipient_id, n.status)
+        async for n in notification_repository.stream_by_campaign_id(campaign.campaign_id, test_session)
+    ]
+    
+    assert after == before
+
+
+async def test__get_notifications_by_campaign_id__pages_archived_notifications(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    campaign = await make_finished_campaign(make_campaign_entity, make_recipient_entities, make_notification_entities)
+    before = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    expected = [(n.notification_id, n.recipient_id, n.status) for n in before[1:3]]
+    
+    await campaign_repository.archive(datetime.now() + timedelta(minutes=1), test_session)
+    page = await notification_repository.get_notifications_by_campaign_id(
+        campaign.campaign_id, test_session, limit=2, offset=1
+    )
+    
+    assert [(n.notification_id, n.recipient_id, n.status) for n in page] == expected
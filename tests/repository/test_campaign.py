@@ -1,8 +1,12 @@
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 import random
 
-from app.models import CampaignOrm, StatusCampaign, StatusNotification
+from sqlalchemy import select
+
+from app.models import CampaignChunkOrm, CampaignOrm, StatusCampaign, StatusChunk, StatusNotification
+from app.schemas import Segment
 from app.exceptions import ConflictException, NotFoundException, NoAvailableCampaignsException
 
 
@@ -198,10 +202,10 @@ async def test__acquire__get_campaign_when_launch_date_arrives(
 ):
     await make_campaign_entity(launch_date=minute_in_past)
 
-    campaign = await campaign_repository.acquire(test_session)
+    campaigns = await campaign_repository.acquire(test_session)
     
-    assert campaign is not None
-    assert campaign.launch_date < datetime.now()
+    assert len(campaigns) == 1
+    assert campaigns[0].launch_date < datetime.now()
 
 
 async def test__acquire__status_changed_to_running(
@@ -209,7 +213,7 @@ async def test__acquire__status_changed_to_running(
 ): 
     await make_campaign_entity(launch_date=minute_in_past, status=StatusCampaign.CREATED)
     
-    running_campaign = await campaign_repository.acquire(test_session)
+    [running_campaign] = await campaign_repository.acquire(test_session)
 
     assert running_campaign.status == StatusCampaign.RUNNING
 
@@ -245,6 +249,65 @@ async def test__acquire__exception_when_launch_date_in_future(
         await campaign_repository.acquire(test_session)
 
 
+async def test__acquire__returns_oldest_launch_date_first(
+    prepare_database, campaign_repository, test_session, make_campaign_entity  # noqa: U100
+):
+    await make_campaign_entity(launch_date=datetime.now() - timedelta(minutes=1))
+    oldest = await make_campaign_entity(launch_date=datetime.now() - timedelta(hours=1))
+    
+    [campaign] = await campaign_repository.acquire(test_session)
+    
+    assert campaign.campaign_id == oldest.campaign_id
+
+
+async def test__acquire__returns_at_most_batch_size_campaigns(
+    prepare_database, campaign_repository, test_session, make_campaign_entity, minute_in_past  # noqa: U100
+):
+    for _ in range(3):
+        await make_campaign_entity(launch_date=minute_in_past)
+    
+    campaigns = await campaign_repository.acquire(test_session, batch_size=2)
+    
+    assert len(campaigns) == 2
+
+
+async def test__acquire__skips_campaigns_locked_by_another_transaction(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    test_session_maker,
+    make_campaign_entity,
+):
+    locked = await make_campaign_entity(launch_date=datetime.now() - timedelta(hours=1))
+    free = await make_campaign_entity(launch_date=datetime.now() - timedelta(minutes=1))
+    
+    async with test_session_maker() as other_session:
+        await other_session.execute(
+            select(CampaignOrm).where(CampaignOrm.campaign_id == locked.campaign_id).with_for_update()
+        )
+        campaigns = await asyncio.wait_for(campaign_repository.acquire(test_session, batch_size=2), timeout=5)
+    
+    assert [campaign.campaign_id for campaign in campaigns] == [free.campaign_id]
+
+
+async def test__get_next_launch_date__returns_earliest_future_launch(
+    prepare_database, campaign_repository, test_session, make_campaign_entity  # noqa: U100
+):
+    await make_campaign_entity(launch_date=datetime.now() - timedelta(minutes=1))
+    await make_campaign_entity(launch_date=datetime.now() + timedelta(hours=2))
+    earliest = await make_campaign_entity(launch_date=datetime.now() + timedelta(hours=1))
+    
+    assert await campaign_repository.get_next_launch_date(test_session) == earliest.launch_date
+
+
+async def test__get_next_launch_date__none_when_nothing_scheduled(
+    prepare_database, campaign_repository, test_session, make_campaign_entity, minute_in_future  # noqa: U100
+):
+    await make_campaign_entity(launch_date=minute_in_future, status=StatusCampaign.RUNNING)
+    
+    assert await campaign_repository.get_next_launch_date(test_session) is None
+
+
 async def test__complete__when_campaign_not_found_returns_none(
     prepare_database, test_session, campaign_repository  # noqa: U100
 ):
@@ -306,3 +369,368 @@ async def test__complete__returns_none_when_campaign_has_pending_notifications(
     completed_campaign = await campaign_repository.complete(test_session)
     
     assert completed_campaign is None
+
+
+async def test__acquire__notifications_not_created_by_default(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    minute_in_past
+):
+    await make_recipient_entities(3)
+    await make_campaign_entity(launch_date=minute_in_past)
+    
+    [campaign] = await campaign_repository.acquire(test_session)
+    
+    assert await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session) == []
+    assert campaign.fanout_pending is True
+
+
+async def test__acquire__materialize_creates_pending_notification_for_every_recipient(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    minute_in_past
+):
+    recipients = await make_recipient_entities(3)
+    await make_campaign_entity(launch_date=minute_in_past)
+    
+    [campaign] = await campaign_repository.acquire(test_session, materialize=True)
+    notifications = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    
+    assert sorted(n.recipient_id for n in notifications) == sorted(r.recipient_id for r in recipients)
+    assert {n.status for n in notifications} == {StatusNotification.PENDING}
+
+
+async def test__materialize__skips_existing_notifications(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities
+):
+    recipients = await make_recipient_entities(3)
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    await make_notification_entities(StatusNotification.DELIVERED, campaign.campaign_id, recipients[:1])
+    
+    created = await campaign_repository.materialize(campaign.campaign_id, test_session)
+    
+    assert created == 2
+
+
+@pytest.mark.parametrize(
+    'segment, expected',
+    [
+        (Segment(min_age=30, max_age=50), {'ann@example.com', 'bob@corp.io'}),
+        (Segment(email_domains=['EXAMPLE.com']), {'ann@example.com', 'kid@example.com'}),
+        (Segment(tags=['vip', 'beta']), {'bob@corp.io', 'kid@example.com'}),
+        (Segment(min_age=30, email_domains=['example.com']), {'ann@example.com'}),
+        (Segment(), {'ann@example.com', 'bob@corp.io', 'kid@example.com'}),
+    ]
+)
+async def test__materialize__only_recipients_of_campaign_segment(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    recipient_repository,
+    notification_repository,
+    test_session,
+    make_campaign,
+    segment,
+    expected,
+):
+    emails = {}
+    for name, age, email, tags in [
+        ('Ann', 40, 'ann@example.com', []),
+        ('Bob', 35, 'bob@corp.io', ['vip']),
+        ('Kid', 12, 'kid@example.com', ['beta']),
+    ]:
+        recipient = await recipient_repository.add(name, 'Smith', age, email, test_session, tags=tags)
+        emails[recipient.recipient_id] = email
+    campaign = await campaign_repository.add(**make_campaign(), session=test_session, segment=segment)
+    
+    await campaign_repository.materialize(campaign.campaign_id, test_session)
+    notifications = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    
+    assert {emails[n.recipient_id] for n in notifications} == expected
+
+
+async def test__materialize__explicit_recipient_ids(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign,
+    make_recipient_entities,
+):
+    recipients = await make_recipient_entities(3)
+    segment = Segment(recipient_ids=[recipients[0].recipient_id, recipients[2].recipient_id])
+    campaign = await campaign_repository.add(**make_campaign(), session=test_session, segment=segment)
+    
+    await campaign_repository.materialize(campaign.campaign_id, test_session)
+    notifications = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    
+    assert sorted(n.recipient_id for n in notifications) == sorted(segment.recipient_ids)
+
+
+async def test__fanout__creates_notifications_page_by_page(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    minute_in_past
+):
+    recipients = await make_recipient_entities(5)
+    await make_campaign_entity(launch_date=minute_in_past)
+    [campaign] = await campaign_repository.acquire(test_session)
+    
+    pages = []
+    while page := await campaign_repository.fanout(2, 'worker', test_session):
+        pages.append(page[1])
+    notifications = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    
+    assert pages == [2, 2, 1]
+    assert sorted(n.recipient_id for n in notifications) == sorted(r.recipient_id for r in recipients)
+    assert campaign.fanout_pending is False
+
+
+async def test__has_pending_fanout__false_once_campaign_fanned_out(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    minute_in_past
+):
+    await make_recipient_entities(3)
+    await make_campaign_entity(launch_date=minute_in_past)
+    await campaign_repository.acquire(test_session)
+    
+    pending = [await campaign_repository.has_pending_fanout(test_session)]
+    await campaign_repository.fanout(10, 'worker', test_session)
+    pending.append(await campaign_repository.has_pending_fanout(test_session))
+    
+    assert pending == [True, False]
+
+
+async def test__fanout__resumes_from_cursor_without_duplicates(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+    minute_in_past
+):
+    recipients = await make_recipient_entities(4)
+    await make_campaign_entity(launch_date=minute_in_past)
+    [campaign] = await campaign_repository.acquire(test_session)
+    await campaign_repository.fanout(2, 'worker', test_session)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients[3:])
+    
+    _, created = await campaign_repository.fanout(2, 'worker', test_session)
+    
+    chunk = await test_session.scalar(select(CampaignChunkOrm).where(CampaignChunkOrm.campaign_id == campaign.campaign_id))
+    
+    assert created == 1
+    assert chunk.cursor == recipients[3].recipient_id
+
+
+async def test__complete__skips_campaign_with_pending_fanout(
+    prepare_database, campaign_repository, test_session, make_campaign_entity  # noqa: U100
+):
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    campaign.fanout_pending = True
+    await test_session.commit()
+    
+    assert await campaign_repository.complete(test_session) is None
+
+
+async def test__count_in_flight__stops_at_limit(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities
+):
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, await make_recipient_entities(3))
+    
+    assert await campaign_repository.count_in_flight(2, test_session) == 2
+    assert await campaign_repository.count_in_flight(10, test_session) == 3
+
+
+async def test__fanout__rotates_pages_between_running_campaigns(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    minute_in_past
+):
+    await make_recipient_entities(4)
+    await make_campaign_entity(launch_date=minute_in_past)
+    await make_campaign_entity(launch_date=minute_in_past)
+    await campaign_repository.acquire(test_session, batch_size=2)
+    
+    campaign_ids = [(await campaign_repository.fanout(1, 'worker', test_session))[0].campaign_id for _ in range(4)]
+    
+    assert campaign_ids[0] != campaign_ids[1]
+    assert campaign_ids[2:] == campaign_ids[:2]
+
+
+async def test__fanout__workers_keep_their_chunks_and_skip_leased_ones(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    minute_in_past
+):
+    await make_recipient_entities(4)
+    await make_campaign_entity(launch_date=minute_in_past)
+    await make_campaign_entity(launch_date=minute_in_past)
+    await campaign_repository.acquire(test_session, batch_size=2)
+    
+    campaign_ids = [
+        (await campaign_repository.fanout(1, worker_id, test_session))[0].campaign_id
+        for worker_id in ['first', 'second', 'first', 'second']
+    ]
+    
+    assert campaign_ids[0] != campaign_ids[1]
+    assert campaign_ids[2:] == campaign_ids[:2]
+    assert await campaign_repository.fanout(1, 'third', test_session) is None
+
+
+async def get_chunks(campaign_id: int, session) -> list[CampaignChunkOrm]:
+    query = select(CampaignChunkOrm).where(CampaignChunkOrm.campaign_id == campaign_id).order_by(CampaignChunkOrm.lower_id)
+    return list((await session.scalars(query.execution_options(populate_existing=True))).all())
+
+
+async def test__split__chunks_cover_recipient_ids_with_open_ended_last_chunk(
+    prepare_database, campaign_repository, test_session, make_campaign_entity, make_recipient_entities  # noqa: U100
+):
+    recipients = await make_recipient_entities(5)
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    
+    await campaign_repository.split(campaign, test_session, chunk_size=2)
+    await test_session.commit()
+    chunks = await get_chunks(campaign.campaign_id, test_session)
+    
+    first_id = recipients[0].recipient_id
+    assert [(chunk.lower_id, chunk.upper_id) for chunk in chunks] == [
+        (0, first_id + 2), (first_id + 2, first_id + 4), (first_id + 4, None)
+    ]
+    assert campaign.fanout_pending is True
+
+
+async def test__fanout__chunks_of_one_campaign_fanned_out_in_parallel(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    test_session_maker,
+    make_campaign_entity,
+    make_recipient_entities,
+):
+    recipients = await make_recipient_entities(4)
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    await campaign_repository.split(campaign, test_session, chunk_size=2)
+    await test_session.commit()
+    [locked, *_] = await get_chunks(campaign.campaign_id, test_session)
+    
+    async with test_session_maker() as other_session:
+        await other_session.execute(
+            select(CampaignChunkOrm).where(CampaignChunkOrm.chunk_id == locked.chunk_id).with_for_update()
+        )
+        while await asyncio.wait_for(campaign_repository.fanout(10, 'worker', test_session), timeout=5):
+            pass
+    notifications = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    
+    assert sorted(n.recipient_id for n in notifications) == sorted(r.recipient_id for r in recipients[2:])
+    assert [chunk.status for chunk in await get_chunks(campaign.campaign_id, test_session)] == [
+        StatusChunk.PENDING, StatusChunk.DONE
+    ]
+    assert campaign.fanout_pending is True
+
+
+async def test__fanout__campaign_fanned_out_once_every_chunk_is_done(
+    prepare_database, campaign_repository, test_session, make_campaign_entity, make_recipient_entities  # noqa: U100
+):
+    await make_recipient_entities(5)
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    await campaign_repository.split(campaign, test_session, chunk_size=2)
+    await test_session.commit()
+    
+    pending = []
+    while page := await campaign_repository.fanout(10, 'worker', test_session):
+        pending.append(page[0].fanout_pending)
+    
+    assert pending == [True, True, False]
+
+
+async def lease_chunk(campaign_repository, test_session, make_campaign_entity, make_recipient_entities):
+    recipients = await make_recipient_entities(4)
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    await campaign_repository.split(campaign, test_session)
+    await test_session.commit()
+    await campaign_repository.fanout(2, 'crashed', test_session)
+    [chunk] = await get_chunks(campaign.campaign_id, test_session)
+    return recipients, chunk
+
+
+async def test__fanout__expired_lease_resumed_from_cursor_by_another_worker(
+    prepare_database, campaign_repository, test_session, make_campaign_entity, make_recipient_entities  # noqa: U100
+):
+    recipients, chunk = await lease_chunk(
+        campaign_repository, test_session, make_campaign_entity, make_recipient_entities
+    )
+    assert await campaign_repository.fanout(2, 'other', test_session) is None
+    chunk.lease_expires_at = datetime.now() - timedelta(seconds=1)
+    await test_session.commit()
+    
+    _, created = await campaign_repository.fanout(2, 'other', test_session)
+    
+    assert created == 2
+    assert chunk.leased_by == 'other'
+    assert chunk.cursor == recipients[3].recipient_id
+
+
+async def test__heartbeat__extends_leases_of_worker(
+    prepare_database, campaign_repository, test_session, make_campaign_entity, make_recipient_entities  # noqa: U100
+):
+    _, chunk = await lease_chunk(campaign_repository, test_session, make_campaign_entity, make_recipient_entities)
+    expires_at = chunk.lease_expires_at
+    
+    assert await campaign_repository.heartbeat('other', test_session) == 0
+    assert await campaign_repository.heartbeat('crashed', test_session, lease_ttl=60) == 1
+    [chunk] = await get_chunks(chunk.campaign_id, test_session)
+    assert chunk.lease_expires_at > expires_at
+
+
+async def test__run__conflict_when_campaign_is_being_deleted(
+    prepare_database, campaign_repository, test_session, make_campaign_entity  # noqa: U100
+):
+    campaign = await make_campaign_entity(status=StatusCampaign.DELETING)
+    
+    with pytest.raises(ConflictException):
+        await campaign_repository.run(campaign.campaign_id, test_session)
+
+
+async def test__run__conflict_when_campaign_is_being_fanned_out(
+    prepare_database, campaign_repository, test_session, make_campaign_entity  # noqa: U100
+):
+    campaign = await make_campaign_entity(status=StatusCampaign.CREATED)
+    await campaign_repository.run(campaign.campaign_id, test_session)
+    
+    with pytest.raises(ConflictException):
+        await campaign_repository.run(campaign.campaign_id, test_session)
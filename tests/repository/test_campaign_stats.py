@@ -0,0 +1,98 @@
+from app.models import StatusCampaign, StatusNotification, NotificationOrm
+from app.schemas import NotificationStatusUpdate
+
+
+async def test__get_stats__zero_counters_when_campaign_has_no_notifications(
+    prepare_database, campaign_repository, test_session, make_campaign_entity  # noqa: U100
+):
+    campaign = await make_campaign_entity()
+    
+    stats = await campaign_repository.get_stats(campaign.campaign_id, test_session)
+    
+    assert (stats.pending, stats.sent, stats.delivered, stats.undelivered) == (0, 0, 0, 0)
+
+
+async def test__stats__counted_when_notifications_created_in_bulk(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(4)
+    
+    await notification_repository.add_many(campaign.campaign_id, [r.recipient_id for r in recipients], test_session)
+    stats = await campaign_repository.get_stats(campaign.campaign_id, test_session)
+    
+    assert stats.pending == 4
+
+
+async def test__stats__moved_between_counters_when_statuses_updated(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(3)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    
+    await notification_repository.update_statuses([
+        NotificationStatusUpdate(
+            campaign_id=campaign.campaign_id, recipient_id=recipients[0].recipient_id, status=StatusNotification.DELIVERED
+        ),
+        NotificationStatusUpdate(
+            campaign_id=campaign.campaign_id, recipient_id=recipients[1].recipient_id, status=StatusNotification.UNDELIVERED
+        ),
+    ], test_session)
+    stats = await campaign_repository.get_stats(campaign.campaign_id, test_session)
+    await test_session.refresh(stats)
+    
+    assert (stats.pending, stats.delivered, stats.undelivered) == (1, 1, 1)
+    
+    
+async def test__stats__pending_decremented_when_notification_deleted(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(2)
+    notifications = await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    
+    await test_session.delete(
+        await test_session.get(NotificationOrm, (notifications[0].notification_id, notifications[0].campaign_id))
+    )
+    await test_session.commit()
+    stats = await campaign_repository.get_stats(campaign.campaign_id, test_session)
+    
+    assert stats.pending == 1
+
+
+async def test__complete__campaign_completed_when_last_pending_resolved(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities
+):
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    recipients = await make_recipient_entities(1)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    
+    await notification_repository.run(
+        campaign.campaign_id, recipients[0].recipient_id, StatusNotification.DELIVERED, test_session
+    )
+    completed_campaign = await campaign_repository.complete(test_session)
+    
+    assert completed_campaign.campaign_id == campaign.campaign_id
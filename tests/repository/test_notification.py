@@ -1,4 +1,8 @@
+import pytest
+
 from app.models import StatusNotification
+from app.exceptions import ConflictException
+from app.schemas import NotificationStatusUpdate
 
 
 async def test___get_notifications_by_campaign_id__returns_empty_list_when_no_notifications(
@@ -24,3 +28,107 @@ async def test__get_notifications_by_campaign_id__returns_only_notifications_for
     notifications = await notification_repository.get_notifications_by_campaign_id(campaign_id=first_campaign.campaign_id, session=test_session)
     
     assert len(notifications) == 5
+
+
+async def test__add_many__returns_count_of_created_notifications(
+    prepare_database,  # noqa: U100
+    test_session,
+    notification_repository,
+    make_campaign_entity,
+    make_recipient_entities
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(5)
+    
+    created = await notification_repository.add_many(
+        campaign.campaign_id, [recipient.recipient_id for recipient in recipients], test_session
+    )
+    
+    assert created == 5
+    
+
+async def test__add_many__notifications_created_with_status_pending(
+    prepare_database,  # noqa: U100
+    test_session,
+    notification_repository,
+    make_campaign_entity,
+    make_recipient_entities
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(3)
+    
+    await notification_repository.add_many(
+        campaign.campaign_id, [recipient.recipient_id for recipient in recipients], test_session
+    )
+    notifications = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    
+    assert {notification.status for notification in notifications} == {StatusNotification.PENDING}
+    
+    
+async def test__add_many__exception_when_notification_already_exists(
+    prepare_database,  # noqa: U100
+    test_session,
+    notification_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(2)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients[:1])
+    
+    with pytest.raises(ConflictException):
+        await notification_repository.add_many(
+            campaign.campaign_id, [recipient.recipient_id for recipient in recipients], test_session
+        )
+
+
+async def test__add_many_returning__returns_created_notifications(
+    prepare_database,  # noqa: U100
+    test_session,
+    notification_repository,
+    make_campaign_entity,
+    make_recipient_entities
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(4)
+    
+    notifications = await notification_repository.add_many_returning(
+        campaign.campaign_id, [recipient.recipient_id for recipient in recipients], test_session
+    )
+    
+    assert sorted(notification.recipient_id for notification in notifications) == sorted(
+        recipient.recipient_id for recipient in recipients
+    )
+
+
+async def test__update_statuses__applies_status_of_each_update(
+    prepare_database,  # noqa: U100
+    test_session,
+    notification_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(3)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    updates = [
+        NotificationStatusUpdate(
+            campaign_id=campaign.campaign_id, recipient_id=recipients[0].recipient_id, status=StatusNotification.DELIVERED
+        ),
+        NotificationStatusUpdate(
+            campaign_id=campaign.campaign_id, recipient_id=recipients[1].recipient_id, status=StatusNotification.UNDELIVERED
+        ),
+    ]
+    
+    updated = await notification_repository.update_statuses(updates, test_session)
+    notifications = await notification_repository.get_notifications_by_campaign_id(campaign.campaign_id, test_session)
+    statuses = {n.recipient_id: n.status for n in notifications}
+    
+    assert updated == 2
+    assert statuses == {
+        recipients[0].recipient_id: StatusNotification.DELIVERED,
+        recipients[1].recipient_id: StatusNotification.UNDELIVERED,
+        recipients[2].recipient_id: StatusNotification.PENDING,
+    }
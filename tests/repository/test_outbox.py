@@ -0,0 +1,115 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app.models import OutboxOrm, StatusCampaign, StatusNotification, StatusOutbox
+
+
+async def get_outbox(session) -> list[OutboxOrm]:
+    result = await session.execute(select(OutboxOrm).order_by(OutboxOrm.outbox_id))
+    return list(result.scalars().all())
+
+
+async def test__materialize__enqueues_message_for_every_notification(
+    prepare_database,  # noqa: U100
+    campaign_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+):
+    recipients = await make_recipient_entities(3)
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    
+    await campaign_repository.materialize(campaign.campaign_id, test_session)
+    await test_session.commit()
+    outbox = await get_outbox(test_session)
+    
+    assert sorted(entry.recipient_id for entry in outbox) == sorted(r.recipient_id for r in recipients)
+    assert {entry.status for entry in outbox} == {StatusOutbox.NEW}
+
+
+async def test__add_many__enqueues_messages_in_same_transaction(
+    prepare_database,  # noqa: U100
+    notification_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+):
+    recipients = await make_recipient_entities(3)
+    campaign = await make_campaign_entity()
+    
+    await notification_repository.add_many(campaign.campaign_id, [r.recipient_id for r in recipients], test_session)
+    
+    assert len(await get_outbox(test_session)) == 3
+
+
+async def test__outbox__not_enqueued_for_resolved_notifications(
+    prepare_database,  # noqa: U100
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    recipients = await make_recipient_entities(2)
+    campaign = await make_campaign_entity()
+    
+    await make_notification_entities(StatusNotification.DELIVERED, campaign.campaign_id, recipients)
+    
+    assert await get_outbox(test_session) == []
+
+
+async def test__claim__returns_messages_with_campaign_and_recipient(
+    prepare_database,  # noqa: U100
+    outbox_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    [recipient] = await make_recipient_entities(1)
+    campaign = await make_campaign_entity()
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, [recipient])
+    
+    [entry] = await outbox_repository.claim(test_session, limit=10)
+    
+    assert entry.campaign.name == campaign.name
+    assert entry.recipient.contact_email == recipient.contact_email
+
+
+async def test__claim__skips_messages_locked_by_another_relay(
+    prepare_database,  # noqa: U100
+    outbox_repository,
+    test_session,
+    test_session_maker,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    recipients = await make_recipient_entities(4)
+    campaign = await make_campaign_entity()
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    
+    async with test_session_maker() as other_session:
+        claimed = await outbox_repository.claim(other_session, limit=3)
+        others = await asyncio.wait_for(outbox_repository.claim(test_session, limit=3), timeout=5)
+    
+    assert len(others) == 1
+    assert others[0].outbox_id not in {entry.outbox_id for entry in claimed}
+
+
+async def test__mark_sent__messages_are_not_claimed_again(
+    prepare_database,  # noqa: U100
+    outbox_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    recipients = await make_recipient_entities(2)
+    campaign = await make_campaign_entity()
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    
+    entries = await outbox_repository.claim(test_session, limit=10)
+    await outbox_repository.mark_sent([entry.outbox_id for entry in entries], test_session)
+    
+    assert await outbox_repository.claim(test_session, limit=10) == []
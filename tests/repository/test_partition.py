@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text
+
+from app.exceptions import PartitionUnavailableException
+from app.models import NotificationOrm, StatusCampaign, StatusNotification
+from app.repository.partition import create_partitions, find_partition, get_partitions, is_finished, retire_partitions
+
+
+async def count_rows(table: str, session) -> int:
+    return await session.scalar(text(f'SELECT count(*) FROM {table}'))
+
+
+async def test__create_partitions__notifications_land_in_precreated_partition(
+    prepare_database,  # noqa: U100
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(2)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+
+    partition = find_partition(await get_partitions(test_session), campaign.campaign_id)
+
+    assert await count_rows(partition.name, test_session) == 2
+    assert 'notifications_default' not in [p.name for p in await get_partitions(test_session)]
+
+
+async def test__create_partitions__keeps_ahead_of_last_campaign(
+    prepare_database, test_session, partition_size  # noqa: U100
+):
+    assert await create_partitions(partition_size, 2, test_session) == []
+    await test_session.execute(text("SELECT setval(pg_get_serial_sequence('campaigns', 'campaign_id'), 125)"))
+
+    created = await create_partitions(partition_size, 2, test_session)
+
+    assert [(p.lower, p.upper) for p in created] == [(110, 120), (120, 130), (130, 140), (140, 150)]
+    assert len(await get_partitions(test_session)) == 15
+
+
+async def test__is_finished__false_while_range_has_unarchived_campaigns(
+    prepare_database, test_session, make_campaign_entity, partition_size  # noqa: U100
+):
+    campaigns = [await make_campaign_entity(status=StatusCampaign.DONE) for _ in range(partition_size)]
+    partition = find_partition(await get_partitions(test_session), campaigns[0].campaign_id)
+
+    assert await is_finished(partition, test_session) is False
+
+
+async def test__retire_partitions__drops_partition_of_fully_archived_range(
+    prepare_database,  # noqa: U100
+    test_session,
+    test_session_maker,
+    campaign_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+    partition_size,
+):
+    await make_recipient_entities(2)
+    campaigns = [await make_campaign_entity(status=StatusCampaign.DONE) for _ in range(partition_size)]
+    for campaign in campaigns:
+        await campaign_repository.materialize(campaign.campaign_id, test_session)
+    await test_session.commit()
+    partition = find_partition(await get_partitions(test_session), campaigns[0].campaign_id)
+    while await campaign_repository.archive(datetime.now() + timedelta(minutes=1), test_session):
+        pass
+    assert await count_rows(partition.name, test_session) == 2
+    await test_session.commit()
+
+    async with test_session_maker() as session:
+        retired = await retire_partitions(session)
+
+    assert retired == [partition.name]
+    assert partition not in await get_partitions(test_session)
+    assert (await test_session.scalars(select(NotificationOrm))).all() == []
+
+
+async def test__retire_partitions__drops_partitions_of_deleted_campaigns(
+    prepare_database,  # noqa: U100
+    test_session,
+    test_session_maker,
+    campaign_repository,
+    make_campaign_entity,
+    partition_size,
+):
+    campaigns = [await make_campaign_entity() for _ in range(partition_size)]
+    partition = find_partition(await get_partitions(test_session), campaigns[0].campaign_id)
+    for campaign in campaigns:
+        await campaign_repository.delete(campaign.campaign_id, test_session)
+
+    async with test_session_maker() as session:
+        assert await retire_partitions(session) == [partition.name]
+
+
+async def make_uncovered_campaign(test_session, make_campaign_entity):
+    await test_session.execute(text("SELECT setval(pg_get_serial_sequence('campaigns', 'campaign_id'), 500)"))
+    await test_session.commit()
+    return await make_campaign_entity()
+
+
+@pytest.mark.parametrize('method', ['add_many', 'add_many_returning'])
+async def test__partition_required__uncovered_campaign_raises_retryable_error(
+    prepare_database,  # noqa: U100
+    test_session,
+    notification_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+    method,
+):
+    recipients = await make_recipient_entities(2)
+    campaign = await make_uncovered_campaign(test_session, make_campaign_entity)
+    
+    with pytest.raises(PartitionUnavailableException) as error:
+        await getattr(notification_repository, method)(
+            campaign.campaign_id, [r.recipient_id for r in recipients], test_session
+        )
+    
+    assert error.value.status_code == 503
+
+
+async def test__partition_required__materialize_of_uncovered_campaign_raises_retryable_error(
+    prepare_database,  # noqa: U100
+    test_session,
+    campaign_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+):
+    await make_recipient_entities(2)
+    campaign = await make_uncovered_campaign(test_session, make_campaign_entity)
+    
+    with pytest.raises(PartitionUnavailableException):
+        await campaign_repository.materialize(campaign.campaign_id, test_session)
@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import select
+
+from app.models import StatusCampaign, StatusNotification, RecipientOrm
+from app.repository.recipient import segment_filter
+from app.schemas import Segment
+
+
+async def test__run__uses_campaign_recipient_index(
+    prepare_database,  # noqa: U100
+    test_session,
+    notification_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+    explain_queries,
+    partition_size
+):
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    recipients = await make_recipient_entities(3)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    
+    plan = await explain_queries(
+        notification_repository.run(
+            campaign.campaign_id, recipients[0].recipient_id, StatusNotification.DELIVERED, test_session
+        )
+    )
+    
+    assert f'notifications_p{campaign.campaign_id // partition_size * partition_size}_campaign_id_recipient_id_idx' in plan
+
+
+async def test__run__prunes_other_campaign_partitions(
+    prepare_database,  # noqa: U100
+    test_session,
+    campaign_repository,
+    notification_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+    explain_queries,
+    partition_size
+):
+    campaigns = [await make_campaign_entity(status=StatusCampaign.RUNNING) for _ in range(partition_size + 1)]
+    recipients = await make_recipient_entities(3)
+    for campaign in (campaigns[0], campaigns[-1]):
+        await campaign_repository.materialize(campaign.campaign_id, test_session)
+    await test_session.commit()
+    
+    plan = await explain_queries(
+        notification_repository.run(
+            campaigns[0].campaign_id, recipients[0].recipient_id, StatusNotification.DELIVERED, test_session
+        )
+    )
+    
+    assert f'notifications_p{campaigns[0].campaign_id // partition_size * partition_size}' in plan
+    assert f'notifications_p{campaigns[-1].campaign_id // partition_size * partition_size}' not in plan
+
+
+async def test__delete_notifications__prunes_other_campaign_partitions(
+    prepare_database,  # noqa: U100
+    test_session,
+    campaign_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+    explain_queries,
+    partition_size
+):
+    campaigns = [await make_campaign_entity(status=StatusCampaign.RUNNING) for _ in range(partition_size + 1)]
+    await make_recipient_entities(3)
+    for campaign in (campaigns[0], campaigns[-1]):
+        await campaign_repository.materialize(campaign.campaign_id, test_session)
+    await test_session.commit()
+    first, last = campaigns[0].campaign_id, campaigns[-1].campaign_id
+    
+    plan = await explain_queries(
+        campaign_repository.delete_notifications(first, 2, test_session), kinds=('DELETE',)
+    )
+    await test_session.rollback()
+    
+    assert f'notifications_p{first // partition_size * partition_size}' in plan
+    assert f'notifications_p{last // partition_size * partition_size}' not in plan
+
+
+async def test__complete__does_not_scan_notifications(
+    prepare_database,  # noqa: U100
+    test_session,
+    campaign_repository,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+    explain_queries
+):
+    campaign = await make_campaign_entity(status=StatusCampaign.RUNNING)
+    recipients = await make_recipient_entities(3)
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    
+    plan = await explain_queries(campaign_repository.complete(test_session))
+    
+    assert 'campaign_stats' in plan
+    assert 'notifications' not in plan
+
+
+async def test__acquire__uses_created_launch_date_partial_index(
+    prepare_database,  # noqa: U100
+    test_session,
+    campaign_repository,
+    make_campaign_entity,
+    minute_in_past,
+    explain_queries
+):
+    await make_campaign_entity(launch_date=minute_in_past)
+    
+    plan = await explain_queries(campaign_repository.acquire(test_session))
+    
+    assert 'ix_campaigns_launch_date_created' in plan
+
+
+@pytest.mark.parametrize(
+    'segment, index',
+    [
+        (Segment(min_age=18, max_age=30), 'ix_recipients_age'),
+        (Segment(email_domains=['Example.com']), 'ix_recipients_email_domain'),
+        (Segment(tags=['vip']), 'ix_recipients_tags'),
+    ]
+)
+async def test__segment_filter__uses_recipient_indexes(
+    prepare_database, test_session, make_recipient_entities, explain_queries, segment, index  # noqa: U100
+):
+    await make_recipient_entities(3)
+    
+    plan = await explain_queries(test_session.execute(select(RecipientOrm.recipient_id).where(*segment_filter(segment))))
+    
+    assert index in plan
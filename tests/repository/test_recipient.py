@@ -1,7 +1,10 @@
 import pytest
 
-from app.models import RecipientOrm
-from app.exceptions import ConflictException
+from sqlalchemy import select
+
+from app.models import RecipientOrm, NotificationOrm, StatusNotification
+from app.schemas import RecipientImportRow
+from app.exceptions import ConflictException, NotFoundException
 
 
 async def test__add__entry_created_successfully(prepare_database, recipient_repository, test_session, make_recipient):  # noqa: U100
@@ -28,3 +31,92 @@ async def test__add__exception_when_field_contact_email_with_taken(prepare_datab
     
     with pytest.raises(ConflictException):
         await recipient_repository.add(**data, session=test_session)
+
+
+async def test__get_all__returns_page_ordered_by_id(prepare_database, recipient_repository, test_session, make_recipient_entities):  # noqa: U100
+    recipients = await make_recipient_entities(5)
+    
+    page = await recipient_repository.get_all(test_session, limit=3)
+    
+    assert [r.recipient_id for r in page] == sorted(r.recipient_id for r in recipients)[:3]
+
+
+async def test__get_all__returns_recipients_after_cursor(prepare_database, recipient_repository, test_session, make_recipient_entities):  # noqa: U100
+    recipients = await make_recipient_entities(5)
+    ids = sorted(r.recipient_id for r in recipients)
+    
+    page = await recipient_repository.get_all(test_session, after=ids[2], limit=10)
+    
+    assert [r.recipient_id for r in page] == ids[3:]
+
+
+async def test__stream_all__yields_every_recipient(prepare_database, recipient_repository, test_session, make_recipient_entities):  # noqa: U100
+    recipients = await make_recipient_entities(4)
+    
+    streamed = [recipient.recipient_id async for recipient in recipient_repository.stream_all(test_session)]
+    
+    assert streamed == sorted(r.recipient_id for r in recipients)
+
+
+async def import_stream(*rows: RecipientImportRow):
+    for row in rows:
+        yield row
+
+
+async def test__import_rows__inserts_new_and_updates_existing_by_email(
+    prepare_database, recipient_repository, test_session, make_recipient  # noqa: U100
+):
+    await recipient_repository.add(**make_recipient(name='Old', contact_email='ann@example.com'), session=test_session)
+    
+    counts = await recipient_repository.import_rows(
+        import_stream(
+            RecipientImportRow(**make_recipient(name='Ann', contact_email='ann@example.com'), tags=['vip']),
+            RecipientImportRow(**make_recipient(contact_email='bob@example.com')),
+        ),
+        test_session
+    )
+    await test_session.commit()
+    test_session.expire_all()
+    ann = await test_session.scalar(select(RecipientOrm).where(RecipientOrm.contact_email == 'ann@example.com'))
+    
+    assert counts == {'inserted': 1, 'updated': 1, 'duplicates': 0}
+    assert (ann.name, ann.tags) == ('Ann', ['vip'])
+
+
+async def test__import_rows__last_row_of_duplicated_email_wins(
+    prepare_database, recipient_repository, test_session, make_recipient  # noqa: U100
+):
+    counts = await recipient_repository.import_rows(
+        import_stream(
+            RecipientImportRow(**make_recipient(name='First', contact_email='ann@example.com')),
+            RecipientImportRow(**make_recipient(name='Last', contact_email='ann@example.com')),
+        ),
+        test_session
+    )
+    await test_session.commit()
+    recipients = (await test_session.scalars(select(RecipientOrm))).all()
+    
+    assert counts == {'inserted': 1, 'updated': 0, 'duplicates': 1}
+    assert [recipient.name for recipient in recipients] == ['Last']
+
+
+async def test__delete__notifications_removed_by_cascade(
+    prepare_database,  # noqa: U100
+    recipient_repository,
+    test_session,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    [recipient] = await make_recipient_entities(1)
+    campaign = await make_campaign_entity()
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, [recipient])
+    
+    await recipient_repository.delete(recipient.recipient_id, test_session)
+    
+    assert (await test_session.scalars(select(NotificationOrm))).all() == []
+
+
+async def test__delete__exception_when_recipient_not_found(prepare_database, recipient_repository, test_session):  # noqa: U100
+    with pytest.raises(NotFoundException):
+        await recipient_repository.delete(1, test_session)
@@ -1,3 +1,7 @@
+from datetime import datetime
+from app.schemas import FanoutPage
+
+
 async def test__add__when_success_returns_status_code_201(
     campaign_repo_add_mock, auth_client, make_campaign, minute_in_future  # noqa: U100
 ):
@@ -87,16 +91,29 @@ async def test__update__mock_is_called_once_when_launch_date_in_future(
     campaign_repo_update_mock.assert_called_once()
 
 
-async def test__delete__return_corrected_status_code(auth_client, campaign_repo_delete_mock, random_id):  # noqa: U100
+async def test__delete__return_corrected_status_code(
+    auth_client, campaign_service_delete_mock, campaign_service_purge_mock, random_id  # noqa: U100
+):
     response = await auth_client.delete(f'/campaigns/{random_id}')
     
-    assert response.status_code == 204
+    assert response.status_code == 202
 
 
-async def test__delete__mock_is_called_once(auth_client, campaign_repo_delete_mock, random_id):
+async def test__delete__mock_is_called_once(
+    auth_client, campaign_service_delete_mock, campaign_service_purge_mock, random_id  # noqa: U100
+):
     await auth_client.delete(f'/campaigns/{random_id}')
     
-    assert campaign_repo_delete_mock.call_count == 1
+    assert campaign_service_delete_mock.call_count == 1
+
+
+async def test__delete__purge_scheduled_for_returned_job(
+    auth_client, campaign_service_delete_mock, campaign_service_purge_mock, random_id  # noqa: U100
+):
+    response = await auth_client.delete(f'/campaigns/{random_id}')
+    
+    job_id, campaign_id = campaign_service_purge_mock.call_args.args[:2]
+    assert (str(job_id), campaign_id) == (response.json()['job_id'], random_id)
     
 
 async def test__run__returns_status_code_204(auth_client, campaign_repo_run_mock, random_id):  # noqa: U100
@@ -121,3 +138,107 @@ async def test__acquire_for_launch__returns_status_code_200(auth_client, campaig
     response = await auth_client.post('/campaigns/acquire')
     
     assert response.status_code == 200
+    
+    
+async def test__acquire_for_launch__materialize_flag_passed_to_repository(auth_client, campaign_repo_acquire_mock):
+    await auth_client.post('/campaigns/acquire', params={'materialize': True})
+    
+    assert campaign_repo_acquire_mock.call_args.kwargs['materialize'] is True
+
+
+async def test__acquire_for_launch__batch_size_passed_to_repository(auth_client, campaign_repo_acquire_mock):
+    await auth_client.post('/campaigns/acquire', params={'batch_size': 5})
+    
+    assert campaign_repo_acquire_mock.call_args.kwargs['batch_size'] == 5
+
+
+async def test__acquire_for_launch__returns_list_of_campaigns(
+    auth_client, campaign_repo_acquire_mock, make_campaign_orm
+):
+    campaign_repo_acquire_mock.return_value = [make_campaign_orm(campaign_id=1), make_campaign_orm(campaign_id=2)]
+    
+    response = await auth_client.post('/campaigns/acquire', params={'batch_size': 2})
+    
+    assert [campaign['campaign_id'] for campaign in response.json()] == [1, 2]
+
+
+async def test__get_all__next_cursor_is_last_id_when_page_is_full(auth_client, campaign_repo_get_all_mock, make_campaign_orm):
+    campaign_repo_get_all_mock.return_value = [make_campaign_orm(campaign_id=1), make_campaign_orm(campaign_id=5)]
+    
+    response = await auth_client.get('/campaigns/', params={'limit': 2})
+    
+    assert response.json()['next_cursor'] == 5
+    
+    
+async def test__get_all__next_cursor_is_none_on_last_page(auth_client, campaign_repo_get_all_mock, make_campaign_orm):
+    campaign_repo_get_all_mock.return_value = [make_campaign_orm(campaign_id=1)]
+    
+    response = await auth_client.get('/campaigns/', params={'limit': 2})
+    
+    assert response.json()['next_cursor'] is None
+
+
+async def test__get_stats__returns_campaign_counters(prepare_database, auth_client, make_campaign_entity):  # noqa: U100
+    campaign = await make_campaign_entity()
+    
+    response = await auth_client.get(f'/campaigns/{campaign.campaign_id}/stats')
+    
+    assert response.json() == {
+        'campaign_id': campaign.campaign_id, 'pending': 0, 'sent': 0, 'delivered': 0, 'undelivered': 0
+    }
+
+
+async def test__get_next_launch__returns_repository_launch_date(auth_client, campaign_repo_get_next_launch_date_mock):
+    campaign_repo_get_next_launch_date_mock.return_value = datetime(2030, 1, 1, 12, 0)
+    
+    response = await auth_client.get('/campaigns/next-launch')
+    
+    assert response.json() == {'launch_date': '2030-01-01T12:00:00'}
+
+
+async def test__add__segment_passed_to_repository(campaign_repo_add_mock, auth_client, make_campaign, minute_in_future):
+    segment = {'min_age': 18, 'tags': ['vip']}
+    
+    await auth_client.post('/campaigns/', json={
+        **make_campaign(launch_date=minute_in_future.isoformat()), 'segment': segment
+    })
+    
+    assert campaign_repo_add_mock.call_args.kwargs['segment'].model_dump(exclude_none=True) == segment
+
+
+async def test__acquire_for_launch__allowed_for_service_with_scope(client, campaign_repo_acquire_mock):  # noqa: U100
+    response = await client.post('/campaigns/acquire', headers={'X-API-Key': 'campaign_worker.campaign-secret'})
+    
+    assert response.status_code == 200
+
+
+async def test__acquire_for_launch__forbidden_for_service_without_scope(client, campaign_repo_acquire_mock):
+    response = await client.post('/campaigns/acquire', headers={'X-API-Key': 'email_worker.email-secret'})
+    
+    assert response.status_code == 403
+    assert campaign_repo_acquire_mock.call_count == 0
+
+
+async def test__acquire_for_launch__invalid_api_key_returns_401(client, campaign_repo_acquire_mock):  # noqa: U100
+    response = await client.post('/campaigns/acquire', headers={'X-API-Key': 'campaign_worker.wrong'})
+    
+    assert response.status_code == 401
+
+
+async def test__get_all__service_key_not_accepted_on_user_endpoints(client, campaign_repo_get_all_mock):
+    response = await client.get('/campaigns/', headers={'X-API-Key': 'campaign_worker.campaign-secret'})
+    
+    assert response.status_code == 401
+    assert campaign_repo_get_all_mock.call_count == 0
+
+
+async def test__fanout__limit_and_window_passed_to_service(auth_client, mocker):
+    fanout_mock = mocker.patch(
+        'app.routers.campaign.CampaignService.fanout',
+        return_value=FanoutPage(campaign_id=1, created=2, completed=True, in_flight=2),
+    )
+    
+    response = await auth_client.post('/campaigns/fanout', params={'worker_id': 'host:1', 'limit': 2, 'window': 50})
+    
+    assert response.json()['created'] == 2
+    assert fanout_mock.call_args.args[:3] == (2, 50, 'host:1')
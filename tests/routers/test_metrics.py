@@ -0,0 +1,24 @@
+async def test__db_pool__returns_status_code_200(auth_client):
+    response = await auth_client.get('/metrics/db-pool')
+    
+    assert response.status_code == 200
+
+
+async def test__db_pool__returns_pool_checkout_stats(auth_client):
+    response = await auth_client.get('/metrics/db-pool')
+    
+    assert {'checked_out', 'checkouts', 'checkout_timeouts', 'wait_max'} <= response.json().keys()
+
+
+async def test__auth_cache__returns_cache_stats(auth_client):
+    response = await auth_client.get('/metrics/auth-cache')
+    
+    assert response.status_code == 200
+    assert {'size', 'max_size', 'hits', 'misses', 'evictions', 'invalidations'} <= response.json().keys()
+
+
+async def test__password_hasher__returns_queue_stats(auth_client):
+    response = await auth_client.get('/metrics/password-hasher')
+    
+    assert response.status_code == 200
+    assert {'max_concurrency', 'in_flight', 'waiting', 'wait_max'} <= response.json().keys()
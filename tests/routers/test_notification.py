@@ -0,0 +1,52 @@
+import json
+
+from app.models import StatusNotification
+
+
+async def test__add_many__returns_created_count_by_default(auth_client, notification_repo_add_many_mock):  # noqa: U100
+    response = await auth_client.post('/notifications/add/many', json={'campaign_id': 1, 'recipients_id': [1, 2, 3]})
+    
+    assert response.status_code == 201
+    assert response.json() == {'campaign_id': 1, 'created': 3}
+    
+    
+async def test__add_many__returns_rows_when_requested(
+    auth_client, notification_repo_add_many_mock, notification_repo_add_many_returning_mock
+):
+    response = await auth_client.post(
+        '/notifications/add/many', params={'returning': True}, json={'campaign_id': 1, 'recipients_id': [1, 2, 3]}
+    )
+    
+    assert response.json() == []
+    assert notification_repo_add_many_returning_mock.call_count == 1
+    assert notification_repo_add_many_mock.call_count == 0
+
+
+async def test__export__streams_only_notifications_of_campaign(
+    prepare_database,  # noqa: U100
+    auth_client,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities
+):
+    first_campaign = await make_campaign_entity()
+    second_campaign = await make_campaign_entity()
+    recipients = await make_recipient_entities(3)
+    await make_notification_entities(StatusNotification.PENDING, first_campaign.campaign_id, recipients)
+    await make_notification_entities(StatusNotification.PENDING, second_campaign.campaign_id, recipients)
+    
+    response = await auth_client.get('/notifications/export', params={'campaign_id': first_campaign.campaign_id})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    
+    assert len(rows) == 3
+    assert {row['campaign_id'] for row in rows} == {first_campaign.campaign_id}
+
+
+async def test__update_statuses__returns_updated_count(auth_client, notification_repo_update_statuses_mock):  # noqa: U100
+    response = await auth_client.post('/notifications/status/bulk', json=[
+        {'campaign_id': 1, 'recipient_id': 1, 'status': 'delivered'},
+        {'campaign_id': 1, 'recipient_id': 2, 'status': 'undelivered'},
+    ])
+    
+    assert response.status_code == 200
+    assert response.json() == {'updated': 2}
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from app.models import JobOrm, StatusJob
+
+
+async def test__export__streams_all_recipients_as_ndjson(prepare_database, auth_client, make_recipient_entities):  # noqa: U100
+    recipients = await make_recipient_entities(3)
+    
+    response = await auth_client.get('/recipients/export')
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [row['recipient_id'] for row in rows] == sorted(r.recipient_id for r in recipients)
+
+
+async def test__export__streams_csv_with_header(prepare_database, auth_client, make_recipient_entities):  # noqa: U100
+    await make_recipient_entities(2)
+    
+    response = await auth_client.get('/recipients/export', params={'format': 'csv'})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    
+    assert len(rows) == 2
+    assert set(rows[0]) == {'recipient_id', 'name', 'lastname', 'age', 'contact_email', 'tags'}
+
+
+async def test__export__csv_tags_joined_like_import_expects(
+    prepare_database, auth_client, recipient_repository, test_session  # noqa: U100
+):
+    await recipient_repository.add('Ann', 'Smith', 40, 'ann@example.com', test_session, tags=['vip', 'newsletter'])
+    
+    response = await auth_client.get('/recipients/export', params={'format': 'csv'})
+    [row] = list(csv.DictReader(io.StringIO(response.text)))
+    
+    assert row['tags'] == 'vip;newsletter'
+
+
+async def test__import__returns_done_job_with_counts(prepare_database, auth_client):  # noqa: U100
+    body = (
+        b'name,lastname,age,contact_email\n'
+        b'Ann,Smith,40,ann@example.com\n'
+        b'Bob,Smith,oops,bob@example.com\n'
+    )
+    
+    response = await auth_client.post('/recipients/import', params={'format': 'csv'}, content=body)
+    
+    assert response.status_code == 201
+    assert response.json()['status'] == 'done'
+    assert response.json()['result'] == {'inserted': 1, 'updated': 0, 'duplicates': 0, 'rejected': 1}
+
+
+async def test__import__job_can_be_fetched_afterwards(prepare_database, auth_client):  # noqa: U100
+    body = b'{"name": "Ann", "lastname": "Smith", "age": 40, "contact_email": "ann@example.com"}\n'
+    job = (await auth_client.post('/recipients/import', content=body)).json()
+    
+    response = await auth_client.get(f'/jobs/{job["job_id"]}')
+    
+    assert response.json() == job
+
+
+async def test__import__invalid_csv_header_fails_job(prepare_database, auth_client, test_session):  # noqa: U100
+    response = await auth_client.post('/recipients/import', params={'format': 'csv'}, content=b'email\nann@example.com\n')
+    jobs = (await test_session.scalars(select(JobOrm))).all()
+    
+    assert response.status_code == 422
+    assert [job.status for job in jobs] == [StatusJob.FAILED]
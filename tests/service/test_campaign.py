@@ -1,5 +1,7 @@
 import pytest
+from sqlalchemy import select
 
+from app.models import CampaignOrm, JobOrm, OutboxOrm, StatusCampaign, StatusJob, StatusNotification
 from app.exceptions import NoAvailableCampaignsException
 
 
@@ -15,3 +17,102 @@ async def test__complete__mock_is_called_once(campaign_service, campaign_repo_co
     await campaign_service.complete(test_session)
     
     assert campaign_repo_complete_mock.call_count == 1
+
+
+async def test__delete__marks_campaign_deleting_and_creates_job(
+    prepare_database, campaign_service, make_campaign_entity, test_session  # noqa: U100
+):
+    campaign = await make_campaign_entity()
+    
+    job = await campaign_service.delete(campaign.campaign_id, test_session)
+    
+    assert campaign.status == StatusCampaign.DELETING
+    assert job.status == StatusJob.RUNNING
+
+
+async def test__delete__restarts_job_of_interrupted_deletion(
+    prepare_database, campaign_service, make_campaign_entity, test_session, test_session_maker, mocker  # noqa: U100
+):
+    campaign = await make_campaign_entity()
+    campaign_id = campaign.campaign_id
+    job = await campaign_service.delete(campaign_id, test_session)
+    mocker.patch.object(campaign_service.campaign_repository, 'delete_notifications', side_effect=RuntimeError)
+    await campaign_service.purge(job.job_id, campaign_id, test_session_maker)
+    test_session.expire_all()
+    assert (await test_session.get(JobOrm, job.job_id)).status == StatusJob.FAILED
+    mocker.stopall()
+    
+    retried = await campaign_service.delete(campaign_id, test_session)
+    await campaign_service.purge(retried.job_id, campaign_id, test_session_maker)
+    test_session.expire_all()
+    
+    assert retried.job_id == job.job_id
+    assert (await test_session.get(JobOrm, job.job_id)).status == StatusJob.DONE
+    assert await test_session.get(CampaignOrm, campaign_id) is None
+
+
+async def test__purge__finishes_job_when_campaign_already_purged(
+    prepare_database, campaign_service, make_campaign_entity, test_session, test_session_maker  # noqa: U100
+):
+    campaign = await make_campaign_entity()
+    campaign_id = campaign.campaign_id
+    job = await campaign_service.delete(campaign_id, test_session)
+    await campaign_service.purge(job.job_id, campaign_id, test_session_maker)
+    
+    await campaign_service.purge(job.job_id, campaign_id, test_session_maker)
+    test_session.expire_all()
+    
+    assert (await test_session.get(JobOrm, job.job_id)).status == StatusJob.DONE
+
+
+async def test__purge__deletes_rows_in_batches_and_reports_progress(
+    prepare_database,  # noqa: U100
+    campaign_service,
+    test_session,
+    test_session_maker,
+    make_campaign_entity,
+    make_recipient_entities,
+    make_notification_entities,
+):
+    recipients = await make_recipient_entities(5)
+    campaign = await make_campaign_entity()
+    await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+    campaign_id = campaign.campaign_id
+    job = await campaign_service.delete(campaign_id, test_session)
+    
+    await campaign_service.purge(job.job_id, campaign_id, test_session_maker, batch_size=2)
+    test_session.expire_all()
+    job_orm = await test_session.get(JobOrm, job.job_id)
+    
+    assert await test_session.get(CampaignOrm, campaign_id) is None
+    assert (await test_session.scalars(select(OutboxOrm))).all() == []
+    assert job_orm.status == StatusJob.DONE
+    assert job_orm.result == {'notifications': 5, 'outbox': 5}
+
+
+async def test__fanout__nothing_created_while_window_is_full(campaign_service, test_session, mocker):
+    mocker.patch.object(campaign_service.campaign_repository, 'has_pending_fanout', return_value=True)
+    mocker.patch.object(campaign_service.campaign_repository, 'count_in_flight', return_value=100)
+    fanout_mock = mocker.patch.object(campaign_service.campaign_repository, 'fanout')
+    
+    page = await campaign_service.fanout(10, 100, 'worker', 30, test_session)
+    
+    assert page.campaign_id is None
+    assert fanout_mock.call_count == 0
+
+
+async def test__fanout__exception_when_no_campaign_to_fan_out(campaign_service, test_session, mocker):
+    mocker.patch.object(campaign_service.campaign_repository, 'has_pending_fanout', return_value=True)
+    mocker.patch.object(campaign_service.campaign_repository, 'count_in_flight', return_value=0)
+    mocker.patch.object(campaign_service.campaign_repository, 'fanout', return_value=None)
+    
+    with pytest.raises(NoAvailableCampaignsException):
+        await campaign_service.fanout(10, 100, 'worker', 30, test_session)
+
+
+async def test__fanout__exception_when_nothing_pending_and_window_is_full(campaign_service, test_session, mocker):
+    mocker.patch.object(campaign_service.campaign_repository, 'has_pending_fanout', return_value=False)
+    mocker.patch.object(campaign_service.campaign_repository, 'count_in_flight', return_value=100)
+    
+    with pytest.raises(NoAvailableCampaignsException):
+        await campaign_service.fanout(10, 100, 'worker', 30, test_session)
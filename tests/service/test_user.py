@@ -52,3 +52,28 @@ async def test__authenticate_user__mock_is_called_once(
     
     assert user_repository_get_by_email_mock.call_count == 1
     assert verify_password_mock.call_count == 1
+
+
+async def test__get_current_user__cached_user_skips_repository(
+    user_repository_get_mock, cached_auth_service, test_session, make_user_orm
+):
+    user_repository_get_mock.return_value = make_user_orm
+    token = cached_auth_service.create_token(make_user_orm.user_id).access_token
+    
+    first = await cached_auth_service.get_current_user(test_session, token)
+    second = await cached_auth_service.get_current_user(test_session, token)
+    
+    assert first == second
+    assert user_repository_get_mock.call_count == 1
+
+
+async def test__get_current_user__unknown_user_is_not_cached(
+    user_repository_get_mock, cached_auth_service, test_session, user_cache, make_user_orm
+):
+    user_repository_get_mock.return_value = None
+    token = cached_auth_service.create_token(make_user_orm.user_id).access_token
+    
+    with pytest.raises(CredentialsException):
+        await cached_auth_service.get_current_user(test_session, token)
+    
+    assert user_cache.stats()['size'] == 0
@@ -0,0 +1,67 @@
+from app.cache import UserCache
+from app.schemas import User
+
+
+def make_clock(start: float = 0):
+    now = [start]
+    
+    def clock() -> float:
+        return now[0]
+    clock.now = now
+    return clock
+
+
+def test__get__least_recently_used_entry_evicted(make_user):
+    cache = UserCache(max_size=2)
+    users = [make_user() for _ in range(3)]
+    cache.put('a', users[0])
+    cache.put('b', users[1])
+    cache.get('a')
+    
+    cache.put('c', users[2])
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == users[0]
+    assert cache.stats()['evictions'] == 1
+
+
+def test__get__expired_entry_is_a_miss(make_user):
+    clock = make_clock()
+    cache = UserCache(ttl=10, clock=clock)
+    cache.put('a', make_user())
+    
+    clock.now[0] = 10
+    
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+    assert cache.stats()['misses'] == 1
+
+
+async def test__watch__changed_user_invalidated_on_commit(
+    prepare_database, user_cache, make_object_user, test_session  # noqa: U100
+):
+    user = await make_object_user()
+    user_cache.put(str(user.user_id), User.model_validate(user))
+    
+    user.email = 'changed@test.ru'
+    await test_session.flush()
+    assert user_cache.get(str(user.user_id)) is not None
+    await test_session.commit()
+    
+    assert user_cache.get(str(user.user_id)) is None
+    assert user_cache.stats()['invalidations'] == 1
+
+
+async def test__watch__rolled_back_change_keeps_entry(
+    prepare_database, user_cache, make_object_user, test_session  # noqa: U100
+):
+    user = await make_object_user()
+    user_id = str(user.user_id)
+    user_cache.put(user_id, User.model_validate(user))
+    
+    user.email = 'changed@test.ru'
+    await test_session.flush()
+    await test_session.rollback()
+    await test_session.commit()
+    
+    assert user_cache.get(user_id) is not None
@@ -0,0 +1,32 @@
+from app.dependencies import get_auth_service, get_campaign_repository, get_campaign_service
+
+
+def test__container__services_share_repositories(container):
+    assert container.campaign_service.campaign_repository is container.campaign_repository
+    assert container.recipient_service.job_repository is container.job_repository
+    assert container.auth_service.cache is container.user_cache
+
+
+def test__dependencies__resolve_container_instances(container):
+    assert get_campaign_repository(container) is container.campaign_repository
+    assert get_campaign_service(container) is container.campaign_service
+    assert get_auth_service(container) is container.auth_service
+
+
+async def test__container__swapped_repository_used_by_endpoints(app, auth_client, container, mocker):
+    container.campaign_repository = mocker.Mock(get_next_launch_date=mocker.AsyncMock(return_value=None))
+
+    response = await auth_client.get('/campaigns/next-launch')
+
+    assert response.json() == {'launch_date': None}
+    assert app.state.container.campaign_repository.get_next_launch_date.call_count == 1
+
+
+async def test__container__swapped_repository_used_by_services(auth_client, container, mocker):
+    container.campaign_service
+    container.campaign_repository = mocker.Mock(complete=mocker.AsyncMock(return_value=None))
+
+    response = await auth_client.post('/campaigns/complete/')
+
+    assert response.status_code == 422
+    assert container.campaign_service.campaign_repository.complete.call_count == 1
@@ -0,0 +1,48 @@
+import pytest
+
+from app.db import create_db_engine, get_pool_stats, MonitoredPool
+from app.server import create_app, lifespan
+
+
+@pytest.fixture
+def make_pool_config(test_config, mocker):
+    def inner(pool_size: int = 1, max_overflow: int = 0, pool_timeout: float = 5):
+        return mocker.Mock(
+            ASYNC_DATABASE_URL=test_config.ASYNC_DATABASE_URL,
+            DB_POOL_SIZE=pool_size,
+            DB_MAX_OVERFLOW=max_overflow,
+            DB_POOL_RECYCLE=60,
+            DB_POOL_TIMEOUT=pool_timeout,
+            DB_CONNECT_TIMEOUT=5,
+            DB_COMMAND_TIMEOUT=5,
+        )
+    return inner
+
+
+def test__create_db_engine__pool_configured_from_config(make_pool_config):
+    engine = create_db_engine(make_pool_config(pool_size=3, pool_timeout=7))
+    
+    assert isinstance(engine.pool, MonitoredPool)
+    assert engine.pool.size() == 3
+    assert engine.pool.timeout() == 7
+
+
+async def test__get_pool_stats__counts_checkouts(prepare_database, make_pool_config):  # noqa: U100
+    engine = create_db_engine(make_pool_config())
+    
+    async with engine.connect():
+        stats = get_pool_stats(engine)
+    await engine.dispose()
+    
+    assert stats['checkouts'] == 1
+    assert stats['checked_out'] == 1
+
+
+async def test__lifespan__engine_created_on_startup_and_disposed_on_shutdown(mocker):
+    dispose_mock = mocker.patch('sqlalchemy.ext.asyncio.AsyncEngine.dispose')
+    app = create_app()
+    
+    async with lifespan(app):
+        assert app.state.container.session_maker.kw['bind'] is app.state.container.engine
+    
+    assert dispose_mock.call_count == 1
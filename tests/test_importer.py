@@ -0,0 +1,49 @@
+import pytest
+
+from app.export import ExportFormat
+from app.importer import RecipientRows, iter_lines
+from app.exceptions import ImportFormatException
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def test__iter_lines__joins_lines_split_across_chunks():
+    lines = [line async for line in iter_lines(stream(b'first\r\nsec', 'ond ü'.encode()[:-1], 'ü'.encode()[-1:], b'\nlast'))]
+    
+    assert lines == ['first', 'second ü', 'last']
+
+
+async def test__recipient_rows__csv_rows_validated_and_invalid_counted():
+    body = (
+        b'name,lastname,age,contact_email,tags\n'
+        b'Ann,Smith,40,ann@example.com,vip;beta\n'
+        b'Bob,Smith,not-a-number,bob@example.com,\n'
+        b'Kid,Smith,12,not-an-email,\n'
+        b'broken line\n'
+    )
+    rows = RecipientRows(stream(body), ExportFormat.CSV)
+    
+    valid = [row async for row in rows]
+    
+    assert [(row.contact_email, row.tags) for row in valid] == [('ann@example.com', ['vip', 'beta'])]
+    assert rows.rejected == 3
+
+
+async def test__recipient_rows__ndjson_invalid_json_rejected():
+    body = b'{"name": "Ann", "lastname": "Smith", "age": 40, "contact_email": "ann@example.com"}\n{oops\n'
+    rows = RecipientRows(stream(body), ExportFormat.NDJSON)
+    
+    valid = [row async for row in rows]
+    
+    assert len(valid) == 1
+    assert rows.rejected == 1
+
+
+async def test__recipient_rows__csv_header_without_required_columns():
+    rows = RecipientRows(stream(b'name,age\nAnn,40\n'), ExportFormat.CSV)
+    
+    with pytest.raises(ImportFormatException):
+        [row async for row in rows]
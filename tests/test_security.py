@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from app.exceptions import CredentialsException
+from app.security import Scope, ServiceKeyring, ServiceKey, WORKER_SCOPES, generate_api_key, service_key_entry
+
+
+def test__verify__returns_service_with_its_scopes(service_keyring):
+    service = service_keyring.verify('campaign_worker.campaign-secret')
+    
+    assert service.name == 'campaign_worker'
+    assert service.scopes == [Scope.CAMPAIGNS_LAUNCH]
+
+
+@pytest.mark.parametrize(
+    'api_key', ['campaign_worker.wrong-secret', 'unknown.campaign-secret', 'campaign-secret', 'email_worker.campaign-secret']
+)
+def test__verify__rejects_invalid_keys(service_keyring, api_key):
+    with pytest.raises(CredentialsException):
+        service_keyring.verify(api_key)
+
+
+def test__service_key_entry__configures_verifiable_key_with_worker_scopes():
+    api_key, key_hash = generate_api_key('email_worker')
+    entry = service_key_entry('email_worker', key_hash, WORKER_SCOPES['email_worker'])
+    keyring = ServiceKeyring({name: ServiceKey(**key) for name, key in json.loads(entry).items()})
+    
+    assert keyring.verify(api_key).scopes == [Scope.NOTIFICATIONS_WRITE]
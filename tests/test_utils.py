@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import time
+
+from app.utils import PasswordHasher, get_password_hash, verify_password
+
+
+async def test__run__hash_verifies_off_the_event_loop(password_hasher):
+    hashed = await password_hasher.run(get_password_hash, 'secret')
+    
+    assert await password_hasher.run(verify_password, 'secret', hashed) is True
+    assert await password_hasher.run(verify_password, 'wrong', hashed) is False
+
+
+async def test__run__calls_beyond_concurrency_limit_wait_for_a_slot():
+    hasher = PasswordHasher(max_concurrency=1)
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    
+    def slow() -> None:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+    
+    try:
+        await asyncio.gather(*(hasher.run(slow) for _ in range(3)))
+    finally:
+        hasher.shutdown()
+    
+    assert peak == 1
+    assert hasher.stats()['completed'] == 3
+    assert hasher.stats()['wait_max'] >= 0.05
+
+
+async def test__run__event_loop_keeps_running_while_hashing(password_hasher):
+    ticks = 0
+    
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+    
+    task = asyncio.create_task(ticker())
+    await password_hasher.run(time.sleep, 0.05)
+    task.cancel()
+    
+    assert ticks > 1
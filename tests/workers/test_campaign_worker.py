@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import asyncio
+
+import pytest
+
+from app.exceptions import ApiClientException
+from app.schemas import FanoutPage
+from app.workers.campaign_worker import CampaignWorker
+
+
+@pytest.fixture
+def api_client_mock(mocker):
+    return mocker.AsyncMock()
+
+
+@pytest.fixture
+def campaign_worker(api_client_mock, mocker):
+    return CampaignWorker(api_client_mock, mocker.AsyncMock(), batch_size=2, poll_interval=60)
+
+
+async def test__get_wakeup_timeout__sleeps_until_next_launch(campaign_worker, api_client_mock):
+    api_client_mock.get_next_launch_date.return_value = datetime.now() + timedelta(seconds=5)
+    
+    timeout = await campaign_worker.get_wakeup_timeout()
+    
+    assert 4 < timeout <= 5
+
+
+async def test__get_wakeup_timeout__poll_interval_when_nothing_scheduled(campaign_worker, api_client_mock):
+    api_client_mock.get_next_launch_date.return_value = None
+    
+    assert await campaign_worker.get_wakeup_timeout() == 60
+
+
+async def test__get_wakeup_timeout__capped_by_poll_interval(campaign_worker, api_client_mock):
+    api_client_mock.get_next_launch_date.return_value = datetime.now() + timedelta(hours=1)
+    
+    assert await campaign_worker.get_wakeup_timeout() == 60
+
+
+async def test__launch_due_campaigns__acquires_again_while_batches_are_full(campaign_worker, api_client_mock, mocker):
+    api_client_mock.acquire_campaigns_for_launch.side_effect = [
+        [mocker.Mock(), mocker.Mock()], [mocker.Mock()]
+    ]
+    
+    await campaign_worker.launch_due_campaigns()
+    
+    assert api_client_mock.acquire_campaigns_for_launch.call_count == 2
+
+
+async def test__complete_campaigns__completes_until_none_left(campaign_worker, api_client_mock, mocker):
+    api_client_mock.complete_campaign.side_effect = [
+        mocker.Mock(), mocker.Mock(), ApiClientException(status_code=422, detail='')
+    ]
+    
+    await campaign_worker.complete_campaigns()
+    
+    assert api_client_mock.complete_campaign.call_count == 3
+
+
+async def test__fan_out__waits_for_relay_while_window_is_full(campaign_worker, api_client_mock, mocker):
+    sleep_mock = mocker.patch('app.workers.campaign_worker.asyncio.sleep')
+    api_client_mock.fanout_campaign.side_effect = [
+        FanoutPage(campaign_id=None, created=0, completed=False, in_flight=10000),
+        FanoutPage(campaign_id=1, created=1000, completed=True, in_flight=1000),
+        ApiClientException(status_code=422, detail=''),
+    ]
+    
+    await campaign_worker.fan_out()
+    
+    assert api_client_mock.fanout_campaign.call_count == 3
+    assert sleep_mock.call_count == 1
+
+
+async def test__log_progress__counts_created_notifications_per_campaign(campaign_worker, caplog):
+    caplog.set_level('INFO', logger='app.workers.campaign_worker')
+    
+    campaign_worker.log_progress(1, 1000, completed=False)
+    campaign_worker.log_progress(2, 10, completed=True)
+    campaign_worker.log_progress(1, 500, completed=True)
+    
+    assert caplog.messages[-1] == 'Notifications of the campaign_id: 1 have been created, 1500 in total'
+    assert campaign_worker.progress == {}
+
+
+async def test__run_fan_out_lane__woken_when_campaigns_start(campaign_worker, api_client_mock):
+    api_client_mock.fanout_campaign.side_effect = ApiClientException(status_code=422, detail='')
+    lane = asyncio.create_task(campaign_worker.run_fan_out_lane())
+    await asyncio.sleep(0)
+    
+    campaign_worker.campaigns_started.set()
+    campaign_worker.campaigns_started.clear()
+    await asyncio.sleep(0)
+    lane.cancel()
+    
+    assert api_client_mock.fanout_campaign.call_count == 2
+
+
+async def test__fan_out__pages_requested_under_worker_lease(api_client_mock, mocker):
+    worker = CampaignWorker(api_client_mock, mocker.AsyncMock(), lease_ttl=10, worker_id='host:1')
+    api_client_mock.fanout_campaign.side_effect = ApiClientException(status_code=422, detail='')
+    
+    await worker.fan_out()
+    
+    assert api_client_mock.fanout_campaign.call_args.args == ('host:1',)
+    assert api_client_mock.fanout_campaign.call_args.kwargs['lease_ttl'] == 10
@@ -0,0 +1,73 @@
+import pytest
+
+from app.exceptions import ApiClientException
+from app.schemas import NotificationStatusUpdate, StatusNotification
+from app.workers.email_worker import StatusBuffer
+
+
+@pytest.fixture
+def api_client_mock(mocker):
+    return mocker.AsyncMock()
+
+
+@pytest.fixture
+def make_status_update():
+    def inner(recipient_id: int = 1) -> NotificationStatusUpdate:
+        return NotificationStatusUpdate(campaign_id=1, recipient_id=recipient_id, status=StatusNotification.DELIVERED)
+    return inner
+
+
+async def test__add__flushes_when_buffer_is_full(api_client_mock, make_status_update, mocker):
+    buffer = StatusBuffer(api_client_mock, max_size=2, flush_interval=60)
+    
+    await buffer.add(mocker.AsyncMock(), make_status_update(1))
+    await buffer.add(mocker.AsyncMock(), make_status_update(2))
+    
+    api_client_mock.update_notification_statuses.assert_called_once_with([make_status_update(1), make_status_update(2)])
+    
+
+async def test__add__messages_not_acked_before_flush(api_client_mock, make_status_update, mocker):
+    buffer = StatusBuffer(api_client_mock, max_size=2, flush_interval=60)
+    message = mocker.AsyncMock()
+    
+    await buffer.add(message, make_status_update())
+    
+    assert message.ack.call_count == 0
+    assert api_client_mock.update_notification_statuses.call_count == 0
+
+
+async def test__flush__acks_messages_after_update(api_client_mock, make_status_update, mocker):
+    buffer = StatusBuffer(api_client_mock, max_size=10, flush_interval=60)
+    message = mocker.AsyncMock()
+    await buffer.add(message, make_status_update())
+    
+    await buffer.flush()
+    
+    assert message.ack.call_count == 1
+
+
+async def test__flush__keeps_updates_unacked_when_update_failed(api_client_mock, make_status_update, mocker):
+    buffer = StatusBuffer(api_client_mock, max_size=10, flush_interval=60)
+    message = mocker.AsyncMock()
+    await buffer.add(message, make_status_update())
+    api_client_mock.update_notification_statuses.side_effect = ApiClientException(422, 'error')
+    
+    await buffer.flush()
+    api_client_mock.update_notification_statuses.side_effect = None
+    await buffer.flush()
+    
+    assert api_client_mock.update_notification_statuses.call_count == 2
+    assert message.ack.call_count == 1
+
+
+async def test__add__full_buffer_not_flushed_again_until_retry_interval(api_client_mock, make_status_update, mocker):
+    now = [0.0]
+    buffer = StatusBuffer(api_client_mock, max_size=1, flush_interval=60, clock=lambda: now[0])
+    api_client_mock.update_notification_statuses.side_effect = ApiClientException(422, 'error')
+    
+    await buffer.add(mocker.AsyncMock(), make_status_update(1))
+    await buffer.add(mocker.AsyncMock(), make_status_update(2))
+    now[0] = 61
+    await buffer.add(mocker.AsyncMock(), make_status_update(3))
+    
+    assert api_client_mock.update_notification_statuses.call_count == 2
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import select
+
+from app.clients.broker_client import Publisher
+from app.exceptions import PublishException
+from app.models import OutboxOrm, StatusNotification, StatusOutbox
+from app.workers.outbox_relay import OutboxRelay, EMAIL_QUEUE
+
+
+@pytest.fixture
+def broker_client_mock(mocker):
+    return mocker.AsyncMock()
+
+
+@pytest.fixture
+def relay(test_session_maker, broker_client_mock, outbox_repository):
+    publisher = Publisher(broker_client_mock, EMAIL_QUEUE, retry_delay=0)
+    return OutboxRelay(test_session_maker, publisher, outbox_repository, batch_size=10)
+
+
+@pytest.fixture
+async def pending_notifications(make_campaign_entity, make_recipient_entities, make_notification_entities):
+    recipients = await make_recipient_entities(3)
+    campaign = await make_campaign_entity()
+    return await make_notification_entities(StatusNotification.PENDING, campaign.campaign_id, recipients)
+
+
+async def get_statuses(session) -> set[StatusOutbox]:
+    result = await session.execute(select(OutboxOrm.status))
+    return set(result.scalars().all())
+
+
+async def test__relay_batch__publishes_and_marks_messages_sent(
+    prepare_database, relay, broker_client_mock, pending_notifications, test_session  # noqa: U100
+):
+    relayed = await relay.relay_batch()
+    channel = await broker_client_mock.get_channel()
+    
+    assert relayed == 3
+    assert channel.default_exchange.publish.call_count == 3
+    assert await get_statuses(test_session) == {StatusOutbox.SENT}
+
+
+async def test__relay_batch__messages_stay_new_when_publish_fails(
+    prepare_database, relay, broker_client_mock, pending_notifications, test_session  # noqa: U100
+):
+    channel = await broker_client_mock.get_channel()
+    channel.default_exchange.publish.side_effect = ConnectionError
+    
+    with pytest.raises(PublishException):
+        await relay.relay_batch()
+    
+    assert await get_statuses(test_session) == {StatusOutbox.NEW}
@@ -0,0 +1,55 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from app.models import StatusCampaign
+from app.workers.retention_worker import RetentionWorker
+
+
+async def test__archive_finished_campaigns__archives_each_campaign_once(
+    prepare_database, test_session_maker, campaign_repository, make_campaign_entity  # noqa: U100
+):
+    for _ in range(2):
+        await make_campaign_entity(status=StatusCampaign.DONE)
+    worker = RetentionWorker(test_session_maker, campaign_repository, retention=timedelta(minutes=-1))
+    
+    assert await worker.archive_finished_campaigns() == 2
+    assert await worker.archive_finished_campaigns() == 0
+
+
+async def test__create_partitions__creates_missing_partitions_ahead(
+    prepare_database, test_session_maker, campaign_repository, partition_size  # noqa: U100
+):
+    worker = RetentionWorker(
+        test_session_maker, campaign_repository, retention=timedelta(days=1), partition_size=partition_size,
+        partitions_ahead=11
+    )
+    
+    assert await worker.create_partitions() == ['notifications_p110']
+    assert await worker.create_partitions() == []
+
+
+async def test__run_partition_creation__keeps_running_after_failure(test_session_maker, campaign_repository, mocker):
+    worker = RetentionWorker(test_session_maker, campaign_repository, retention=timedelta(days=1))
+    create_mock = mocker.patch.object(worker, 'create_partitions', side_effect=[Exception, []])
+    mocker.patch('app.workers.retention_worker.asyncio.sleep', side_effect=[None, asyncio.CancelledError])
+    
+    with pytest.raises(asyncio.CancelledError):
+        await worker.run_partition_creation()
+    
+    assert create_mock.call_count == 2
+
+
+async def test__run_retention__retires_partitions_when_archiving_fails(
+    test_session_maker, campaign_repository, mocker
+):
+    worker = RetentionWorker(test_session_maker, campaign_repository, retention=timedelta(days=1))
+    mocker.patch.object(worker, 'archive_finished_campaigns', side_effect=Exception)
+    retire_mock = mocker.patch.object(worker, 'retire_partitions', return_value=[])
+    mocker.patch('app.workers.retention_worker.asyncio.sleep', side_effect=asyncio.CancelledError)
+    
+    with pytest.raises(asyncio.CancelledError):
+        await worker.run_retention()
+    
+    assert retire_mock.call_count == 1